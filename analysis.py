@@ -0,0 +1,73 @@
+"""Análisis estático de un programa al cargarlo.
+
+Con la semántica de "primera coincidencia", cada par (estado, símbolo) lo decide la
+primera instrucción que lo cubre. A partir de esos pares se arma el grafo de estados
+alcanzables desde '00' (la máquina se detiene al entrar en un estado de aceptación, así
+que de ellos no sale nada) y se descartan las instrucciones que nunca se pueden ejecutar:
+las de estados inalcanzables o de aceptación y las tapadas, cuyos símbolos ya cubren
+instrucciones anteriores del mismo estado. Cada descarte queda como un aviso.
+"""
+from collections import deque
+from typing import Dict, List, Set, Tuple
+from instruction import Instruction
+from errors import ProgramError
+
+START_STATE = '00'
+
+def first_matches(instructions: List[Instruction]) -> Dict[Tuple[str, str], Tuple[Instruction, int]]:
+    """(estado, símbolo) -> (instrucción que lo decide, índice del símbolo en ella)."""
+    winners: Dict[Tuple[str, str], Tuple[Instruction, int]] = {}
+    for instruction in instructions:
+        for idx, symbol in enumerate(instruction.input_symbols):
+            winners.setdefault((instruction.p_state, symbol), (instruction, idx))
+    return winners
+
+def reachable_states(winners: Dict[Tuple[str, str], Tuple[Instruction, int]], accepting: Set[str]) -> Set[str]:
+    """Estados a los que se puede llegar desde '00' siguiendo las transiciones efectivas."""
+    edges: Dict[str, Set[str]] = {}
+    for (state, _), (instruction, idx) in winners.items():
+        next_state = instruction.outcomes[idx][0]
+        edges.setdefault(state, set()).add(state if next_state is None else next_state)
+    reached = {START_STATE}
+    pending = deque(reached)
+    while pending:
+        state = pending.popleft()
+        if state in accepting:
+            continue
+        for next_state in edges.get(state, ()):
+            if next_state not in reached:
+                reached.add(next_state)
+                pending.append(next_state)
+    return reached
+
+def analyze(program) -> List[str]:
+    """Poda en su lugar `program.instructions` y devuelve los avisos.
+
+    Las instrucciones que aún no pasaron por `Instruction.resolve` (armadas a mano) se
+    clasifican aquí: un largo de q o z que no coincide con los símbolos leídos es un
+    ProgramError al cargar, no al ejecutar.
+    """
+    for number, instruction in enumerate(program.instructions, 1):
+        if instruction.outcomes is None:
+            error = instruction.resolve()
+            if error is not None:
+                raise ProgramError(f"Instrucción {number} {instruction}: {error}")
+    accepting = set(program.accepting_states)
+    winners = first_matches(program.instructions)
+    reached = reachable_states(winners, accepting)
+    kept: List[Instruction] = []
+    warnings: List[str] = []
+    for number, instruction in enumerate(program.instructions, 1):
+        state = instruction.p_state
+        if state in accepting:
+            warnings.append(f"Instrucción {number} {instruction} descartada: {state} es un estado de aceptación")
+        elif state not in reached:
+            warnings.append(f"Instrucción {number} {instruction} descartada: el estado {state} "
+                            f"no se alcanza desde {START_STATE}")
+        elif all(winners[state, symbol][0] is not instruction for symbol in instruction.input_symbols):
+            warnings.append(f"Instrucción {number} {instruction} descartada: las instrucciones anteriores "
+                            f"de {state} ya cubren todos sus símbolos")
+        else:
+            kept.append(instruction)
+    program.instructions[:] = kept
+    return warnings
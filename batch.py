@@ -0,0 +1,182 @@
+"""Ejecución sin interfaz gráfica: un programa MTU sobre muchas entradas en paralelo.
+
+Uso:
+    python batch.py programa.txt entradas.txt [-o resultados.jsonl] [--max-steps N] [--max-seconds S]
+                    [--detect-loops] [--engine interpreter|compiled|lockstep] [--workers N]
+                    [--result-cache resultados.sqlite]
+
+Cada línea de `entradas.txt` (o de la entrada estándar con `-`) es una cadena de entrada.
+Se escribe una línea JSON por entrada, en el mismo orden. Las entradas se envían en lotes
+de `--chunksize` y solo hay unos pocos lotes en vuelo por proceso, así que la memoria no
+crece con el tamaño de la entrada y los resultados salen a medida que se completan. Con
+`--engine lockstep` cada proceso ejecuta su lote a la vez con NumPy (ver lockstep.py).
+Con `--result-cache` las entradas ya vistas con el mismo programa y límite de pasos no se
+vuelven a ejecutar (ver result_cache.py); sus líneas llevan "cached": true.
+"""
+import argparse
+import os
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import chain, islice
+from typing import Callable, Iterable, Iterator, List, Optional, TextIO
+import lockstep
+from cycles import CycleDetector
+from errors import MTUError
+from mtu import MTU
+from program import Program, parse_program
+from program_cache import ProgramCache
+from result_cache import ResultCache
+from tape import TAPE_BACKENDS
+
+DEFAULT_MAX_STEPS = 1_000_000
+DEFAULT_CHUNKSIZE = {"interpreter": 64, "compiled": 64, "lockstep": 4096}
+
+_worker_mtu: Optional[MTU] = None
+_worker_max_steps: Optional[int] = None
+_worker_max_seconds: Optional[float] = None
+_worker_detect_loops = False
+_worker_engine: Optional["lockstep.LockstepEngine"] = None
+_worker_cache: Optional[ResultCache] = None
+
+def init_worker(program: Program, max_steps: Optional[int], max_seconds: Optional[float] = None,
+                tape: str = "dense", detect_loops: bool = False, engine: str = "interpreter",
+                result_cache: Optional[str] = None):
+    # El programa llega ya analizado y compilado: los procesos no vuelven a leer el archivo.
+    global _worker_mtu, _worker_max_steps, _worker_max_seconds, _worker_detect_loops, _worker_engine, _worker_cache
+    _worker_mtu = MTU(tape_class=TAPE_BACKENDS[tape], engine="compiled" if engine == "compiled" else "interpreter")
+    _worker_mtu.load_program(program)
+    _worker_max_steps = max_steps
+    _worker_max_seconds = max_seconds
+    _worker_detect_loops = detect_loops
+    _worker_engine = lockstep.LockstepEngine(program) if engine == "lockstep" else None
+    _worker_cache = ResultCache(result_cache) if result_cache else None
+
+def make_result(user_input: str, status: str, state: str, steps: int, tape: str, elapsed: float,
+                error: Optional[MTUError]) -> dict:
+    result = {
+        "input": user_input,
+        "status": status,
+        "state": state,
+        "steps": steps,
+        "tape": tape,
+        "time": elapsed,
+    }
+    if error:
+        result["error"] = str(error)
+    return result
+
+def run_input(user_input: str) -> dict:
+    mtu = _worker_mtu
+    mtu.initial_user_input = user_input
+    if _worker_cache is not None:
+        lookups = _worker_cache.misses
+        run_result = _worker_cache.run(mtu, max_steps=_worker_max_steps, max_seconds=_worker_max_seconds)
+        result = make_result(user_input, run_result.reason.value, mtu.current_state, run_result.steps,
+                             str(mtu.job_tape), run_result.elapsed, run_result.error)
+        if _worker_cache.misses == lookups:
+            result["cached"] = True
+        return result
+    mtu.reset()
+    mtu.error = None
+    detector = CycleDetector() if _worker_detect_loops else None
+    run_result = mtu.run(max_steps=_worker_max_steps, max_seconds=_worker_max_seconds,
+                         hooks=[detector] if detector else None)
+    result = make_result(user_input, run_result.reason.value, mtu.current_state, run_result.steps,
+                         str(mtu.job_tape), run_result.elapsed, run_result.error)
+    if detector is not None and detector.cycle_length is not None:
+        result["cycle_start"] = detector.cycle_start
+        result["cycle_length"] = detector.cycle_length
+    return result
+
+def run_inputs(user_inputs: List[str]) -> List[dict]:
+    """Un lote de entradas. Con el motor lockstep 'time' es el tiempo del lote repartido entre
+    sus entradas y `--max-seconds` limita el lote completo."""
+    if _worker_engine is None:
+        return [run_input(user_input) for user_input in user_inputs]
+    start = time.perf_counter()
+    results = _worker_engine.run(user_inputs, _worker_max_steps, _worker_max_seconds)
+    elapsed = (time.perf_counter() - start) / len(user_inputs)
+    return [make_result(r.input, r.reason.value, r.state, r.steps, r.tape, elapsed, r.error) for r in results]
+
+def batches(inputs: Iterator[str], size: int) -> Iterator[List[str]]:
+    while True:
+        batch = list(islice(inputs, size))
+        if not batch:
+            return
+        yield batch
+
+def ordered_map(executor: Executor, function: Callable, items: Iterable, window: int) -> Iterator:
+    """Como `executor.map`, pero con a lo sumo `window` tareas en vuelo: se lee la siguiente
+    entrada solo cuando sale el resultado más viejo, en orden."""
+    pending = deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(function, item))
+    while pending:
+        yield pending.popleft().result()
+
+def read_inputs(stream: TextIO) -> Iterator[str]:
+    for line in stream:
+        yield line.rstrip('\r\n')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ejecuta un programa MTU sobre muchas entradas sin interfaz gráfica.")
+    parser.add_argument("program", help="Archivo del programa MTU")
+    parser.add_argument("inputs", help="Archivo con una entrada por línea ('-' para la entrada estándar)")
+    parser.add_argument("-o", "--output", default="-", help="Archivo JSON-lines de resultados ('-' para la salida estándar)")
+    parser.add_argument("--max-steps", type=int, default=DEFAULT_MAX_STEPS, help="Límite de pasos por entrada (0: sin límite)")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Límite de tiempo por entrada, en segundos")
+    parser.add_argument("--tape", choices=sorted(TAPE_BACKENDS), default="dense", help="Representación de la cinta: densa o por tramos")
+    parser.add_argument("--detect-loops", action="store_true",
+                        help="Detiene como 'looping' las entradas que repiten una configuración (más lento por paso)")
+    parser.add_argument("--engine", choices=sorted(DEFAULT_CHUNKSIZE), default="interpreter",
+                        help="Intérprete, programa compilado a Python o motor vectorizado por lotes (requiere NumPy)")
+    parser.add_argument("--cache-dir", default=None, help="Directorio de caché de programas compilados")
+    parser.add_argument("--result-cache", default=None,
+                        help="Base SQLite de resultados ya calculados (se crea si no existe)")
+    parser.add_argument("--workers", type=int, default=None, help="Número de procesos (por defecto, uno por núcleo)")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Entradas enviadas a cada proceso por lote (por defecto, 64; 4096 con lockstep)")
+    args = parser.parse_args(argv)
+    if args.engine == "lockstep":
+        if lockstep.np is None:
+            parser.error("el motor lockstep necesita NumPy (pip install numpy)")
+        if args.detect_loops:
+            parser.error("--detect-loops no está disponible con el motor lockstep")
+    if args.result_cache and (args.engine == "lockstep" or args.detect_loops):
+        parser.error("--result-cache no está disponible con el motor lockstep ni con --detect-loops")
+    chunksize = args.chunksize or DEFAULT_CHUNKSIZE[args.engine]
+
+    if args.cache_dir:
+        program = ProgramCache(args.cache_dir).load(args.program)
+    else:
+        program = parse_program(args.program)
+        program.compile()
+    max_steps = args.max_steps or None
+    input_stream = sys.stdin if args.inputs == "-" else open(args.inputs, 'r')
+    output_stream = sys.stdout if args.output == "-" else open(args.output, 'w')
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(program, max_steps, args.max_seconds, args.tape, args.detect_loops, args.engine, args.result_cache)) as executor:
+            # Dos lotes por proceso: uno corriendo y otro esperando, sin leer toda la entrada
+            window = 2 * (args.workers or os.cpu_count() or 1)
+            results = chain.from_iterable(ordered_map(executor, run_inputs, batches(read_inputs(input_stream), chunksize),
+                                                      window))
+            hits = total = 0
+            for result in results:
+                total += 1
+                hits += result.get("cached", False)
+                output_stream.write(json.dumps(result, ensure_ascii=False) + "\n")
+            if args.result_cache:
+                print(f"Caché de resultados: {hits} aciertos, {total - hits} fallos", file=sys.stderr)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+"""Banco de pruebas de rendimiento del intérprete sobre los programas de ejemplo.
+
+Uso:
+    python benchmark.py [--sizes 10,100,1000] [--programs palindrome.txt,bsort.txt] [--engine compiled]
+                        [--save baseline.json] [--compare baseline.json] [--threshold 0.2]
+    python benchmark.py --verify --engine macro --sizes 10,50,200
+
+Para cada programa se generan entradas de tamaño creciente y se ejecutan sin interfaz
+gráfica con `MTU.run`. Se reportan pasos/s, ns/paso, longitud máxima de la cinta y el pico
+de memoria. Cada caso se mide en un proceso nuevo, porque `ru_maxrss` nunca baja: en un
+solo proceso, todos los casos posteriores al más grande heredarían su pico. Una corrida
+que supera `--max-seconds` se corta (estado `timeout`) y el programa deja de escalar.
+Con `--compare` se marcan como regresión los casos cuyo rendimiento cae más de
+`--threshold` respecto a la línea base, o cuyo número de pasos cambió.
+Con `--verify` no se mide: se comprueba que el motor elegido deja la máquina igual que
+ejecutarla paso a paso con `MTU.step` (conviene usar tamaños chicos).
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from mtu import ENGINES, MTU
+from program import Program, parse_program
+from result import HaltReason
+from tape import TAPE_BACKENDS
+
+PROGRAM_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZES = [10, 100, 1000, 10_000, 100_000]
+
+def binary_string(rng: random.Random, n: int) -> str:
+    return ''.join(rng.choice('01') for _ in range(n))
+
+def palindrome_input(rng: random.Random, n: int) -> str:
+    half = binary_string(rng, n // 2)
+    middle = binary_string(rng, n % 2)
+    return half + middle + half[::-1]
+
+def sum_input(rng: random.Random, n: int) -> str:
+    left = max(1, n // 2)
+    return binary_string(rng, left) + '+' + binary_string(rng, max(1, n - left - 1))
+
+def triplicate_input(rng: random.Random, n: int) -> str:
+    return ''.join(rng.choice('abc') for _ in range(n))
+
+def parentheses_input(rng: random.Random, n: int) -> str:
+    pairs = n // 2
+    return '(' * pairs + ')' * pairs
+
+GENERATORS: Dict[str, Callable[[random.Random, int], str]] = {
+    "palindrome.txt": palindrome_input,
+    "bsort.txt": binary_string,
+    "sum_two_bin_strings.txt": sum_input,
+    "triplicate_input.txt": triplicate_input,
+    "two_complement.txt": binary_string,
+    "is_even.txt": binary_string,
+    "parentheses_matcher.txt": parentheses_input,
+}
+
+def peak_rss_kb() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reporta bytes; Linux, kilobytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def measure(program: Program, user_input: str, tape: str = "dense", repeat: int = 3,
+            max_steps: Optional[int] = None, max_seconds: Optional[float] = None,
+            engine: str = "interpreter", engine_options: Optional[dict] = None) -> dict:
+    """Ejecuta `user_input` `repeat` veces y se queda con el mejor tiempo."""
+    mtu = MTU(tape_class=TAPE_BACKENDS[tape], engine=engine, engine_options=engine_options)
+    mtu.load_program(program)
+    best = None
+    for _ in range(repeat):
+        mtu.initial_user_input = user_input
+        mtu.reset()
+        result = mtu.run(max_steps=max_steps, max_seconds=max_seconds)
+        if best is None or result.elapsed < best.elapsed:
+            best = result
+        if result.reason == HaltReason.TIMEOUT:
+            break
+    steps = best.steps
+    elapsed = best.elapsed
+    return {
+        "status": best.reason.value,
+        "steps": steps,
+        "seconds": elapsed,
+        "steps_per_sec": steps / elapsed if elapsed > 0 else 0.0,
+        "ns_per_step": elapsed * 1e9 / steps if steps else 0.0,
+        "tape_length": len(mtu.job_tape),
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+def measure_isolated(executor: ProcessPoolExecutor, *args) -> dict:
+    """`measure` en un proceso recién creado: `peak_rss_kb` es el pico de ese caso solo
+    (incluye lo que ocupa el intérprete de Python al arrancar)."""
+    return executor.submit(measure, *args).result()
+
+def run_suite(programs: List[str], sizes: List[int], tape: str = "dense", repeat: int = 3,
+              max_seconds: float = 10.0, max_steps: Optional[int] = None, seed: int = 0,
+              log=sys.stderr, engine: str = "interpreter", engine_options: Optional[dict] = None) -> List[dict]:
+    results = []
+    # spawn y un caso por proceso: cada medición arranca con la memoria de un proceso nuevo
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                             max_tasks_per_child=1) as executor:
+        for name in programs:
+            program = parse_program(os.path.join(PROGRAM_DIR, name))
+            program.compile()
+            generator = GENERATORS[name]
+            for n in sizes:
+                user_input = generator(random.Random(seed + n), n)
+                case = {"program": name, "n": n, "tape": tape, "engine": engine}
+                case.update(measure_isolated(executor, program, user_input, tape, repeat, max_steps, max_seconds,
+                                             engine, engine_options))
+                results.append(case)
+                print(format_case(case), file=log)
+                if case["status"] == HaltReason.TIMEOUT.value:
+                    print(f"  {name}: se omiten tamaños mayores a n={n} (más de {max_seconds} s)", file=log)
+                    break
+    return results
+
+def step_by_step(mtu: MTU, max_steps: Optional[int]) -> Tuple[str, int]:
+    """Ejecuta con `MTU.step` hasta detenerse; devuelve el motivo y los pasos ejecutados."""
+    steps = 0
+    while max_steps is None or steps < max_steps:
+        if mtu.current_state in mtu.accepting_states:
+            return HaltReason.ACCEPTED.value, steps
+        status, _ = mtu.step()
+        if status not in ("stepped", HaltReason.ACCEPTED.value):
+            return status, steps
+        steps += 1
+        if status != "stepped":
+            return status, steps
+    return HaltReason.MAX_STEPS.value, steps
+
+def verify(programs: List[str], sizes: List[int], engine: str, tape: str = "dense",
+           max_steps: Optional[int] = None, seed: int = 0, engine_options: Optional[dict] = None,
+           log=sys.stderr) -> List[str]:
+    """Compara el motor con la ejecución paso a paso: motivo, pasos, estado, cabeza y cinta."""
+    differences = []
+    for name in programs:
+        program = parse_program(os.path.join(PROGRAM_DIR, name))
+        program.compile()
+        reference = MTU(tape_class=TAPE_BACKENDS[tape])
+        reference.load_program(program)
+        mtu = MTU(tape_class=TAPE_BACKENDS[tape], engine=engine, engine_options=engine_options)
+        mtu.load_program(program)
+        for n in sizes:
+            user_input = GENERATORS[name](random.Random(seed + n), n)
+            outcomes = []
+            for machine in (reference, mtu):
+                machine.initial_user_input = user_input
+                machine.reset()
+                if machine is reference:
+                    status, steps = step_by_step(machine, max_steps)
+                else:
+                    result = machine.run(max_steps=max_steps)
+                    status, steps = result.reason.value, result.steps
+                outcomes.append((status, steps, machine.current_state, machine.pointer, str(machine.job_tape)))
+            expected, actual = outcomes
+            label = f"{name} n={n}"
+            if expected != actual:
+                differences.append(f"{label}: paso a paso {expected[:4]}, motor {engine} {actual[:4]}"
+                                   + ("" if expected[4] == actual[4] else " (cintas distintas)"))
+            print(f"{label:<34} {'ok' if expected == actual else 'DISTINTO':<8} {expected[0]} en {expected[1]} pasos",
+                  file=log)
+        if mtu.backend is not None and hasattr(mtu.backend, "stats"):
+            print(f"  {mtu.backend.stats()}", file=log)
+    return differences
+
+def format_case(case: dict) -> str:
+    return (f"{case['program']:<26} n={case['n']:<8} {case['status']:<9} "
+            f"pasos={case['steps']:<12} {case['steps_per_sec'] / 1e6:8.2f} Mpasos/s "
+            f"{case['ns_per_step']:9.1f} ns/paso cinta={case['tape_length']:<9} rss={case['peak_rss_kb']} KB")
+
+def compare(results: List[dict], baseline: dict, threshold: float) -> List[str]:
+    """Regresiones respecto a `baseline`: caída de pasos/s mayor a `threshold` o pasos distintos."""
+    previous = {(case["program"], case["n"], case.get("tape", "dense"), case.get("engine", "interpreter")): case
+                for case in baseline["results"]}
+    regressions = []
+    for case in results:
+        old = previous.get((case["program"], case["n"], case["tape"], case["engine"]))
+        if old is None:
+            continue
+        label = f"{case['program']} n={case['n']}"
+        timed_out = HaltReason.TIMEOUT.value in (old["status"], case["status"])
+        if not timed_out and (old["steps"] != case["steps"] or old["status"] != case["status"]):
+            regressions.append(f"{label}: resultado distinto ({old['status']}/{old['steps']} pasos -> "
+                               f"{case['status']}/{case['steps']} pasos)")
+        elif old["steps_per_sec"] > 0 and case["steps_per_sec"] < old["steps_per_sec"] * (1 - threshold):
+            drop = 1 - case["steps_per_sec"] / old["steps_per_sec"]
+            regressions.append(f"{label}: {drop:.0%} más lento ({old['steps_per_sec'] / 1e6:.2f} -> "
+                               f"{case['steps_per_sec'] / 1e6:.2f} Mpasos/s)")
+    return regressions
+
+def parse_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide el rendimiento del intérprete MTU sobre los programas de ejemplo.")
+    parser.add_argument("--programs", type=parse_list, default=sorted(GENERATORS), help="Programas separados por comas")
+    parser.add_argument("--sizes", type=lambda value: [int(n) for n in parse_list(value)], default=DEFAULT_SIZES,
+                        help="Tamaños de entrada separados por comas")
+    parser.add_argument("--tape", choices=sorted(TAPE_BACKENDS), default="dense")
+    parser.add_argument("--engine", choices=ENGINES, default="interpreter",
+                        help="Intérprete, programa compilado a Python o macro-máquina")
+    parser.add_argument("--block-size", type=int, default=None, help="Celdas por bloque del motor macro")
+    parser.add_argument("--verify", action="store_true",
+                        help="Compara el motor con la ejecución paso a paso (MTU.step) en vez de medir")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por caso (se toma la mejor)")
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="Tiempo máximo por corrida; al agotarse, el programa deja de escalar")
+    parser.add_argument("--max-steps", type=int, default=None, help="Límite de pasos por corrida")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="Guarda los resultados como línea base JSON")
+    parser.add_argument("--compare", help="Línea base JSON contra la cual buscar regresiones")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Caída relativa de pasos/s tolerada")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.programs if name not in GENERATORS]
+    if unknown:
+        parser.error(f"programas sin generador de entradas: {', '.join(unknown)}")
+    engine_options = {"block_size": args.block_size} if args.engine == "macro" and args.block_size else None
+    if args.verify:
+        differences = verify(args.programs, args.sizes, args.engine, args.tape, args.max_steps, args.seed, engine_options)
+        for difference in differences:
+            print(f"DIFERENCIA {difference}", file=sys.stderr)
+        sys.exit(1 if differences else 0)
+    results = run_suite(args.programs, args.sizes, args.tape, args.repeat, args.max_seconds, args.max_steps, args.seed,
+                        engine=args.engine, engine_options=engine_options)
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "results": results}, file, indent=2)
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(f"REGRESIÓN {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+"""Backend que traduce un programa MTU a código Python especializado.
+
+En lugar de consultar la tabla de transiciones en cada paso, `CompiledProgram` genera una
+función con una rama por estado: las pruebas de símbolo, las escrituras y los movimientos
+de la cabeza quedan escritos como constantes, y las transiciones que conservan el estado
+(típicamente los `W(...)`) se convierten en un `while` nativo sobre el búfer de la cinta.
+El resultado se compila una vez con `compile`/`exec`. Se elige con `MTU(engine="compiled")`
+y da exactamente los mismos resultados que el intérprete.
+"""
+import time
+from typing import Dict, List, Optional
+from errors import ExecutionError
+from program import Program
+from result import HaltReason, RunResult
+from tape import Tape
+from transition_table import Action
+from config import CHECK_INTERVAL, MAX_SYMBOLS
+
+# Presupuesto de una llamada a la función generada cuando no hay reloj que consultar
+UNLIMITED = 1 << 62
+MIN_SCAN_CHUNK = 64
+
+def run_length(cells: bytearray, i: int, bound: int, move: int, mask: bytes) -> int:
+    """Celdas consecutivas desde el índice `i` (incluido), en la dirección `move`, cuyo código
+    cumple mask[code] != 0, sin pasar de `bound` (excluido hacia la derecha, incluido hacia
+    la izquierda). Como Tape.scan, examina trozos crecientes con `translate` + `find`."""
+    count = 0
+    chunk = MIN_SCAN_CHUNK
+    if move > 0:
+        while i + count < bound:
+            end = min(bound, i + count + chunk)
+            stop = cells[i + count:end].translate(mask).find(0)
+            if stop != -1:
+                return count + stop
+            count = end - i
+            chunk *= 2
+        return count
+    while i - count >= bound:
+        start = max(bound, i - count - chunk + 1)
+        stop = cells[start:i - count + 1].translate(mask).rfind(0)
+        if stop != -1:
+            return i - start - stop
+        count = i - start + 1
+        chunk *= 2
+    return count
+
+class SourceWriter:
+    def __init__(self):
+        self.lines: List[str] = []
+        self.depth = 0
+
+    def line(self, text: str):
+        self.lines.append("    " * self.depth + text)
+
+    def indent(self):
+        self.depth += 1
+
+    def dedent(self):
+        self.depth -= 1
+
+    def source(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+class CompiledProgram:
+    """Programa traducido a una función Python.
+
+    La función generada trabaja sobre el `bytearray` de una cinta densa con índices físicos
+    (`i`, `lo`, `hi` y `origin` como en Tape) y hace crecer el búfer igual que Tape.ensure.
+    Ejecuta a lo sumo `left` pasos y devuelve el motivo de detención, los pasos que quedaron
+    sin usar, la cabeza, los bordes, el estado y el número de la última acción ejecutada
+    (índice en `actions`, None si ninguna instrucción cubre el par).
+    """
+    def __init__(self, program: Program):
+        program.compile()
+        self.table = program.table
+        self.accepting = set(program.accepting_states)
+        self.states: List[str] = ['00']
+        self.state_ids: Dict[str, int] = {'00': 0}
+        for state, row in self.table.rows.items():
+            self.state_id(state)
+            for action in row:
+                if action is not None and action.next_state is not None:
+                    self.state_id(action.next_state)
+        self.actions: List[Action] = []
+        self.source = self.generate()
+        namespace = {
+            "run_length": run_length,
+            "ACCEPTED": HaltReason.ACCEPTED,
+            "NO_MATCH": HaltReason.NO_MATCH,
+            "ERROR": HaltReason.ERROR,
+            "MAX_STEPS": HaltReason.MAX_STEPS,
+        }
+        for number, action in enumerate(self.actions):
+            if action.scan is not None:
+                namespace[f"MASK_{number}"] = action.scan
+                if action.write is not None:
+                    namespace[f"FILL_{number}"] = bytes((action.write,))
+        exec(compile(self.source, "<programa MTU compilado>", "exec"), namespace)
+        self.machine = namespace["machine"]
+
+    def state_id(self, state: str) -> int:
+        index = self.state_ids.get(state)
+        if index is None:
+            index = self.state_ids[state] = len(self.states)
+            self.states.append(state)
+        return index
+
+    def generate(self) -> str:
+        out = SourceWriter()
+        out.line("def machine(cells, i, lo, hi, origin, state, left):")
+        out.indent()
+        out.line("if not left:")
+        out.line("    return MAX_STEPS, left, i, lo, hi, origin, state, None")
+        out.line("while True:")
+        out.indent()
+        self.dispatch(out, 0, len(self.states))
+        return out.source()
+
+    def dispatch(self, out: SourceWriter, first: int, end: int):
+        """Árbol de decisión balanceado sobre el número de estado: log2(S) comparaciones."""
+        if end - first == 1:
+            self.state_block(out, first)
+            return
+        middle = (first + end) // 2
+        out.line(f"if state < {middle}:")
+        out.indent()
+        self.dispatch(out, first, middle)
+        out.dedent()
+        out.line("else:")
+        out.indent()
+        self.dispatch(out, middle, end)
+        out.dedent()
+
+    def state_block(self, out: SourceWriter, index: int):
+        state = self.states[index]
+        out.line(f"# Estado {state}")
+        if state in self.accepting:
+            out.line("return ACCEPTED, left, i, lo, hi, origin, state, None")
+            return
+        row = self.table.rows.get(state)
+        if row is None:
+            out.line("return NO_MATCH, left, i, lo, hi, origin, state, None")
+            return
+        # Los símbolos con el mismo efecto comparten rama (el orden no importa: son disjuntos)
+        groups: Dict[int, List[int]] = {}
+        order: List[Action] = []
+        for code in range(MAX_SYMBOLS):
+            action = row[code]
+            if action is None:
+                continue
+            key = id(action)
+            if key not in groups:
+                groups[key] = []
+                order.append(action)
+            groups[key].append(code)
+        out.line("while True:")
+        out.indent()
+        out.line("c = cells[i]")
+        keyword = "if"
+        for action in order:
+            codes = groups[id(action)]
+            test = f"c == {codes[0]}" if len(codes) == 1 else "c in {" + ", ".join(map(str, codes)) + "}"
+            out.line(f"{keyword} {test}:")
+            out.indent()
+            self.transition(out, index, action, codes)
+            out.dedent()
+            keyword = "elif"
+        out.line("else:")
+        out.line("    return NO_MATCH, left, i, lo, hi, origin, state, None")
+        out.dedent()
+
+    def transition(self, out: SourceWriter, index: int, action: Action, codes: List[int]):
+        number = len(self.actions)
+        self.actions.append(action)
+        if action.error:
+            out.line(f"return ERROR, left, i, lo, hi, origin, state, {number}")
+            return
+        if action.scan is not None:
+            # Recorrido en bloque, como el bucle rápido del intérprete: solo si la celda
+            # siguiente (ya creada) también entra; si no, el paso suelto es más barato
+            if action.move > 0:
+                out.line(f"if i + 1 < hi and MASK_{number}[cells[i + 1]]:")
+                out.line(f"    n = run_length(cells, i, min(hi, i + left), 1, MASK_{number})")
+                if action.write is not None:
+                    out.line(f"    cells[i:i + n] = FILL_{number} * n")
+                out.line("    i += n")
+            else:
+                out.line(f"if i > lo and MASK_{number}[cells[i - 1]]:")
+                out.line(f"    n = run_length(cells, i, max(lo, i - left + 1), -1, MASK_{number})")
+                if action.write is not None:
+                    out.line(f"    cells[i - n + 1:i + 1] = FILL_{number} * n")
+                out.line("    i -= n")
+            out.line("    left -= n")
+            out.line("else:")
+            out.indent()
+            self.single_step(out, action, codes)
+            out.line("left -= 1")
+            out.dedent()
+            self.grow(out, action.move)
+        else:
+            self.single_step(out, action, codes)
+            self.grow(out, action.move)
+            out.line("left -= 1")
+        target = index if action.next_state is None else self.state_ids[action.next_state]
+        if target != index:
+            out.line(f"state = {target}")
+        if self.states[target] in self.accepting:
+            out.line(f"return ACCEPTED, left, i, lo, hi, origin, state, {number}")
+            return
+        out.line("if not left:")
+        out.line(f"    return MAX_STEPS, left, i, lo, hi, origin, state, {number}")
+        if target != index:
+            out.line("break")
+
+    @staticmethod
+    def single_step(out: SourceWriter, action: Action, codes: List[int]):
+        if action.write is not None and codes != [action.write]:
+            out.line(f"cells[i] = {action.write}")
+        if action.move > 0:
+            out.line("i += 1")
+        elif action.move < 0:
+            out.line("i -= 1")
+
+    @staticmethod
+    def grow(out: SourceWriter, move: int):
+        """Crea la celda bajo la cabeza si quedó fuera de [lo, hi), igual que Tape.ensure."""
+        if move > 0:
+            out.line("if i >= hi:")
+            out.line("    hi = i + 1")
+            out.line("    if hi > len(cells):")
+            out.line(f"        cells.extend(bytes(max(len(cells), {Tape.MIN_GROWTH})))")
+        elif move < 0:
+            out.line("if i < lo:")
+            out.line("    if i < 0:")
+            out.line(f"        pad = max(len(cells), {Tape.MIN_GROWTH})")
+            out.line("        cells[0:0] = bytes(pad)")
+            out.line("        i += pad")
+            out.line("        hi += pad")
+            out.line("        origin += pad")
+            out.line("    lo = i")
+
+    def run(self, mtu, max_steps: Optional[int], deadline: Optional[float], start: float) -> RunResult:
+        """Igual que el bucle rápido de `MTU.run` sobre una cinta densa (lo llama MTU.run)."""
+        tape: Tape = mtu.job_tape
+        cells, origin = tape.cells, tape.origin
+        i, lo, hi = origin + mtu.pointer, origin + tape.lo, origin + tape.hi
+        state = self.state_ids.get(mtu.current_state)
+        steps = 0
+        number = None
+        if state is None:
+            reason = HaltReason.NO_MATCH  # Estado sin instrucciones ni transiciones hacia él
+        while state is not None:
+            limit = CHECK_INTERVAL if deadline is not None else UNLIMITED
+            if max_steps is not None:
+                limit = min(limit, max_steps - steps)
+            reason, left, i, lo, hi, origin, state, last = self.machine(cells, i, lo, hi, origin, state, limit)
+            steps += limit - left
+            if last is not None or reason != HaltReason.MAX_STEPS:
+                number = last
+            if reason != HaltReason.MAX_STEPS or (max_steps is not None and steps >= max_steps):
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                reason = HaltReason.TIMEOUT
+                break
+        tape.origin, tape.lo, tape.hi = origin, lo - origin, hi - origin
+        if state is not None:
+            mtu.current_state = self.states[state]
+            mtu.pointer = i - origin
+        action = self.actions[number] if number is not None else None
+        if reason == HaltReason.ERROR:
+            mtu.error = ExecutionError(f"Error ejecutando instrucción {action.instruction}: {action.error}")
+        instruction = action.instruction if action is not None else None
+        return RunResult(reason, steps, time.perf_counter() - start, instruction, mtu.error)
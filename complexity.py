@@ -0,0 +1,264 @@
+"""Complejidad empírica de un programa MTU: pasos y cinta en función del largo de la entrada.
+
+Uso:
+    python complexity.py programa.txt [--generator random|program|zeros|ones|alternating|ascending|descending]
+                         [--pattern 10] [--generator-func modulo:funcion] [--min-n 8] [--max-n 4096]
+                         [--factor 2] [--samples 3] [--target 1000000] [--margin 0.5] [--json salida.json]
+
+Ejecuta el programa sin interfaz gráfica sobre entradas de tamaños en progresión geométrica
+y ajusta pasos(n) y cinta(n) a curvas candidatas (1, log n, n, n log n, n², n² log n, n³,
+2ⁿ) de la forma a·f(n) + b por mínimos cuadrados con error relativo. Se informa la clase
+elegida con sus constantes y, con `--target`, los pasos, la cinta y el tiempo estimados para
+ese n junto con un presupuesto de pasos sugerido (para `batch.py --max-steps`). Si una
+corrida supera `--max-seconds`, el barrido deja de escalar.
+
+Las entradas salen de un generador con nombre (por defecto, el de benchmark.py para los
+programas de ejemplo, y si no, binario al azar), de un patrón que se repite hasta n
+símbolos, o de una función `f(rng, n) -> str` de otro módulo.
+"""
+import argparse
+import importlib
+import json
+import math
+import os
+import random
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+from benchmark import GENERATORS as PROGRAM_GENERATORS, binary_string
+from mtu import ENGINES, MTU
+from program import Program, parse_program
+from result import HaltReason
+
+Generator = Callable[[random.Random, int], str]
+
+GENERATORS: Dict[str, Generator] = {
+    "random": binary_string,
+    "zeros": lambda rng, n: '0' * n,
+    "ones": lambda rng, n: '1' * n,
+    "alternating": lambda rng, n: ('01' * (n // 2 + 1))[:n],
+    "ascending": lambda rng, n: '0' * (n - n // 2) + '1' * (n // 2),
+    "descending": lambda rng, n: '1' * (n // 2) + '0' * (n - n // 2),  # Peor caso de un ordenamiento
+}
+
+# Clases en orden de complejidad creciente; el ajuste prefiere la más simple ante un empate
+CANDIDATES: List[Tuple[str, Callable[[int], float]]] = [
+    ("O(1)", lambda n: 1.0),
+    ("O(log n)", lambda n: math.log2(n)),
+    ("O(n)", lambda n: float(n)),
+    ("O(n log n)", lambda n: n * math.log2(n)),
+    ("O(n^2)", lambda n: float(n) ** 2),
+    ("O(n^2 log n)", lambda n: float(n) ** 2 * math.log2(n)),
+    ("O(n^3)", lambda n: float(n) ** 3),
+    ("O(2^n)", lambda n: 2.0 ** n),
+]
+TIE_TOLERANCE = 1.1   # Una clase más simple gana si su error no supera este factor del mejor...
+TIE_SLACK = 0.002     # ...más este margen absoluto (los pasos son exactos, el error es del modelo)
+
+class Fit:
+    """Ajuste y ≈ a·f(n) + b de una clase candidata; `error` es el error relativo cuadrático medio."""
+    __slots__ = ("name", "function", "a", "b", "error")
+
+    def __init__(self, name: str, function: Callable[[int], float], a: float, b: float, error: float):
+        self.name = name
+        self.function = function
+        self.a = a
+        self.b = b
+        self.error = error
+
+    def predict(self, n: int) -> float:
+        """Valor estimado en n; `math.inf` si el modelo desborda (2^n para n grande)."""
+        try:
+            return self.a * self.function(n) + self.b
+        except OverflowError:
+            return math.inf
+
+    def __str__(self) -> str:
+        term = "" if self.name == "O(1)" else f"{self.a:.4g}·{self.name[2:-1]} "
+        sign = "+" if self.b >= 0 else "-"
+        return f"{self.name:<13} ≈ {term}{sign} {abs(self.b):.4g}   (error relativo {self.error:.2%})"
+
+def fit(points: List[Tuple[int, float]], name: str, function: Callable[[int], float]) -> Optional[Fit]:
+    """Mínimos cuadrados ponderados por 1/y²; None si la clase no puede describir los datos
+    (coeficiente negativo o f(n) desborda)."""
+    try:
+        xs = [function(n) for n, _ in points]
+    except OverflowError:
+        return None
+    ys = [y for _, y in points]
+    ws = [1.0 / max(y, 1.0) ** 2 for y in ys]
+    s = sum(ws)
+    sx = sum(w * x for w, x in zip(ws, xs))
+    sy = sum(w * y for w, y in zip(ws, ys))
+    sxx = sum(w * x * x for w, x in zip(ws, xs))
+    sxy = sum(w * x * y for w, x, y in zip(ws, xs, ys))
+    det = sxx * s - sx * sx
+    if abs(det) <= 1e-12 * sxx * s:
+        a, b = 0.0, sy / s   # f constante en los puntos: solo la ordenada
+    else:
+        a = (sxy * s - sx * sy) / det
+        b = (sxx * sy - sx * sxy) / det
+    if a < 0:
+        return None
+    residuals = [(a * x + b - y) / max(y, 1.0) for x, y in zip(xs, ys)]
+    error = math.sqrt(sum(r * r for r in residuals) / len(residuals))
+    return Fit(name, function, a, b, error)
+
+def finite(value: Optional[float]) -> Optional[float]:
+    """`value`, o None si no es finito: inf y NaN no son JSON válido."""
+    return value if value is not None and math.isfinite(value) else None
+
+def classify(points: List[Tuple[int, float]]) -> List[Fit]:
+    """Ajustes de todas las clases, el elegido primero y los demás por error."""
+    fits = [result for name, function in CANDIDATES if (result := fit(points, name, function)) is not None]
+    if not fits:
+        return []
+    best = min(fits, key=lambda f: f.error)
+    # La primera clase (la más simple) que ajusta casi tan bien como la mejor
+    chosen = next(f for f in fits if f.error <= best.error * TIE_TOLERANCE + TIE_SLACK)
+    return [chosen] + sorted((f for f in fits if f is not chosen), key=lambda f: f.error)
+
+def growth_exponent(points: List[Tuple[int, float]]) -> Optional[float]:
+    """Pendiente log-log entre los dos tamaños más grandes: el exponente local de la curva."""
+    (n1, y1), (n2, y2) = points[-2], points[-1]
+    if n1 == n2 or y1 <= 0 or y2 <= 0:
+        return None
+    return math.log(y2 / y1) / math.log(n2 / n1)
+
+def geometric_sizes(min_n: int, max_n: int, factor: float) -> List[int]:
+    sizes = []
+    n = float(max(1, min_n))
+    while n <= max_n:
+        if not sizes or round(n) != sizes[-1]:
+            sizes.append(round(n))
+        n *= factor
+    return sizes
+
+def sweep(program: Program, generator: Generator, sizes: List[int], samples: int = 3, seed: int = 0,
+          max_steps: Optional[int] = None, max_seconds: float = 5.0, engine: str = "interpreter",
+          log=sys.stderr) -> List[dict]:
+    """Ejecuta `samples` entradas por tamaño y guarda el peor caso observado de cada uno."""
+    mtu = MTU(engine=engine)
+    mtu.load_program(program)
+    rows = []
+    for n in sizes:
+        rng = random.Random(seed + n)
+        row = {"n": n, "steps": 0, "tape": 0, "seconds": 0.0, "status": None}
+        total_steps = total_seconds = 0
+        for _ in range(samples):
+            mtu.initial_user_input = generator(rng, n)
+            mtu.reset()
+            mtu.error = None
+            result = mtu.run(max_steps=max_steps, max_seconds=max_seconds)
+            total_steps += result.steps
+            total_seconds += result.elapsed
+            if result.steps >= row["steps"]:
+                row["steps"], row["status"] = result.steps, result.reason.value
+            row["tape"] = max(row["tape"], len(mtu.job_tape))
+            row["seconds"] = max(row["seconds"], result.elapsed)
+            if result.reason in (HaltReason.TIMEOUT, HaltReason.MAX_STEPS):
+                row["status"] = result.reason.value
+                break
+        row["ns_per_step"] = total_seconds * 1e9 / total_steps if total_steps else 0.0
+        print(f"  n={n:>8}  {row['status']:>9}  pasos={row['steps']:>12}  cinta={row['tape']:>9}  "
+              f"{row['seconds']:.4f} s", file=log)
+        if row["status"] in (HaltReason.TIMEOUT.value, HaltReason.MAX_STEPS.value):
+            # Un punto cortado no sirve para ajustar: se informa y se deja de escalar
+            print(f"  se omiten tamaños mayores a n={n} ({row['status']})", file=log)
+            break
+        rows.append(row)
+    return rows
+
+def load_generator(spec: str) -> Generator:
+    """`modulo:funcion` con la firma de los generadores, f(rng, n) -> str."""
+    module_name, _, function_name = spec.partition(":")
+    if not function_name:
+        raise ValueError(f"Generador '{spec}': se esperaba 'modulo:funcion'")
+    return getattr(importlib.import_module(module_name), function_name)
+
+def pick_generator(args, program_path: str) -> Tuple[str, Generator]:
+    if args.pattern:
+        pattern = args.pattern
+        return f"patrón '{pattern}'", lambda rng, n: (pattern * (n // len(pattern) + 1))[:n]
+    if args.generator_func:
+        return args.generator_func, load_generator(args.generator_func)
+    if args.generator == "program":
+        name = os.path.basename(program_path)
+        if name in PROGRAM_GENERATORS:
+            return f"el de benchmark.py para {name}", PROGRAM_GENERATORS[name]
+        return "random (no hay generador propio)", GENERATORS["random"]
+    return args.generator, GENERATORS[args.generator]
+
+def report(label: str, points: List[Tuple[int, float]], log=sys.stdout) -> Optional[Fit]:
+    fits = classify(points)
+    if not fits:
+        print(f"{label}: ninguna clase candidata ajusta los datos", file=log)
+        return None
+    exponent = growth_exponent(points) if len(points) >= 2 else None
+    slope = f" (pendiente log-log final {exponent:.2f})" if exponent is not None else ""
+    print(f"{label}: {fits[0]}{slope}", file=log)
+    for other in fits[1:3]:
+        print(f"    alternativa {other}", file=log)
+    return fits[0]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estima la complejidad de un programa MTU en pasos y en cinta.")
+    parser.add_argument("program", help="Archivo del programa MTU")
+    parser.add_argument("--generator", choices=sorted(GENERATORS) + ["program"], default="program",
+                        help="Entradas: el generador de benchmark.py para el programa, binario al azar o un patrón fijo")
+    parser.add_argument("--pattern", help="Entrada formada repitiendo este patrón hasta n símbolos")
+    parser.add_argument("--generator-func", help="Generador propio 'modulo:funcion', con firma f(rng, n) -> str")
+    parser.add_argument("--min-n", type=int, default=8)
+    parser.add_argument("--max-n", type=int, default=4096)
+    parser.add_argument("--factor", type=float, default=2.0, help="Razón entre tamaños consecutivos")
+    parser.add_argument("--samples", type=int, default=3, help="Entradas por tamaño (se toma el peor caso)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-steps", type=int, default=None, help="Límite de pasos por corrida")
+    parser.add_argument("--max-seconds", type=float, default=5.0, help="Tiempo máximo por corrida; al agotarse, deja de escalar")
+    parser.add_argument("--engine", choices=ENGINES, default="interpreter", help="Motor de ejecución")
+    parser.add_argument("--target", type=int, default=None, help="n para el cual extrapolar pasos, cinta y tiempo")
+    parser.add_argument("--margin", type=float, default=0.5, help="Margen del presupuesto de pasos sugerido (0.5: +50%%)")
+    parser.add_argument("--json", help="Guarda las mediciones y los ajustes en este archivo JSON")
+    args = parser.parse_args(argv)
+    if args.factor <= 1:
+        parser.error("--factor debe ser mayor que 1")
+
+    program = parse_program(args.program)
+    program.compile()
+    try:
+        label, generator = pick_generator(args, args.program)
+    except (ValueError, ImportError, AttributeError) as e:
+        parser.error(f"--generator-func: {e}")
+    sizes = geometric_sizes(args.min_n, args.max_n, args.factor)
+    print(f"Barrido de {args.program} con entradas {label}: n = {sizes[0]} .. {sizes[-1]}", file=sys.stderr)
+    rows = sweep(program, generator, sizes, args.samples, args.seed, args.max_steps, args.max_seconds, args.engine)
+    if len(rows) < 3:
+        print("Hacen falta al menos tres tamaños completos para ajustar: amplíe el rango o el tiempo.", file=sys.stderr)
+        sys.exit(1)
+
+    steps_fit = report("pasos(n)", [(row["n"], row["steps"]) for row in rows])
+    tape_fit = report("cinta(n)", [(row["n"], row["tape"]) for row in rows])
+    summary = {"program": args.program, "generator": label, "measurements": rows,
+               "steps": None if steps_fit is None else {"class": steps_fit.name, "a": steps_fit.a, "b": steps_fit.b, "error": steps_fit.error},
+               "tape": None if tape_fit is None else {"class": tape_fit.name, "a": tape_fit.a, "b": tape_fit.b, "error": tape_fit.error}}
+    if args.target is not None and steps_fit is not None:
+        # Tiempo por paso del tamaño más grande medido: el más parecido a corridas grandes
+        ns_per_step = rows[-1]["ns_per_step"]
+        steps = steps_fit.predict(args.target)
+        seconds = steps * ns_per_step / 1e9
+        tape = tape_fit.predict(args.target) if tape_fit is not None else None
+        print(f"Para n={args.target}: ~{steps:.4g} pasos, ~{seconds:.4g} s ({ns_per_step:.0f} ns/paso)"
+              + (f", cinta de ~{tape:.4g} celdas" if tape is not None else ""))
+        if not math.isfinite(steps):
+            budget = None
+            print("Presupuesto sugerido: ninguno, la predicción no tiene cota (el modelo desborda)")
+        else:
+            budget = math.ceil(steps * (1 + args.margin))
+            print(f"Presupuesto sugerido: --max-steps {budget}")
+        summary["target"] = {"n": args.target, "steps": finite(steps), "seconds": finite(seconds),
+                             "tape": finite(tape), "max_steps": budget}
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(summary, file, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
@@ -3,4 +3,8 @@ P_STATE       = 0
 Q_STATE       = 1  
 INPUT_SYMBOL  = 2  
 OUTPUT_SYMBOL = 3  
-OPERATION     = 4  
\ No newline at end of file
+OPERATION     = 4  
+BLANK         = 'B'
+MAX_SYMBOLS   = 256
+CHECK_INTERVAL = 4096
+INTERPRETER_VERSION = "2"  # Cambiarlo invalida las cachés de programas compilados
@@ -0,0 +1,138 @@
+from typing import Dict, Optional, Tuple
+from hooks import ExecutionHook
+from mtu import MTU
+from result import HaltReason
+from transition_table import Action
+
+MASK = (1 << 64) - 1
+
+def mix(value: int) -> int:
+    """Mezclador de 64 bits (splitmix64): claves pseudoaleatorias estilo Zobrist sin tablas."""
+    value = (value + 0x9E3779B97F4A7C15) & MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK
+    return value ^ (value >> 31)
+
+def cell_key(pos: int, code: int) -> int:
+    return mix(pos * 512 + code)
+
+def head_key(pos: int) -> int:
+    return mix(pos * 512 + 256)
+
+# Configuración completa normalizada: estado, cabeza, primera celda no blanca y contenido
+# desde ahí hasta la última no blanca (los blancos de los bordes no cuentan)
+Configuration = Tuple[str, int, int, bytes]
+
+def configuration(mtu: MTU) -> Configuration:
+    tape = mtu.job_tape
+    codes = tape.codes(tape.lo, tape.hi)
+    stripped = codes.lstrip(b'\0')
+    first = tape.lo + len(codes) - len(stripped)
+    return mtu.current_state, mtu.pointer, first, stripped.rstrip(b'\0')
+
+class CycleDetector(ExecutionHook):
+    """Detecta configuraciones repetidas: si una se repite, la máquina cicla para siempre.
+
+    Mantiene un hash de la configuración (estado, cabeza y cinta) que se actualiza en O(1)
+    por escritura: el de la cinta es el XOR de cell_key(pos, código) de las celdas no
+    blancas, así que crecer la cinta no lo cambia. Sobre la secuencia de hashes aplica el
+    algoritmo de Brent; una coincidencia se confirma comparando configuraciones completas,
+    de modo que una colisión nunca produce un falso positivo. Al detectar un ciclo detiene
+    la ejecución con HaltReason.LOOPING y deja en `cycle_length` y `cycle_start` la
+    longitud del ciclo y el primer paso que pertenece a él.
+
+    Hay que llamar a `reset` si la máquina cambia sin pasar por los hooks (reset, retroceso,
+    ejecución sin el detector).
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.initial: Optional[Tuple[str, int, object]] = None
+        self.state_keys: Dict[str, int] = {}
+        self.tape_hash = 0
+        self.steps = 0
+        self.power = 1
+        self.lam = 1
+        self.tortoise_hash: Optional[int] = None
+        self.tortoise_step = 0
+        self.tortoise: Optional[Configuration] = None
+        self.cycle_length: Optional[int] = None
+        self.cycle_start: Optional[int] = None
+
+    def on_start(self, mtu: MTU):
+        if self.initial is not None:
+            return
+        tape = mtu.job_tape
+        self.initial = (mtu.current_state, mtu.pointer, tape.snapshot())
+        tape_hash = 0
+        for offset, code in enumerate(tape.codes(tape.lo, tape.hi)):
+            if code:
+                tape_hash ^= cell_key(tape.lo + offset, code)
+        self.tape_hash = tape_hash
+
+    def state_key(self, state: str) -> int:
+        key = self.state_keys.get(state)
+        if key is None:
+            key = self.state_keys[state] = mix(hash(state) & MASK ^ 0x5bd1e995)
+        return key
+
+    def on_step(self, mtu: MTU, action: Action, state: str, pos: int, code: int) -> Optional[HaltReason]:
+        config_hash = self.tape_hash ^ self.state_key(state) ^ head_key(pos)
+        step = self.steps
+        self.steps += 1
+        write = action.write
+        if write is not None and write != code:
+            if code:
+                self.tape_hash ^= cell_key(pos, code)
+            if write:
+                self.tape_hash ^= cell_key(pos, write)
+        if self.cycle_length is not None:
+            return HaltReason.LOOPING
+        # Brent: la "tortuga" salta a la posición de la "liebre" en cada potencia de dos
+        if config_hash == self.tortoise_hash and configuration(mtu) == self.tortoise:
+            if self.confirm(mtu, self.tortoise_step, self.lam):
+                return HaltReason.LOOPING
+            self.reset()
+            return None
+        if self.tortoise_hash is None or self.power == self.lam:
+            self.tortoise_hash = config_hash
+            self.tortoise_step = step
+            self.tortoise = configuration(mtu)
+            self.power *= 2
+            self.lam = 0
+        self.lam += 1
+        return None
+
+    def replay(self, mtu: MTU, steps: int) -> Configuration:
+        """Configuración tras `steps` pasos desde la inicial, con una copia y el bucle rápido."""
+        state, pos, snapshot = self.initial
+        clone = MTU(tape_class=mtu.tape_class)
+        clone.load_program(mtu.program)
+        clone.alphabet = mtu.alphabet
+        clone.job_tape = mtu.tape_class(mtu.alphabet)
+        clone.job_tape.restore(snapshot)
+        clone.current_state, clone.pointer = state, pos
+        clone.run(max_steps=steps)
+        return configuration(clone)
+
+    def confirm(self, mtu: MTU, repeated: int, length: int) -> bool:
+        """Confirma el ciclo volviendo a ejecutar desde la configuración inicial y busca su
+        inicio: como la máquina es determinista, c(i) == c(i + length) vale para todo i
+        desde el inicio del ciclo, así que basta una búsqueda binaria."""
+        if self.replay(mtu, repeated) != self.replay(mtu, repeated + length):
+            return False  # La máquina cambió por fuera de los hooks desde on_start
+        lo, hi = 0, repeated
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.replay(mtu, mid) == self.replay(mtu, mid + length):
+                hi = mid
+            else:
+                lo = mid + 1
+        self.cycle_length = length
+        self.cycle_start = lo
+        return True
+
+    def describe(self, offset: int = 0) -> str:
+        """`offset`: paso en que se llamó a `reset`, para numerar los pasos desde otro origen."""
+        return f"ciclo de {self.cycle_length} pasos que empieza en el paso {offset + self.cycle_start}"
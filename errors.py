@@ -0,0 +1,21 @@
+class MTUError(Exception):
+    """Error base de la MTU."""
+
+class ProgramError(MTUError):
+    """Error de carga: no hay programa o el programa no es válido."""
+
+class ExecutionError(MTUError):
+    """Error al ejecutar una instrucción; se vuelve a intentar en el siguiente paso."""
+
+class ParseError(ProgramError):
+    """Error de sintaxis en el archivo del programa, con su posición (1-based)."""
+    def __init__(self, message: str, line: int, column: int, source: str = None):
+        self.message = message
+        self.line = line
+        self.column = column
+        self.source = source
+        location = f"{source}:" if source else ""
+        super().__init__(f"{location}{line}:{column}: {message}")
+
+class TraceError(MTUError):
+    """Traza de ejecución ilegible: falta un archivo, está truncada o es de otra versión."""
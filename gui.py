@@ -2,7 +2,12 @@ import pygame
 import tkinter as tk
 from tkinter import filedialog, simpledialog
 from mtu import MTU
-from config import SAME
+from errors import ProgramError, ExecutionError
+from result import HaltReason, RunResult
+from worker import MachineWorker, Snapshot
+
+# Velocidades de la ejecución automática, en pasos por segundo; None: sin límite
+SPEEDS = [1, 2, 5, 10, 20, 50, 100, 1_000, 10_000, 100_000, None]
 
 class MTUVisualizer:
     def __init__(self, mtu: MTU): 
@@ -23,6 +28,9 @@ class MTUVisualizer:
         self.BUTTON_TEXT_COLOR = (255, 255, 255)
         self.ERROR_TEXT_COLOR = (255, 100, 100)
         self.INFO_TEXT_COLOR = (200, 200, 200)
+        self.MINIMAP_RECENT_COLOR = (255, 200, 0)
+        self.MINIMAP_PALETTE = [(0, 150, 255), (255, 140, 0), (0, 200, 100), (200, 80, 200), (230, 230, 90), (90, 220, 220)]
+        self.font_tiny = pygame.font.Font(None, 20)
         self.font_small = pygame.font.Font(None, 28)
         self.font_medium = pygame.font.Font(None, 36)
         self.font_large = pygame.font.Font(None, 48)
@@ -31,14 +39,32 @@ class MTUVisualizer:
         self.tape_y_pos = 100 
         self.buttons = {}
         self.create_buttons()
+        # Dibujo incremental: superficie de la cinta persistente, caché de glifos y
+        # firmas por sección para actualizar solo los rectángulos que cambiaron
+        self.glyphs = {}
+        self.tape_slots = (self.WIDTH // self.tape_cell_width) // 2 * 2 + 2
+        self.tape_surface = pygame.Surface((self.WIDTH, self.tape_cell_height + 20))
+        self.tape_cells = [None] * self.tape_slots
+        self.section_signatures = {}
+        self.full_redraw = True
         self.running = True
         self.clock = pygame.time.Clock()
         self.status_message = "Cargue un programa y una entrada."
         self.last_executed_instruction_str = ""
         self.auto_running = False
-        self.auto_run_delay = 100 
-        self.last_auto_step_time = 0
+        self.speed_index = SPEEDS.index(10)
         self.active_button_name = None 
+        self.scrubbing = False
+        self.loading_name = ""
+        # La máquina corre en su propio hilo; aquí solo se envían órdenes y se dibujan fotos
+        self.worker = MachineWorker(mtu, (self.WIDTH // self.tape_cell_width) // 2, SPEEDS[self.speed_index],
+                                    self.minimap_rect.width)
+        self.worker.start()
+        self.seen_serial = 0
+
+    @property
+    def snapshot(self) -> Snapshot:
+        return self.worker.snapshot
 
     def create_buttons(self):
         btn_width, btn_height = 160, 40
@@ -49,6 +75,8 @@ class MTUVisualizer:
         start_x += btn_width + margin
         self.buttons["input"] = {"rect": pygame.Rect(start_x, start_y, btn_width, btn_height), "text": "Input", "action": self.set_input_dialog}
         start_x += btn_width + margin
+        self.buttons["back"] = {"rect": pygame.Rect(start_x, start_y, btn_width // 2, btn_height), "text": "Back", "action": self.step_back}
+        start_x += btn_width // 2 + margin
         self.buttons["step"] = {"rect": pygame.Rect(start_x, start_y, btn_width // 2, btn_height), "text": "Step", "action": lambda: self.step_mtu(manual_step=True)}
         start_x += btn_width // 2 + margin
         self.buttons["run"] = {"rect": pygame.Rect(start_x, start_y, btn_width // 2, btn_height), "text": "Run", "action": self.toggle_autorun}
@@ -56,12 +84,29 @@ class MTUVisualizer:
         self.buttons["stop"] = {"rect": pygame.Rect(start_x, start_y, btn_width // 2, btn_height), "text": "Stop", "action": self.stop_autorun}
         start_x += btn_width // 2 + margin
         self.buttons["reset"] = {"rect": pygame.Rect(start_x, start_y, btn_width // 2, btn_height), "text": "Reset", "action": self.reset_mtu}
+        start_x += btn_width // 2 + margin
+        self.buttons["profile"] = {"rect": pygame.Rect(start_x, start_y, btn_width // 2, btn_height), "text": "Perfil", "action": self.toggle_profile}
+        start_x += btn_width // 2 + margin
+        self.buttons["trace"] = {"rect": pygame.Rect(start_x, start_y, btn_width // 2, btn_height), "text": "Traza", "action": self.open_trace_dialog}
+        start_x += btn_width // 2 + margin
+        self.buttons["slower"] = {"rect": pygame.Rect(start_x, start_y, btn_width // 4, btn_height), "text": "-", "action": lambda: self.change_speed(-1)}
+        start_x += btn_width // 4 + margin // 2
+        self.buttons["faster"] = {"rect": pygame.Rect(start_x, start_y, btn_width // 4, btn_height), "text": "+", "action": lambda: self.change_speed(1)}
+        self.timeline_rect = pygame.Rect(50, start_y - 45, self.WIDTH - 100, 14)
+        self.buttons_area = pygame.Rect(0, start_y - 5, self.WIDTH, btn_height + 10)
+        self.timeline_area = pygame.Rect(0, self.timeline_rect.y - 18, self.WIDTH, self.timeline_rect.height + 24)
+        self.minimap_area = pygame.Rect(0, self.tape_y_pos + self.tape_cell_height + 20, self.WIDTH, 26)
+        self.minimap_rect = pygame.Rect(50, self.minimap_area.y + 5, self.WIDTH - 100, 16)
+        info_top = self.minimap_area.bottom
+        self.info_area = pygame.Rect(0, info_top, self.WIDTH, self.timeline_area.y - info_top)
+        self.profile_area = pygame.Rect(0, 0, self.WIDTH, self.tape_y_pos)
 
     def _show_input_dialog(self, title, prompt):
         root = tk.Tk()
         root.withdraw()
         user_input = simpledialog.askstring(title, prompt, parent=root)
         root.destroy()
+        self.full_redraw = True
         return user_input
 
     def load_program_dialog(self):
@@ -74,73 +119,146 @@ class MTUVisualizer:
             parent=root
         )
         root.destroy()
+        self.full_redraw = True
+        if file_path:
+            self.loading_name = file_path.split('/')[-1]
+            self.status_message = f"Cargando '{self.loading_name}'..."
+            self.worker.send("load", file_path)
+
+    def open_trace_dialog(self):
+        """Abre una traza grabada (tracefile.py) para reproducirla sin ejecutar el programa."""
+        self.stop_autorun()
+        root = tk.Tk()
+        root.withdraw()
+        file_path = filedialog.askopenfilename(
+            title="Seleccionar traza de ejecución MTU",
+            filetypes=(("Trazas MTU", "*.mtr"), ("All files", "*.*")),
+            parent=root
+        )
+        root.destroy()
+        self.full_redraw = True
         if file_path:
-            self.mtu.read_file(file_path) 
-            if self.mtu.error_message: 
-                self.status_message = f"Error Cargando: {self.mtu.error_message}"
-            elif self.mtu.program_loaded: 
-                self.status_message = f"Programa '{file_path.split('/')[-1]}' cargado."
-                self.last_executed_instruction_str = ""
-            else: 
-                self.status_message = "Fallo al cargar programa (estado desconocido)."
+            self.loading_name = file_path.split('/')[-1]
+            self.status_message = f"Abriendo traza '{self.loading_name}'..."
+            self.worker.send("trace", file_path)
+
+    def trace_opened_message(self, snapshot: Snapshot):
+        if snapshot.message:
+            self.status_message = f"Error abriendo traza: {snapshot.message}"
+        else:
+            self.status_message = f"Traza '{self.loading_name}' abierta: {snapshot.recorded} pasos."
+            self.last_executed_instruction_str = ""
+
+    def program_loaded_message(self, snapshot: Snapshot):
+        if snapshot.message:
+            self.status_message = f"Error Cargando: {snapshot.message}"
+        elif snapshot.error: 
+            self.status_message = f"Error Cargando: {snapshot.error}"
+        elif snapshot.program_loaded: 
+            self.status_message = f"Programa '{self.loading_name}' cargado."
+            self.last_executed_instruction_str = ""
+        else: 
+            self.status_message = "Fallo al cargar programa (estado desconocido)."
 
     def set_input_dialog(self):
         self.stop_autorun()
         new_input = self._show_input_dialog("Entrada de la MTU", "Ingrese la cadena de entrada inicial:")
         if new_input is not None:
-            self.mtu.initial_user_input = new_input 
-            self.mtu.reset() 
+            self.worker.send("input", new_input)
             self.status_message = f"Entrada: '{new_input}'. MTU reseteada."
             self.last_executed_instruction_str = ""
 
     def step_mtu(self, manual_step=False):
         if manual_step:
             self.stop_autorun() 
-        if not self.mtu.program_loaded: 
+        snapshot = self.snapshot
+        if not snapshot.program_loaded: 
             self.status_message = "Cargue un programa primero."
             return
-        if self.mtu.error_message and "Error Cargando" in self.mtu.error_message:
-            self.status_message = f"Corrija el error de carga: {self.mtu.error_message}"
+        if isinstance(snapshot.error, ProgramError):
+            self.status_message = f"Corrija el error de carga: {snapshot.error}"
             return
-        if self.mtu.error_message and "Error ejecutando" in self.mtu.error_message :
-            self.mtu.error_message = None
-
-        status, instruction_obj = self.mtu.step() 
-        if instruction_obj:
-            q_state_str = SAME if instruction_obj.same_end_state else instruction_obj.q_state
-            output_symbols_str = SAME if instruction_obj.same_output_symbol else instruction_obj.output_symbols
-            prefix = "W" if instruction_obj.is_while else ""
-            self.last_executed_instruction_str = f"{prefix}({instruction_obj.p_state}, {q_state_str}, {instruction_obj.input_symbols}, {output_symbols_str}, {instruction_obj.op})"
+        self.worker.send("step")
+
+    def step_back(self):
+        self.stop_autorun()
+        self.worker.send("back")
+
+    def seek_timeline(self, x: int):
+        fraction = min(max((x - self.timeline_rect.x) / self.timeline_rect.width, 0.0), 1.0)
+        self.worker.send("seek", fraction)
+
+    def after_seek(self, snapshot: Snapshot):
+        self.last_executed_instruction_str = ""
+        self.status_message = snapshot.message or f"Paso {snapshot.position} de {snapshot.recorded}."
+
+    def toggle_profile(self):
+        if not self.snapshot.profiling:
+            self.worker.send("profile", True)
+            self.status_message = "Perfilado activado."
         else:
-            self.last_executed_instruction_str = "N/A"
-        if status == "accepted":
+            self.worker.send("profile", False)
+            self.status_message = "Perfilado desactivado."
+
+    def poll_worker(self):
+        """Actualiza los mensajes según la última foto publicada por el hilo de la máquina."""
+        snapshot = self.snapshot
+        if snapshot.serial == self.seen_serial:
+            return
+        self.seen_serial = snapshot.serial
+        if snapshot.event in ("run", "step") and snapshot.result is not None:
+            self.show_result(snapshot.result, snapshot)
+        elif snapshot.event in ("back", "seek"):
+            self.after_seek(snapshot)
+        elif snapshot.event == "load":
+            self.program_loaded_message(snapshot)
+        elif snapshot.event == "trace":
+            self.trace_opened_message(snapshot)
+
+    def show_result(self, result: RunResult, snapshot: Snapshot):
+        instruction_obj = result.instruction
+        self.last_executed_instruction_str = str(instruction_obj) if instruction_obj else "N/A"
+        if result.reason == HaltReason.ACCEPTED:
             self.status_message = "¡ACEPTADO!"
             self.stop_autorun()
-        elif status == "no_match":
-             current_read_sym_for_status = '?'
-             if 0 <= self.mtu.pointer < len(self.mtu.job_tape):
-                 current_read_sym_for_status = self.mtu.job_tape[self.mtu.pointer]
-             self.status_message = f"DETENIDO: No hay coincidencia ({self.mtu.current_state}, '{current_read_sym_for_status}')"
+        elif result.reason == HaltReason.NO_MATCH:
+             current_read_sym_for_status = snapshot.symbol
+             self.status_message = f"DETENIDO: No hay coincidencia ({snapshot.state}, '{current_read_sym_for_status}')"
              self.stop_autorun()
-        elif status == "error":
-            self.status_message = f"ERROR Ejecución: {self.mtu.error_message}" 
+        elif result.reason == HaltReason.LOOPING:
+            self.status_message = f"DETENIDO: la máquina cicla para siempre ({snapshot.message})"
+            self.stop_autorun()
+        elif result.reason == HaltReason.ERROR:
+            self.status_message = f"ERROR Ejecución: {result.error}" 
             self.stop_autorun()
-        elif status == "stepped" or status == "stepped_while_skip": 
+        elif snapshot.message and not snapshot.running:
+            # Fin de una traza que se grabó sin que la máquina se detuviera
+            self.status_message = snapshot.message
+            self.stop_autorun()
+        elif self.auto_running:
+            speed = SPEEDS[self.speed_index]
+            self.status_message = f"Ejecutando a {speed} pasos/s..." if speed else "Ejecutando sin límite de velocidad..."
+        else: 
             self.status_message = "Paso ejecutado."
 
+    def change_speed(self, delta: int):
+        self.speed_index = min(max(self.speed_index + delta, 0), len(SPEEDS) - 1)
+        self.worker.send("speed", SPEEDS[self.speed_index])
+
     def toggle_autorun(self):
-        if not self.mtu.program_loaded:
+        snapshot = self.snapshot
+        if not snapshot.program_loaded:
             self.status_message = "Cargue un programa primero."
             return
         
-        if self.mtu.error_message and "Error Cargando" in self.mtu.error_message:
-            self.status_message = f"Corrija el error de carga: {self.mtu.error_message}"
+        if isinstance(snapshot.error, ProgramError):
+            self.status_message = f"Corrija el error de carga: {snapshot.error}"
             return
-        is_accepted = self.mtu.current_state in self.mtu.accepting_states
+        is_accepted = snapshot.accepting
         is_halted_or_error_gui = self.status_message and \
                              ("DETENIDO" in self.status_message.upper() or \
                               "ERROR EJECUCIÓN" in self.status_message.upper())
-        is_error_mtu = self.mtu.error_message and "Error ejecutando" in self.mtu.error_message
+        is_error_mtu = isinstance(snapshot.error, ExecutionError)
         if is_accepted or is_halted_or_error_gui or is_error_mtu:
             self.status_message = "Máquina en estado final o error. Resetee para re-ejecutar."
             self.auto_running = False 
@@ -148,15 +266,15 @@ class MTUVisualizer:
         self.auto_running = not self.auto_running
         if self.auto_running:
             self.status_message = "Ejecución automática iniciada..."
-            self.last_auto_step_time = pygame.time.get_ticks()
-            if not (is_accepted or is_halted_or_error_gui or is_error_mtu):
-                 self.step_mtu(manual_step=False) 
+            self.worker.send("run")
         else:
+            self.worker.send("pause")
             self.status_message = "Ejecución automática pausada."
 
     def stop_autorun(self):
         if self.auto_running:
             self.auto_running = False
+            self.worker.send("pause")
             is_final_message = self.status_message and \
                                ("ACEPTADO" in self.status_message.upper() or \
                                 "ERROR" in self.status_message.upper() or \
@@ -166,52 +284,57 @@ class MTUVisualizer:
 
     def reset_mtu(self):
         self.stop_autorun()
-        self.mtu.reset() 
+        self.worker.send("reset")
         self.status_message = "MTU reseteada a estado inicial."
         self.last_executed_instruction_str = ""
-        if self.mtu.error_message and "Error ejecutando" in self.mtu.error_message:
-            self.mtu.error_message = None
-
-    def draw_tape(self):
-        tape_surface = pygame.Surface((self.WIDTH, self.tape_cell_height + 20)) 
-        tape_surface.fill(self.BG_COLOR)
-        cells_to_show_half = (self.WIDTH // self.tape_cell_width) // 2
-        current_pointer = self.mtu.pointer
-        if not self.mtu.job_tape : self.mtu.job_tape = ['B','B','B']
-        if not (0 <= current_pointer < len(self.mtu.job_tape)):
-             current_pointer = min(max(0, current_pointer), len(self.mtu.job_tape) -1)
-             if current_pointer < 0 and len(self.mtu.job_tape) > 0: current_pointer = 0
-             self.mtu.pointer = current_pointer 
-        start_idx = max(0, current_pointer - cells_to_show_half)
-        end_idx = min(len(self.mtu.job_tape), start_idx + cells_to_show_half * 2 + 2)
-        if end_idx >= len(self.mtu.job_tape) and (end_idx - start_idx) < (cells_to_show_half * 2 + 1):
-            start_idx = max(0, len(self.mtu.job_tape) - (cells_to_show_half * 2 + 1))
-        screen_x = 0
-        for i in range(start_idx, end_idx):
-            symbol = 'B' 
-            if i < len(self.mtu.job_tape):
-                symbol = self.mtu.job_tape[i]
-            cell_rect = pygame.Rect(screen_x, 0, self.tape_cell_width, self.tape_cell_height)
-            pygame.draw.rect(tape_surface, self.TAPE_CELL_COLOR, cell_rect) 
-            pygame.draw.rect(tape_surface, self.TAPE_TEXT_COLOR, cell_rect, 1) 
-            symbol_text = self.font_medium.render(str(symbol), True, self.TAPE_TEXT_COLOR)
-            text_rect = symbol_text.get_rect(center=cell_rect.center)
-            tape_surface.blit(symbol_text, text_rect)
-            if i == current_pointer:
-                ptr_points = [
-                    (cell_rect.centerx, cell_rect.bottom + 5), 
-                    (cell_rect.centerx - 7, cell_rect.bottom + 15), 
-                    (cell_rect.centerx + 7, cell_rect.bottom + 15), 
-                ]
-                pygame.draw.polygon(tape_surface, self.POINTER_COLOR, ptr_points)
-            screen_x += self.tape_cell_width
-        self.screen.blit(tape_surface, (0, self.tape_y_pos))
+
+    def glyph(self, text: str, font: pygame.font.Font, color: tuple) -> pygame.Surface:
+        key = (text, font, color)
+        surface = self.glyphs.get(key)
+        if surface is None:
+            surface = self.glyphs[key] = font.render(text, True, color)
+        return surface
+
+    def draw_tape(self) -> list:
+        """Redibuja en la superficie persistente solo las celdas que cambiaron y las copia a la pantalla."""
+        # La ventana alrededor de la cabeza ya viene calculada en la foto
+        snapshot = self.snapshot
+        window = snapshot.window
+        dirty = []
+        for slot in range(self.tape_slots):
+            cell = (window[slot], snapshot.window_start + slot == snapshot.pointer) if slot < len(window) else None
+            if cell == self.tape_cells[slot] and not self.full_redraw:
+                continue
+            self.tape_cells[slot] = cell
+            area = pygame.Rect(slot * self.tape_cell_width, 0, self.tape_cell_width, self.tape_cell_height + 20)
+            self.tape_surface.fill(self.BG_COLOR, area)
+            if cell is not None:
+                symbol, is_pointer = cell
+                cell_rect = pygame.Rect(area.x, 0, self.tape_cell_width, self.tape_cell_height)
+                pygame.draw.rect(self.tape_surface, self.TAPE_CELL_COLOR, cell_rect) 
+                pygame.draw.rect(self.tape_surface, self.TAPE_TEXT_COLOR, cell_rect, 1) 
+                symbol_text = self.glyph(str(symbol), self.font_medium, self.TAPE_TEXT_COLOR)
+                text_rect = symbol_text.get_rect(center=cell_rect.center)
+                self.tape_surface.blit(symbol_text, text_rect)
+                if is_pointer:
+                    ptr_points = [
+                        (cell_rect.centerx, cell_rect.bottom + 5), 
+                        (cell_rect.centerx - 7, cell_rect.bottom + 15), 
+                        (cell_rect.centerx + 7, cell_rect.bottom + 15), 
+                    ]
+                    pygame.draw.polygon(self.tape_surface, self.POINTER_COLOR, ptr_points)
+            screen_area = area.move(0, self.tape_y_pos)
+            self.screen.blit(self.tape_surface, screen_area, area)
+            dirty.append(screen_area)
+        return dirty
 
     def draw_state_and_info(self):
-        current_state_y_pos = self.tape_y_pos + self.tape_cell_height + 40
-        state_text_str = f"Estado: {self.mtu.current_state}"
+        current_state_y_pos = self.info_area.y + 20
+        snapshot = self.snapshot
+        error_message = str(snapshot.error) if snapshot.error else None
+        state_text_str = f"Estado: {snapshot.state}"
         state_color = self.STATE_COLOR
-        if self.mtu.current_state in self.mtu.accepting_states:
+        if snapshot.accepting:
             state_color = self.ACCEPT_STATE_COLOR
             state_text_str += " (Aceptación)"
         state_surf = self.font_large.render(state_text_str, True, state_color)
@@ -224,10 +347,10 @@ class MTUVisualizer:
         
         status_color = self.INFO_TEXT_COLOR
         effective_status_message = self.status_message
-        if self.mtu.error_message and "ERROR" in self.status_message.upper():
+        if error_message and "ERROR" in self.status_message.upper():
             effective_status_message = self.status_message 
-        elif self.mtu.error_message: 
-            effective_status_message = f"ERROR MTU: {self.mtu.error_message}"
+        elif error_message: 
+            effective_status_message = f"ERROR MTU: {error_message}"
         current_status_upper = effective_status_message.upper() 
         if "ERROR" in current_status_upper:
             status_color = self.ERROR_TEXT_COLOR
@@ -241,6 +364,58 @@ class MTUVisualizer:
             instr_rect = instr_surf.get_rect(centerx=self.WIDTH // 2, y=status_rect.bottom + 20)
             self.screen.blit(instr_surf, instr_rect)
 
+    def draw_minimap(self):
+        """Toda la cinta en una franja: color del símbolo dominante, más intenso cuanto más
+        llena está cada columna; marcas de escrituras recientes, la ventana visible y la cabeza."""
+        snapshot = self.snapshot
+        rect = self.minimap_rect
+        pygame.draw.rect(self.screen, self.TAPE_CELL_COLOR, rect)
+        for x, (code, fill, recent) in enumerate(snapshot.minimap):
+            if code is not None:
+                base = self.MINIMAP_PALETTE[code % len(self.MINIMAP_PALETTE)]
+                weight = 0.35 + 0.65 * fill
+                color = tuple(int(bg + (c - bg) * weight) for c, bg in zip(base, self.TAPE_CELL_COLOR))
+                pygame.draw.line(self.screen, color, (rect.x + x, rect.y + 3), (rect.x + x, rect.bottom - 1))
+            if recent:
+                pygame.draw.line(self.screen, self.MINIMAP_RECENT_COLOR, (rect.x + x, rect.y), (rect.x + x, rect.y + 2))
+        length = snapshot.hi - snapshot.lo
+        if length > 0:
+            scale = rect.width / length
+            view_x = rect.x + int((snapshot.window_start - snapshot.lo) * scale)
+            view_w = max(int(len(snapshot.window) * scale), 2)
+            pygame.draw.rect(self.screen, self.TAPE_TEXT_COLOR, (view_x, rect.y - 2, view_w, rect.height + 4), 1)
+            head_x = rect.x + int((snapshot.pointer - snapshot.lo) * scale)
+            pygame.draw.line(self.screen, self.POINTER_COLOR, (head_x, rect.y - 3), (head_x, rect.bottom + 2), 2)
+
+    def draw_profile(self):
+        # Instrucciones más ejecutadas, en la esquina superior izquierda
+        snapshot = self.snapshot
+        if not snapshot.profiling:
+            return
+        header = self.font_small.render(f"Perfil: {snapshot.profile_steps} pasos", True, self.STATE_COLOR)
+        self.screen.blit(header, (10, 10))
+        y = 32
+        for instruction, count in snapshot.hottest:
+            share = 100.0 * count / snapshot.profile_steps if snapshot.profile_steps else 0.0
+            line = self.font_tiny.render(f"{count:>8} {share:5.1f}%  {instruction}", True, self.INFO_TEXT_COLOR)
+            self.screen.blit(line, (10, y))
+            y += 13
+
+    def draw_timeline(self):
+        snapshot = self.snapshot
+        total = snapshot.recorded
+        pygame.draw.rect(self.screen, self.TAPE_CELL_COLOR, self.timeline_rect, border_radius=4)
+        if total:
+            marker_x = self.timeline_rect.x + self.timeline_rect.width * snapshot.position // total
+            done = pygame.Rect(self.timeline_rect.x, self.timeline_rect.y, marker_x - self.timeline_rect.x, self.timeline_rect.height)
+            pygame.draw.rect(self.screen, self.BUTTON_COLOR, done, border_radius=4)
+            pygame.draw.line(self.screen, self.POINTER_COLOR, (marker_x, self.timeline_rect.top - 3), (marker_x, self.timeline_rect.bottom + 3), 3)
+        label = self.font_tiny.render(f"Paso {snapshot.position} / {total}", True, self.INFO_TEXT_COLOR)
+        self.screen.blit(label, (self.timeline_rect.x, self.timeline_rect.y - 16))
+        speed = snapshot.speed
+        speed_label = self.font_tiny.render(f"Velocidad: {speed} pasos/s" if speed else "Velocidad: sin límite", True, self.INFO_TEXT_COLOR)
+        self.screen.blit(speed_label, speed_label.get_rect(right=self.timeline_rect.right, y=self.timeline_rect.y - 16))
+
     def draw_buttons(self):
         mouse_pos = pygame.mouse.get_pos()
         for name, btn in self.buttons.items():
@@ -251,63 +426,96 @@ class MTUVisualizer:
                     color = self.BUTTON_CLICK_COLOR
             if name == "run" and self.auto_running: 
                 color = (0, 200, 100) 
+            if name == "profile" and self.snapshot.profiling:
+                color = (0, 200, 100)
             pygame.draw.rect(self.screen, color, btn["rect"], border_radius=5) 
-            text_surf = self.font_small.render(btn["text"], True, self.BUTTON_TEXT_COLOR)
+            text_surf = self.glyph(btn["text"], self.font_small, self.BUTTON_TEXT_COLOR)
             text_rect = text_surf.get_rect(center=btn["rect"].center)
             self.screen.blit(text_surf, text_rect)
 
+    def hovered_button(self):
+        mouse_pos = pygame.mouse.get_pos()
+        for name, btn in self.buttons.items():
+            if btn["rect"].collidepoint(mouse_pos):
+                return name
+        return None
+
     def draw(self):
-        self.screen.fill(self.BG_COLOR)
-        self.draw_tape()
-        self.draw_state_and_info()
-        self.draw_buttons()
-        pygame.display.flip()
+        """Redibuja solo las secciones cuya firma cambió y actualiza solo esos rectángulos."""
+        if self.full_redraw:
+            self.screen.fill(self.BG_COLOR)
+        dirty = self.draw_tape()
+        snapshot = self.snapshot
+        sections = (
+            ("info", self.info_area, self.draw_state_and_info,
+             (snapshot.state, snapshot.accepting, str(snapshot.error), self.status_message, self.last_executed_instruction_str)),
+            ("minimap", self.minimap_area, self.draw_minimap, (snapshot.serial,)),
+            ("profile", self.profile_area, self.draw_profile,
+             (snapshot.profiling, snapshot.profile_steps, len(snapshot.hottest))),
+            ("timeline", self.timeline_area, self.draw_timeline,
+             (snapshot.position, snapshot.recorded, snapshot.speed)),
+            ("buttons", self.buttons_area, self.draw_buttons,
+             (self.hovered_button(), self.active_button_name, self.auto_running, snapshot.profiling)),
+        )
+        for name, area, painter, signature in sections:
+            if not self.full_redraw and self.section_signatures.get(name) == signature:
+                continue
+            self.section_signatures[name] = signature
+            self.screen.fill(self.BG_COLOR, area)
+            painter()
+            dirty.append(area)
+        if self.full_redraw:
+            self.full_redraw = False
+            pygame.display.flip()
+        elif dirty:
+            pygame.display.update(dirty)
 
     def run(self):
         while self.running:
-            current_time = pygame.time.get_ticks()
-
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     self.running = False
+
+                if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    self.full_redraw = True
                 
                 if event.type == pygame.MOUSEBUTTONDOWN:
-                    if event.button == 1: 
+                    if event.button == 1 and self.timeline_rect.collidepoint(event.pos):
+                        self.stop_autorun()
+                        self.scrubbing = True
+                        self.seek_timeline(event.pos[0])
+                    elif event.button == 1: 
                         for btn_name, btn_data in self.buttons.items():
                             if btn_data["rect"].collidepoint(event.pos):
                                 self.active_button_name = btn_name
                                 break 
                 
+                if event.type == pygame.MOUSEMOTION and self.scrubbing:
+                    self.seek_timeline(event.pos[0])
+
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_LEFT:
+                        self.step_back()
+                    elif event.key == pygame.K_RIGHT:
+                        self.step_mtu(manual_step=True)
+                    elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                        self.change_speed(1)
+                    elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                        self.change_speed(-1)
+
                 if event.type == pygame.MOUSEBUTTONUP:
                     if event.button == 1: 
+                        self.scrubbing = False
                         if self.active_button_name: 
                             btn_data = self.buttons.get(self.active_button_name)
                             if btn_data and btn_data["rect"].collidepoint(event.pos): 
                                 btn_data["action"]()
                         self.active_button_name = None 
 
-            if self.auto_running:
-                if current_time - self.last_auto_step_time > self.auto_run_delay:
-                    can_step_automatically = True
-                    if self.mtu.current_state in self.mtu.accepting_states:
-                        can_step_automatically = False
-                    
-                
-                    is_gui_halted_or_error = self.status_message and \
-                                             ("DETENIDO" in self.status_message.upper() or \
-                                              "ERROR" in self.status_message.upper())
-                    is_mtu_error = self.mtu.error_message is not None
-
-                    if is_gui_halted_or_error or is_mtu_error:
-                         can_step_automatically = False
-                    
-                    if can_step_automatically:
-                        self.step_mtu(manual_step=False) 
-                        self.last_auto_step_time = current_time 
-                    else:
-                        self.stop_autorun()
+            self.poll_worker()
             self.draw()
             self.clock.tick(60) 
+        self.worker.stop()
         pygame.quit()
 
 if __name__ == '__main__':
@@ -0,0 +1,31 @@
+from typing import TYPE_CHECKING, Optional
+from transition_table import Action
+
+if TYPE_CHECKING:
+    from mtu import MTU
+    from result import HaltReason, RunResult
+
+class ExecutionHook:
+    """Observador de la ejecución paso a paso, para `MTU.run(hooks=[...])`.
+
+    Con hooks la máquina usa un bucle instrumentado aparte (un paso a la vez, sin recorridos
+    en bloque); sin ellos el bucle rápido no paga nada. Las subclases redefinen solo los
+    métodos que necesitan.
+    """
+    def on_start(self, mtu: "MTU"):
+        pass
+
+    def on_step(self, mtu: "MTU", action: Action, state: str, pos: int, code: int) -> Optional["HaltReason"]:
+        """Se llama antes de aplicar `action`: `state`, `pos` y `code` son el estado, la
+        posición de la cabeza y el código leído en ese momento.
+
+        Si devuelve un HaltReason, la ejecución se detiene con ese motivo después de aplicar
+        el paso (todos los hooks lo ven, así que siguen consistentes).
+        """
+        return None
+
+    def on_grow(self, mtu: "MTU", pos: int):
+        """La cinta creció para incluir `pos`: hacia la izquierda si pos == mtu.job_tape.lo."""
+
+    def on_stop(self, mtu: "MTU", result: "RunResult"):
+        pass
@@ -1,3 +1,4 @@
+from typing import List, Optional, Tuple
 from config import SAME
 class Instruction:
     def __init__(self):
@@ -9,8 +10,43 @@ class Instruction:
         self.same_end_state = False
         self.same_output_symbol = False
         self.op = None
-      
-    def __str__(self): 
+        # Resueltos por `resolve` al cargar: caso de la especificación (1-4) y, para cada
+        # símbolo de `input_symbols`, el par (estado destino, símbolo escrito); None es ~
+        self.case: Optional[int] = None
+        self.outcomes: Optional[List[Tuple[Optional[str], Optional[str]]]] = None
+
+    def resolve(self) -> Optional[str]:
+        """Clasifica la instrucción según los largos de q, s y z y precalcula `outcomes`.
+
+        Devuelve el mensaje de error si los largos no coinciden con ningún caso.
+        """
+        q_len = 0 if self.same_end_state else len(self.q_state)
+        s_len = len(self.input_symbols)
+        z_len = 0 if self.same_output_symbol else len(self.output_symbols)
+        if q_len <= 1 and z_len <= 1:
+            case = 1
+        elif q_len <= 1 and z_len == s_len:
+            case = 2
+        elif z_len <= 1 and q_len == s_len:
+            case = 3
+        elif q_len == s_len and z_len == s_len:
+            case = 4
+        else:
+            return f"Instrucción mal formada o no coincide con ningún caso (q:{q_len}, s:{s_len}, z:{z_len})"
+        # Un solo valor vale para todos los símbolos; en una lista, ~ conserva por posición
+        if q_len <= 1:
+            states = [self.q_state[0] if q_len else None] * s_len
+        else:
+            states = [None if state == SAME else state for state in self.q_state]
+        if z_len <= 1:
+            writes = [self.output_symbols[0] if z_len else None] * s_len
+        else:
+            writes = [None if symbol == SAME else symbol for symbol in self.output_symbols]
+        self.case = case
+        self.outcomes = list(zip(states, writes))
+        return None
+
+    def __str__(self):
         q_state_str = SAME if self.same_end_state else self.q_state
         output_symbols_str = SAME if self.same_output_symbol else self.output_symbols
         prefix = "W" if self.is_while else ""
@@ -0,0 +1,103 @@
+from array import array
+from typing import Dict, List, Tuple
+from hooks import ExecutionHook
+from mtu import MTU
+from transition_table import Action
+
+GREW = 4  # Bit de `flags`: el paso hizo crecer la cinta
+
+class Journal(ExecutionHook):
+    """Bitácora para deshacer pasos, enganchada con `MTU.run(hooks=[journal])`.
+
+    Por cada paso se guarda el estado previo (índice en `state_names`), el código
+    sobrescrito y un byte con el movimiento más el bit GREW: unos 6 bytes por paso en
+    arreglos `array`. Cada `interval` pasos se guarda además una copia completa de la
+    máquina, de modo que `seek` a cualquier paso cuesta O(interval) y no O(k).
+
+    `position` es el paso actual dentro de la línea de tiempo grabada; ejecutar desde un
+    paso anterior al último descarta el futuro grabado y sigue grabando desde ahí.
+    """
+    def __init__(self, interval: int = 4096):
+        self.interval = interval
+        self.state_names: List[str] = []
+        self.state_ids: Dict[str, int] = {}
+        self.states = array('I')
+        self.codes = array('B')
+        self.flags = array('B')
+        self.checkpoints: List[Tuple[str, int, object]] = []
+        self.position = 0
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def clear(self):
+        self.__init__(self.interval)
+
+    def nbytes(self) -> int:
+        return sum(len(data) * data.itemsize for data in (self.states, self.codes, self.flags))
+
+    def on_step(self, mtu: MTU, action: Action, state: str, pos: int, code: int):
+        k = self.position
+        if k < len(self.states):
+            del self.states[k:], self.codes[k:], self.flags[k:]
+            del self.checkpoints[k // self.interval + 1:]
+        if k % self.interval == 0 and len(self.checkpoints) == k // self.interval:
+            self.checkpoints.append((state, pos, mtu.job_tape.snapshot()))
+        state_id = self.state_ids.get(state)
+        if state_id is None:
+            state_id = self.state_ids[state] = len(self.state_names)
+            self.state_names.append(state)
+        self.states.append(state_id)
+        self.codes.append(code)
+        self.flags.append(action.move + 1)
+        self.position = k + 1
+
+    def on_grow(self, mtu: MTU, pos: int):
+        self.flags[-1] |= GREW
+
+    def undo(self, mtu: MTU) -> bool:
+        """Deshace el último paso ejecutado; False si ya se está al principio."""
+        if self.position == 0:
+            return False
+        k = self.position - 1
+        flags = self.flags[k]
+        tape = mtu.job_tape
+        pos = mtu.pointer
+        if flags & GREW:
+            if pos == tape.lo:
+                tape.truncate(pos + 1, tape.hi)
+            else:
+                tape.truncate(tape.lo, pos)
+        pos -= (flags & 3) - 1
+        tape.write_code(pos, self.codes[k])
+        mtu.pointer = pos
+        mtu.current_state = self.state_names[self.states[k]]
+        self.position = k
+        return True
+
+    def seek(self, mtu: MTU, step: int):
+        """Lleva la máquina al paso `step` (0..len) de la línea de tiempo grabada.
+
+        Retrocede deshaciendo pasos o, si sale más barato, restaura la copia anterior
+        más cercana y vuelve a ejecutar hacia adelante con el bucle rápido.
+        """
+        step = max(0, min(step, len(self.states)))
+        base = min(step // self.interval, len(self.checkpoints) - 1) * self.interval
+        if step < self.position:
+            if self.position - step <= step - base:
+                while self.position > step:
+                    self.undo(mtu)
+                return
+            self.restore(mtu, base)
+        elif base > self.position:
+            self.restore(mtu, base)
+        if step > self.position:
+            mtu.run(max_steps=step - self.position)
+            self.position = step
+
+    def restore(self, mtu: MTU, step: int):
+        state, pos, snapshot = self.checkpoints[step // self.interval]
+        mtu.job_tape.restore(snapshot)
+        mtu.pointer = pos
+        mtu.current_state = state
+        self.position = step
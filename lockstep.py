@@ -0,0 +1,227 @@
+"""Motor vectorizado: un mismo programa MTU sobre miles de entradas cortas a la vez.
+
+Todas las cintas viven en un solo arreglo uint8 de NumPy (una fila por entrada) y cada
+máquina tiene su cabeza, su estado y su contador de pasos en vectores. En cada iteración
+se avanzan juntas todas las máquinas que siguen corriendo con unas pocas operaciones de
+indexado sobre la tabla de transiciones, así que el costo de Python se reparte entre
+todas las filas. El resultado de cada entrada es exactamente el que daría `MTU.run`.
+
+NumPy es una dependencia opcional: solo hace falta para este motor.
+"""
+import time
+from typing import List, Optional, Sequence
+from config import BLANK, MAX_SYMBOLS
+from errors import ExecutionError
+from mtu import initial_symbols
+from program import Program
+from result import HaltReason
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Las máquinas detenidas pasan a una copia del estado en una de estas bandas: la fila de la
+# copia no escribe, no se mueve y no cuenta pasos, así que no hace falta enmascararlas
+BANDS = [None, HaltReason.ACCEPTED, HaltReason.NO_MATCH, HaltReason.ERROR]
+ACCEPTED_BAND, NO_MATCH_BAND, ERROR_BAND = 1, 2, 3
+
+class LockstepResult:
+    """Resultado de una entrada: lo mismo que queda en la MTU tras `run`."""
+    __slots__ = ("input", "reason", "steps", "state", "pointer", "tape", "error")
+
+    def __init__(self, user_input: str, reason: HaltReason, steps: int, state: str, pointer: int,
+                 tape: str, error: Optional[ExecutionError] = None):
+        self.input = user_input
+        self.reason = reason
+        self.steps = steps
+        self.state = state
+        self.pointer = pointer    # Posición lógica, como MTU.pointer
+        self.tape = tape          # Celdas creadas [lo, hi), como str(mtu.job_tape)
+        self.error = error
+
+class LockstepEngine:
+    """Ejecuta un programa compilado sobre lotes de entradas en paso sincronizado.
+
+    Los estados se numeran 0..S-1 ('00' es el 0) y los símbolos usan los códigos de un
+    byte del alfabeto del programa. La tabla se aplana en vectores indexados por
+    `estado * 256 + código` (símbolo escrito, estado siguiente, movimiento y pasos
+    contados), con 4*S estados: los S reales y una copia por cada motivo de detención.
+
+    Cada BLOCK_STEPS iteraciones se revisa que ninguna cabeza pueda salirse del arreglo
+    (si no, se ensancha para todas las filas), se compactan las filas detenidas cuando son
+    suficientes y se consulta el reloj. Memoria: entradas × ancho de la cinta más larga.
+    """
+    BLOCK_STEPS = 64
+    COMPACT_FRACTION = 0.125  # Se compacta cuando al menos esta fracción de filas terminó
+
+    def __init__(self, program: Program):
+        if np is None:
+            raise ImportError("El motor lockstep necesita NumPy (pip install numpy).")
+        program.compile()
+        self.program = program
+        self.table = program.table
+        # Copia, igual que MTU.load_program: las entradas internan sus propios símbolos
+        self.alphabet = program.alphabet.copy()
+        accepting = set(program.accepting_states)
+        self.states: List[str] = ['00']
+        self.state_ids = {'00': 0}
+        for state, row in self.table.rows.items():
+            self.state_id(state)
+            for action in row:
+                if action is not None and action.next_state is not None:
+                    self.state_id(action.next_state)
+        for state in program.accepting_states:
+            self.state_id(state)
+        count = len(self.states)
+        self.count = count
+        size = len(BANDS) * count * MAX_SYMBOLS
+        codes = np.tile(np.arange(MAX_SYMBOLS, dtype=np.uint8), len(BANDS) * count)
+        states = np.repeat(np.arange(len(BANDS) * count, dtype=np.int32), MAX_SYMBOLS)
+        self.write = codes.copy()                                    # Por defecto no escribe
+        self.next = np.where(states < count, states + NO_MATCH_BAND * count, states).astype(np.int32)
+        self.move = np.zeros(size, dtype=np.int8)
+        self.counted = np.zeros(size, dtype=np.int8)
+        self.accepting = np.zeros(count, dtype=bool)
+        for state, index in self.state_ids.items():
+            base = index * MAX_SYMBOLS
+            if state in accepting:
+                # Al entrar en un estado de aceptación la máquina se detiene sin ejecutar su fila
+                self.accepting[index] = True
+                self.next[base:base + MAX_SYMBOLS] = index + ACCEPTED_BAND * count
+                continue
+            row = self.table.rows.get(state)
+            if row is None:
+                continue
+            for code, action in enumerate(row):
+                if action is None:
+                    continue
+                if action.error:
+                    self.next[base + code] = index + ERROR_BAND * count
+                    continue
+                if action.write is not None:
+                    self.write[base + code] = action.write
+                if action.next_state is not None:
+                    self.next[base + code] = self.state_ids[action.next_state]
+                else:
+                    self.next[base + code] = index
+                self.move[base + code] = action.move
+                self.counted[base + code] = 1
+
+    def state_id(self, state: str) -> int:
+        index = self.state_ids.get(state)
+        if index is None:
+            index = self.state_ids[state] = len(self.states)
+            self.states.append(state)
+        return index
+
+    def run(self, inputs: Sequence[str], max_steps: Optional[int] = None,
+            max_seconds: Optional[float] = None) -> List[LockstepResult]:
+        """Ejecuta todas las entradas; devuelve un resultado por entrada, en el mismo orden.
+
+        `max_steps` es por entrada, como en `MTU.run`; `max_seconds` es para todo el lote y
+        las entradas que siguen corriendo al agotarlo terminan con HaltReason.TIMEOUT.
+        """
+        deadline = None if max_seconds is None else time.perf_counter() + max_seconds
+        results: List[Optional[LockstepResult]] = [None] * len(inputs)
+        if not inputs:
+            return []
+        # La cinta inicial de cada entrada son caracteres sueltos: se internan una sola vez
+        # y cada entrada se codifica con str.translate (los códigos caben en un byte)
+        code = self.alphabet.code
+        table = {ord(symbol): code(symbol) for symbol in set(''.join(inputs)) | {BLANK}}
+        encoded = [''.join(initial_symbols(text)).translate(table).encode('latin-1') for text in inputs]
+        margin = self.BLOCK_STEPS
+        width = max(len(codes) for codes in encoded) + 2 * margin
+        padding = bytes(width)
+        buffer = b''.join(padding[:margin] + codes + padding[margin + len(codes):] for codes in encoded)
+        tapes = np.frombuffer(buffer, dtype=np.uint8).reshape(len(inputs), width).copy()
+        lengths = np.fromiter((len(codes) for codes in encoded), dtype=np.int64, count=len(inputs))
+        self.origin = margin  # Columna de la posición lógica 0 (la misma en todas las filas)
+        # Cabeza y bordes [lo, hi] de cada cinta como índices del arreglo aplanado
+        base = np.arange(len(inputs), dtype=np.int64) * width
+        ids = np.arange(len(inputs))
+        head = base + margin + 1
+        lo = base + margin
+        hi = base + margin + lengths - 1
+        state = np.zeros(len(inputs), dtype=np.int32)
+        steps = np.zeros(len(inputs), dtype=np.int64)
+        write, follow, move, counted = self.write, self.next, self.move, self.counted
+        done = 0
+        reason = None
+        while True:
+            block = self.BLOCK_STEPS if max_steps is None else min(self.BLOCK_STEPS, max_steps - done)
+            if block <= 0:
+                reason = HaltReason.MAX_STEPS
+                break
+            columns = head - base
+            if columns.min() < block or columns.max() >= tapes.shape[1] - block:
+                grow = max(margin, tapes.shape[1] // 2)
+                tapes, base, (head, lo, hi) = self.relayout(tapes, base, None, grow, grow, (head, lo, hi))
+            flat = tapes.reshape(-1)
+            for _ in range(block):
+                read = flat[head]
+                index = (state << 8) | read
+                flat[head] = write[index]
+                state = follow[index]
+                head += move[index]
+                steps += counted[index]
+                np.minimum(lo, head, out=lo)
+                np.maximum(hi, head, out=hi)
+            done += block
+            running = state < self.count
+            live = int(np.count_nonzero(running))
+            if live == 0:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                reason = HaltReason.TIMEOUT
+                break
+            if len(state) - live >= self.COMPACT_FRACTION * len(state):
+                finished = ~running
+                self.collect(results, inputs, tapes, base[finished], ids[finished], head[finished], lo[finished],
+                             hi[finished], state[finished], steps[finished], None)
+                ids, state, steps = ids[running], state[running], steps[running]
+                tapes, base, (head, lo, hi) = self.relayout(tapes, base, running, 0, 0, (head, lo, hi))
+        self.collect(results, inputs, tapes, base, ids, head, lo, hi, state, steps, reason)
+        return results
+
+    def relayout(self, tapes, base, keep, left: int, right: int, vectors: tuple):
+        """Copia las filas `keep` (todas si es None) a un arreglo con `left`/`right` columnas
+        más a cada lado; devuelve el arreglo, las nuevas bases y los índices convertidos."""
+        width = tapes.shape[1]
+        if keep is not None:
+            tapes, base = tapes[keep], base[keep]
+            vectors = tuple(vector[keep] for vector in vectors)
+        if left or right:
+            grown = np.zeros((tapes.shape[0], left + width + right), dtype=np.uint8)
+            grown[:, left:left + width] = tapes
+            tapes = grown
+            self.origin += left
+        new_base = np.arange(tapes.shape[0], dtype=np.int64) * tapes.shape[1]
+        vectors = tuple(vector - base + new_base + left for vector in vectors)
+        return tapes, new_base, vectors
+
+    def collect(self, results, inputs, tapes, base, ids, head, lo, hi, state, steps,
+                reason: Optional[HaltReason]):
+        """Llena los resultados de las filas indicadas. `reason` es el motivo de las que
+        siguen corriendo (se agotó el presupuesto de pasos o de tiempo)."""
+        symbols = dict(enumerate(self.alphabet.symbols))
+        width = tapes.shape[1]
+        rows = (base // width).tolist()
+        for row, index, position, first, last, current, count in zip(
+                rows, ids.tolist(), (head - base).tolist(), (lo - base).tolist(), (hi - base).tolist(),
+                state.tolist(), steps.tolist()):
+            band, current = divmod(current, self.count)
+            name = self.states[current]
+            if band == 0:
+                # Entró en un estado de aceptación justo en el último paso permitido
+                band_reason = HaltReason.ACCEPTED if self.accepting[current] else reason
+            else:
+                band_reason = BANDS[band]
+            error = None
+            if band == ERROR_BAND:
+                action = self.table.rows[name][int(tapes[row, position])]
+                error = ExecutionError(f"Error ejecutando instrucción {action.instruction}: {action.error}")
+            tape = tapes[row, first:last + 1].tobytes().decode('latin-1').translate(symbols)
+            results[index] = LockstepResult(inputs[index], band_reason, count, name,
+                                            position - self.origin, tape, error)
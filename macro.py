@@ -0,0 +1,173 @@
+"""Motor de macro-máquina: transiciones memorizadas sobre bloques de k celdas.
+
+La cinta se parte en bloques alineados de `block_size` celdas. Un macro-estado es
+(estado, contenido del bloque, posición de entrada de la cabeza dentro del bloque): desde
+él la máquina es determinista hasta que la cabeza sale del bloque por uno de sus lados o
+se detiene, así que el resultado (bloque final, estado, salida, pasos) se simula una vez
+con la tabla de transiciones y se reutiliza en O(1) cada vez que el macro-estado se repite.
+Se elige con `MTU(engine="macro")` y cuenta los pasos exactos del intérprete.
+"""
+import time
+from collections import OrderedDict
+from typing import Optional
+from errors import ExecutionError
+from program import Program
+from result import HaltReason, RunResult
+from tape import Tape
+from transition_table import Action
+from config import CHECK_INTERVAL
+
+LOOKUP_FAILURES = (HaltReason.NO_MATCH, HaltReason.ERROR)
+
+class MacroStep:
+    """Efecto de una macro-transición. `offset`, `low` y `high` son relativos al inicio del
+    bloque: `offset` puede ser -1 o block_size si la cabeza salió, y [low, high] son las
+    celdas visitadas (incluida la de salida), que pasan a ser parte de la cinta creada."""
+    __slots__ = ("block", "state", "offset", "steps", "low", "high", "reason", "action")
+
+    def __init__(self, block: bytes, state: str, offset: int, steps: int, low: int, high: int,
+                 reason: Optional[HaltReason], action: Optional[Action]):
+        self.block = block
+        self.state = state
+        self.offset = offset
+        self.steps = steps
+        self.low = low
+        self.high = high
+        self.reason = reason    # ACCEPTED, NO_MATCH o ERROR si la máquina se detuvo; None si no
+        self.action = action    # Última acción consultada, como en el bucle rápido de MTU.run
+
+class MacroMachine:
+    """Ejecuta un programa por macro-transiciones sobre una cinta densa (lo llama MTU.run).
+
+    Las macro-transiciones ya simuladas se guardan en un LRU de `cache_size` entradas; las
+    que no terminan dentro del presupuesto de pasos (o de MAX_SIMULATION pasos, para poder
+    consultar el reloj) se ejecutan sin guardarse. `hits`, `misses` y `evictions` cuentan
+    el uso de la caché.
+    """
+    DEFAULT_BLOCK_SIZE = 32
+    DEFAULT_CACHE_SIZE = 1 << 16
+    MAX_SIMULATION = CHECK_INTERVAL
+
+    def __init__(self, program: Program, block_size: int = DEFAULT_BLOCK_SIZE,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        if block_size < 1:
+            raise ValueError("El tamaño de bloque debe ser positivo.")
+        program.compile()
+        self.table = program.table
+        self.accepting = set(program.accepting_states)
+        self.block_size = block_size
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[tuple, MacroStep]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def simulate(self, state: str, block: bytes, offset: int, limit: int) -> MacroStep:
+        """Ejecuta paso a paso dentro del bloque, con la semántica de MTU.run, hasta que la
+        cabeza sale, la máquina se detiene o se cumplen `limit` pasos."""
+        cells = bytearray(block)
+        rows = self.table.rows
+        accepting = self.accepting
+        size = self.block_size
+        row = rows.get(state)
+        steps = 0
+        low = high = offset
+        reason = None
+        action = None
+        while steps < limit:
+            action = row[cells[offset]] if row is not None else None
+            if action is None:
+                reason = HaltReason.NO_MATCH
+                break
+            if action.error:
+                reason = HaltReason.ERROR
+                break
+            if action.write is not None:
+                cells[offset] = action.write
+            if action.next_state is not None:
+                state = action.next_state
+                row = rows.get(state)
+            offset += action.move
+            steps += 1
+            if offset < low:
+                low = offset
+            elif offset > high:
+                high = offset
+            if state in accepting:
+                reason = HaltReason.ACCEPTED
+                break
+            if not 0 <= offset < size:
+                break
+        return MacroStep(bytes(cells), state, offset, steps, low, high, reason, action)
+
+    def run(self, mtu, max_steps: Optional[int], deadline: Optional[float], start: float) -> RunResult:
+        tape: Tape = mtu.job_tape
+        size = self.block_size
+        cache = self.cache
+        cells = tape.cells  # reserve amplía este mismo bytearray
+        pos, state = mtu.pointer, mtu.current_state
+        steps = 0
+        next_check = CHECK_INTERVAL
+        reason = None
+        action = None
+        while True:
+            remaining = None if max_steps is None else max_steps - steps
+            if remaining == 0:
+                reason = HaltReason.MAX_STEPS
+                break
+            if deadline is not None and steps >= next_check:
+                next_check = steps + CHECK_INTERVAL
+                if time.perf_counter() >= deadline:
+                    reason = HaltReason.TIMEOUT
+                    break
+            first = pos // size * size
+            offset = pos - first
+            index = tape.origin + first
+            if index < 1 or index + size + 1 > len(cells):
+                # También las celdas vecinas: la de salida pasa a ser parte de la cinta
+                tape.reserve(first - 1, first + size + 1)
+                index = tape.origin + first
+            block = bytes(cells[index:index + size])
+            key = (state, block, offset)
+            macro = cache.get(key)
+            # NO_MATCH y ERROR se detectan al consultar la tabla, después de revisar el presupuesto
+            if macro is not None and remaining is not None and (
+                    macro.steps > remaining or macro.steps == remaining and macro.reason in LOOKUP_FAILURES):
+                macro = None
+            if macro is not None:
+                self.hits += 1
+                cache.move_to_end(key)
+            else:
+                self.misses += 1
+                limit = self.MAX_SIMULATION if remaining is None else min(remaining, self.MAX_SIMULATION)
+                macro = self.simulate(state, block, offset, limit)
+                if macro.reason is not None or not 0 <= macro.offset < size:
+                    cache[key] = macro
+                    if len(cache) > self.cache_size:
+                        cache.popitem(last=False)
+                        self.evictions += 1
+            if macro.block != block:
+                cells[index:index + size] = macro.block
+            if first + macro.low < tape.lo:
+                tape.lo = first + macro.low
+            if first + macro.high >= tape.hi:
+                tape.hi = first + macro.high + 1
+            state = macro.state
+            pos = first + macro.offset
+            steps += macro.steps
+            if macro.steps or macro.reason is not None:
+                action = macro.action
+            if macro.reason is not None:
+                reason = macro.reason
+                break
+        mtu.pointer, mtu.current_state = pos, state
+        if reason == HaltReason.ERROR:
+            mtu.error = ExecutionError(f"Error ejecutando instrucción {action.instruction}: {action.error}")
+        instruction = action.instruction if action is not None else None
+        return RunResult(reason, steps, time.perf_counter() - start, instruction, mtu.error)
+
+    def stats(self) -> str:
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return (f"caché de macro-transiciones: {len(self.cache)} entradas, {self.hits} aciertos, "
+                f"{self.misses} fallos ({rate:.1%} de aciertos), {self.evictions} expulsiones")
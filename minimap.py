@@ -0,0 +1,107 @@
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from hooks import ExecutionHook
+from mtu import MTU
+from tape import BaseTape
+from transition_table import Action
+
+# Una columna del minimapa: código dominante (None si todo es blanco), fracción de celdas
+# no blancas y si hubo escrituras recientes en ese tramo
+Column = Tuple[Optional[int], float, bool]
+
+class TapeSummary(ExecutionHook):
+    """Resumen jerárquico de la cinta para dibujarla completa en pocas columnas.
+
+    El nivel k agrupa la cinta en bloques de BLOCK_SIZE * FANOUT**k celdas y guarda, por
+    bloque, cuántas celdas tienen cada código no blanco y el último paso en que se
+    escribió en él. Cada escritura actualiza un bloque por nivel, y `columns` elige el
+    nivel cuyos bloques cubren al menos una columna, así que dibujar cuesta O(ancho)
+    sin importar el tamaño de la cinta.
+    """
+    BLOCK_SIZE = 64
+    FANOUT = 8
+    LEVELS = 6
+
+    def __init__(self, recent_steps: int = 10_000):
+        self.recent_steps = recent_steps
+        self.sizes = [self.BLOCK_SIZE * self.FANOUT ** level for level in range(self.LEVELS)]
+        self.counts: List[Dict[int, Dict[int, int]]] = [{} for _ in self.sizes]
+        self.written: List[Dict[int, int]] = [{} for _ in self.sizes]
+        self.steps = 0
+        self.stale = True  # La cinta cambió sin pasar por on_step (reset, retroceso, bucle rápido)
+
+    def rebuild(self, tape: BaseTape):
+        """Recalcula los histogramas leyendo la cinta completa, en O(longitud)."""
+        self.counts = [{} for _ in self.sizes]
+        self.written = [{} for _ in self.sizes]
+        codes = tape.codes(tape.lo, tape.hi)
+        size = self.sizes[0]
+        first = tape.lo // size
+        base = self.counts[0]
+        for block in range(first, (tape.hi - 1) // size + 1):
+            start = max(block * size - tape.lo, 0)
+            histogram = Counter(codes[start:block * size + size - tape.lo])
+            histogram.pop(0, None)
+            if histogram:
+                base[block] = dict(histogram)
+        for level in range(1, self.LEVELS):
+            upper = self.counts[level]
+            for block, histogram in self.counts[level - 1].items():
+                parent = upper.setdefault(block // self.FANOUT, {})
+                for code, count in histogram.items():
+                    parent[code] = parent.get(code, 0) + count
+        self.stale = False
+
+    def on_step(self, mtu: MTU, action: Action, state: str, pos: int, code: int):
+        self.steps += 1
+        new = action.write
+        if new is None or new == code:
+            return
+        steps = self.steps
+        for size, counts, written in zip(self.sizes, self.counts, self.written):
+            block = pos // size
+            histogram = counts.get(block)
+            if histogram is None:
+                histogram = counts[block] = {}
+            if code:
+                left = histogram.get(code, 0) - 1
+                if left > 0:
+                    histogram[code] = left
+                else:
+                    histogram.pop(code, None)
+            if new:
+                histogram[new] = histogram.get(new, 0) + 1
+            written[block] = steps
+
+    def columns(self, tape: BaseTape, width: int) -> List[Column]:
+        """Una columna por píxel para toda la cinta creada [lo, hi)."""
+        lo, hi = tape.lo, tape.hi
+        span = (hi - lo) / width
+        if span <= 4:
+            # Cinta corta: se lee directamente, sigue siendo O(ancho)
+            codes = tape.codes(lo, hi)
+            written, recent = self.written[0], self.steps - self.recent_steps
+            columns = []
+            for x in range(width):
+                start = int(x * span)
+                cells = codes[start:max(int((x + 1) * span), start + 1)]
+                dominant = next((code for code in cells if code), 0)
+                columns.append((dominant or None, 1.0 if dominant else 0.0,
+                                written.get((lo + start) // self.BLOCK_SIZE, recent) > recent))
+            return columns
+        level = 0
+        while level < self.LEVELS - 1 and self.sizes[level] < span:
+            level += 1
+        size, counts, written = self.sizes[level], self.counts[level], self.written[level]
+        recent = self.steps - self.recent_steps
+        columns = []
+        for x in range(width):
+            block = int(lo + x * span) // size
+            histogram = counts.get(block)
+            if histogram:
+                dominant = max(histogram, key=histogram.get)
+                fill = min(sum(histogram.values()) / size, 1.0)
+            else:
+                dominant, fill = None, 0.0
+            columns.append((dominant, fill, written.get(block, recent) > recent))
+        return columns
@@ -1,301 +1,284 @@
-from typing import List, Tuple, Optional
+import time
+from typing import Iterable, List, Sequence, Set, Tuple, Type, Optional
 from instruction import Instruction
+from program import Program, parse_program
+from program_cache import ProgramCache
+from transition_table import TransitionTable
+from tape import Alphabet, BaseTape, Tape, blank_padding, read_tape_file
+from errors import MTUError, ProgramError, ExecutionError
+from result import HaltReason, RunResult
+from hooks import ExecutionHook
+from codegen import CompiledProgram
+from macro import MacroMachine
 from config import *
-import sys
+
+# Motores de ejecución: None es el intérprete; los demás se construyen con el programa
+# cargado y ejecutan MTU.run sobre la cinta densa cuando no hay hooks ni `stop_on`
+BACKENDS = {"interpreter": None, "compiled": CompiledProgram, "macro": MacroMachine}
+ENGINES = tuple(BACKENDS)
+
+def initial_symbols(user_input: Optional[str]) -> List[str]:
+    """Contenido inicial de la cinta para una entrada: la entrada rodeada de blancos."""
+    current_input_str = user_input if user_input is not None else ""
+    prefix, suffix = blank_padding(len(current_input_str), current_input_str[:1], current_input_str[-1:])
+    return [BLANK] * prefix + [symbol for symbol in current_input_str] + [BLANK] * suffix
 
 class MTU:
-    def __init__(self, user_input: str = None):
+    def __init__(self, user_input: str = None, tape_class: Type[BaseTape] = Tape, engine: str = "interpreter",
+                 engine_options: Optional[dict] = None):
         self.instructions : List[Instruction] = []
         self.initial_user_input: Optional[str] = user_input
+        # Si está, la cinta inicial se lee de este archivo (ver load_input_file) en lugar de la cadena
+        self.initial_input_file: Optional[str] = None
         self.program_loaded: bool = False
-        self.error_message: Optional[str] = None
+        self.error: Optional[MTUError] = None
         self.states: List[str] = ['00'] 
         self.pointer: int = 1
         self.current_state: str = '00'
-        self.accepting_states: List[str] = []
+        self.accepting_states: Set[str] = set()
+        self.program: Optional[Program] = None
         self.OPERATIONS = {
         ">": self.next,
         "<": self.prev,
         "!": self.nop
         }
-        self.job_tape: List[str] = [] 
+        self.alphabet: Alphabet = Alphabet()
+        # Tape (densa) o RunLengthTape (por tramos, para cintas enormes o casi vacías)
+        self.tape_class: Type[BaseTape] = tape_class
+        self.job_tape: BaseTape = tape_class(self.alphabet)
+        self.table: TransitionTable = TransitionTable([], self.alphabet)
+        # "interpreter" recorre la tabla; "compiled" traduce el programa a Python (codegen.py);
+        # "macro" memoriza transiciones sobre bloques de la cinta (macro.py)
+        if engine not in BACKENDS:
+            raise ValueError(f"Motor desconocido '{engine}' (opciones: {', '.join(ENGINES)})")
+        self.engine = engine
+        self.engine_options = engine_options or {}
+        self.backend = None
         self.reset() 
 
     def reset(self):
         # --- CAMBIO: Volvemos a la lógica de reseteo original y limpia ---
         # El crecimiento dinámico hace que los colchones sean innecesarios.
-        current_input_str = self.initial_user_input if self.initial_user_input is not None else ""
-        self.job_tape = [symbol for symbol in current_input_str]
-        
-        # Asegura que siempre haya un 'B' al principio
-        if not self.job_tape or self.job_tape[0] != 'B':
-            self.job_tape.insert(0, 'B')
-        
-        # Asegura que siempre haya un 'B' al final
-        if len(self.job_tape) == 1 or self.job_tape[-1] != 'B': 
-            self.job_tape.append('B')
-        
-        self.pointer = 1 
-        if not current_input_str and len(self.job_tape) < 3:
-            self.job_tape = ['B', 'B', 'B'] 
-            self.pointer = 1
+        if self.initial_input_file is not None:
+            self.job_tape = read_tape_file(self.tape_class, self.alphabet, self.initial_input_file)
+        else:
+            initial_tape = initial_symbols(self.initial_user_input)
+            self.job_tape = self.tape_class(self.alphabet, initial_tape)
+        self.pointer = 1
         self.current_state = '00'
 
-    def read_file(self, file_path: str):
-        self.instructions = []
-        self.accepting_states = []
-        self.states = ['00'] 
-        self.program_loaded = False
-        self.error_message = None
+    def load_input_file(self, path: str):
+        """Usa el contenido de `path` como entrada (un símbolo por byte) y resetea la máquina.
 
-        def preproc_str(instruction: str):
-            return instruction.replace(' ', '').replace('\n', '')
+        El archivo se lee con mmap directamente al búfer de la cinta, sin pasar por una cadena
+        ni por una lista de símbolos: alrededor de un byte por celda aunque pese varios MB.
+        """
+        self.initial_input_file = path
+        self.reset()
 
-        def preproc_accepting_states(instruction: str):
-            return [state for state in instruction[1:-1].split(',')]
+    def dump_tape(self, path: str, nonblank: bool = False) -> int:
+        """Escribe la cinta en `path` por trozos (solo el tramo no blanco si `nonblank`);
+        devuelve los bytes escritos."""
+        tape = self.job_tape
+        start, end = tape.nonblank_span() if nonblank else (tape.lo, tape.hi)
+        with open(path, 'wb') as file:
+            return tape.dump(file, start, end)
 
-        def is_while(instruction: str):
-            return instruction[0].lower() == "w"
-        
-        def raise_error(tokens: List[object], expected_length: int):
-            if len(tokens) != expected_length:
-                raise Exception(f"Instrucción, se espera {expected_length} tokens, se tienen {len(tokens)}")
+    def read_file(self, file_path: str, cache: Optional[ProgramCache] = None):
+        self.instructions = []
+        self.accepting_states = set()
+        self.states = ['00'] 
+        self.program_loaded = False
+        self.error = None
+        try:
+            program = cache.load(file_path) if cache is not None else parse_program(file_path)
+        except ProgramError as e:
+            self.error = e
+            raise
+        self.load_program(program)
+        print(f"Se han cargado {len(self.instructions)} instrucciones")
+        for warning in program.warnings:
+            print(f"Aviso: {warning}")
 
-        def tokenize(instruction: str) -> List[str]:
-            instruction = instruction[1:-1]
-            idx = 0
-            token = ''
-            tokens = []
-            def prep_set(idx: int, symbol: str) -> List[str]: 
-                cnt = 0
-                result_set = []
-                tok = ''
-                special_symbols = {"BRACE": {"open": '{', "closed": '}'}, "BRACKET": {"open": '[', "closed": ']'}}
-                while idx < len(instruction) and cnt >= 0:
-                    ch = instruction[idx]
-                    if ch == ',':
-                        result_set.append(tok)
-                        tok = ''
-                    elif ch == special_symbols[symbol]["open"]:
-                        cnt += 1
-                    elif ch == special_symbols[symbol]["closed"]:
-                        result_set.append(tok)
-                        cnt -= 1
-                        break
-                    else:
-                        tok += ch
-                    idx += 1
-                if cnt < 0:
-                    raise Exception("Sintaxis invalida")
-                
-                return result_set, idx
-          
-            while idx < len(instruction):
-                curr_ch = instruction[idx]
-                if curr_ch == ',':
-                    if len(token) > 0: 
-                        tokens.append(token)
-                    token = ''
-                elif curr_ch == '{':
-                    result_set, idx = prep_set(idx, "BRACE")
-                    tokens.append(result_set)
-                elif curr_ch == '[':
-                    result_set, idx = prep_set(idx, "BRACKET")
-                    tokens.append(result_set)
-                else:
-                    token += curr_ch
-                idx += 1
-            if len(token) > 0: 
-                tokens.append(token)
-            return tokens
-        
-        with open(file_path, 'r') as file:
-            raw_instructions = [preproc_str(raw_str) for raw_str in ''.join(file.readlines()).split('.') if raw_str.strip()]
-            try:
-                self.accepting_states = preproc_accepting_states(raw_instructions[0])
-            except Exception as e:
-                print(e)
-                print("Saliendo...")
-                sys.exit(1)
-            for i in range(1, len(raw_instructions)):
-                instruction = raw_instructions[i]
-                new_instruction = Instruction()
-                if is_while(instruction):
-                    tokens = tokenize(instruction[1:])
-                    raise_error(tokens, 5)
-                    new_instruction.is_while = True
-                else:
-                    tokens = tokenize(instruction)
-                    raise_error(tokens, 5)
-                new_instruction.p_state = tokens[P_STATE]
-                new_instruction.input_symbols =  tokens[INPUT_SYMBOL] if isinstance(tokens[INPUT_SYMBOL], list) else [tokens[INPUT_SYMBOL]]
-                if tokens[Q_STATE] == SAME:
-                    new_instruction.same_end_state = True
-                else:
-                    new_instruction.q_state = tokens[Q_STATE] if isinstance(tokens[Q_STATE], list) else [tokens[Q_STATE]]
-                if tokens[OUTPUT_SYMBOL] == SAME:
-                    new_instruction.same_output_symbol = True
-                else:
-                    new_instruction.output_symbols = tokens[OUTPUT_SYMBOL] if isinstance(tokens[OUTPUT_SYMBOL], list) else [tokens[OUTPUT_SYMBOL]]
-                    
-                new_instruction.op = tokens[OPERATION]
-                self.instructions.append(new_instruction)
-            self.reset()
-            self.program_loaded = True
-            print(f"Se han cargado {len(self.instructions)} instrucciones")
+    def load_program(self, program: Program):
+        program.compile()
+        self.program = program
+        self.instructions = program.instructions
+        self.accepting_states = set(program.accepting_states)
+        self.error = None
+        # La tabla se comparte; el alfabeto se copia porque reset interna los símbolos de la entrada
+        self.alphabet = program.alphabet.copy()
+        self.table = program.table
+        backend = BACKENDS[self.engine]
+        self.backend = backend(program, **self.engine_options) if backend is not None else None
+        self.reset()
+        self.program_loaded = True
 
-      
     def next(self):
         self.pointer += 1
-        if self.pointer >= len(self.job_tape):
-            self.job_tape.append('B')
+        if self.pointer >= self.job_tape.hi:
+            self.job_tape.grow_right()
         
     def prev(self):
-        # --- CAMBIO CLAVE: Lógica de crecimiento dinámico a la izquierda ---
-        if self.pointer == 0:
-            # Si estamos en el borde, creamos espacio a la izquierda
-            self.job_tape.insert(0, 'B')
-            # El puntero se queda en 0, ahora apuntando a la nueva celda 'B'
-        else:
-            # Si no estamos en el borde, simplemente nos movemos
-            self.pointer -= 1
+        # El puntero es una posición lógica: al pasar el borde izquierdo la cinta
+        # crece hacia la izquierda sin desplazar las celdas existentes.
+        if self.pointer == self.job_tape.lo:
+            self.job_tape.grow_left()
+        self.pointer -= 1
     
     def nop(self):
         pass
       
-    def p_and_s(self, instruction: Instruction) -> bool:
-        if not (0 <= self.pointer < len(self.job_tape)):
-            return False
-        curr_symbol = self.job_tape[self.pointer]
-        return self.current_state == instruction.p_state and curr_symbol in instruction.input_symbols
-
     def write(self, symbol: str):
-        if self.pointer < 0: # Esta guarda ahora es teóricamente innecesaria, pero no hace daño
-            return 
-        while self.pointer >= len(self.job_tape):
-            self.job_tape.append('B')
-        self.job_tape[self.pointer] = symbol
+        self.job_tape.write(self.pointer, symbol)
     
     def read(self) -> str:
-        if not (0 <= self.pointer < len(self.job_tape)):
-            return 'B' 
-        return self.job_tape[self.pointer]
-    
-    def run_case_1(self, instruction: Instruction): 
-        if not instruction.same_output_symbol:
-            self.write(instruction.output_symbols[0])
-        if not instruction.same_end_state:
-            self.current_state = instruction.q_state[0]
-    
-    def run_case_2(self, instruction: Instruction): 
-        self.run_case_1(instruction)
-
-    def run_case_3(self, instruction: Instruction): 
-        current_read = self.read()
-        try:
-            symbol_idx = instruction.input_symbols.index(current_read)
-        except ValueError:
-            raise Exception(f"Símbolo leído '{current_read}' no encontrado en input_symbols {instruction.input_symbols} para run_case_3.")
-
-        output_symbol = instruction.output_symbols[symbol_idx]
-        if output_symbol != SAME:
-            self.write(output_symbol)
-        if not instruction.same_end_state and instruction.q_state:
-             self.current_state = instruction.q_state[0]
-
-
-    def run_case_4(self, instruction: Instruction):
-        current_read = self.read()
-        try:
-            symbol_idx = instruction.input_symbols.index(current_read)
-        except ValueError:
-            raise Exception(f"Símbolo leído '{current_read}' no encontrado en input_symbols {instruction.input_symbols} para run_case_4.")
-            
-        output_state = instruction.q_state[symbol_idx]
-        if output_state != SAME:
-            self.current_state = output_state
-        if not instruction.same_output_symbol:
-            self.write(instruction.output_symbols[0])
+        return self.job_tape.read(self.pointer)
     
-    def run_case_5(self, instruction: Instruction):
-        current_read = self.read()
-        try:
-            symbol_idx = instruction.input_symbols.index(current_read)
-        except ValueError:
-            raise Exception(f"Símbolo leído '{current_read}' no encontrado en input_symbols {instruction.input_symbols} para run_case_5.")
+    @property
+    def error_message(self) -> Optional[str]:
+        return str(self.error) if self.error else None
 
-        output_state = instruction.q_state[symbol_idx]
-        output_symbol = instruction.output_symbols[symbol_idx]
-        if output_state != SAME:
-            self.current_state = output_state
-        if output_symbol != SAME:
-            self.write(output_symbol)
-        
-    def do_q_z(self, instruction: Instruction):
-        q_len_actual = 0 if instruction.same_end_state else len(instruction.q_state)
-        s_len_actual = len(instruction.input_symbols) 
-        z_len_actual = 0 if instruction.same_output_symbol else len(instruction.output_symbols)
-        if q_len_actual <= 1 and z_len_actual <= 1:
-            self.run_case_1(instruction) 
-        elif q_len_actual <= 1 and z_len_actual > 1 and z_len_actual == s_len_actual:
-            self.run_case_3(instruction)
-        elif q_len_actual > 1 and z_len_actual <= 1 and q_len_actual == s_len_actual:
-            self.run_case_4(instruction)
-        elif q_len_actual > 1 and z_len_actual > 1 and q_len_actual == s_len_actual and z_len_actual == s_len_actual:
-            self.run_case_5(instruction)
-        else:
-            raise Exception(f"Instrucción mal formada o no coincide con ningún caso en do_q_z (q:{q_len_actual}, s:{s_len_actual}, z:{z_len_actual})")
+    def run(self, max_steps: Optional[int] = None, max_seconds: Optional[float] = None,
+            stop_on: Optional[Iterable[str]] = None,
+            hooks: Optional[Sequence[ExecutionHook]] = None) -> RunResult:
+        """Ejecuta transiciones hasta detenerse o agotar el presupuesto de pasos o de tiempo.
 
-        self.OPERATIONS[instruction.op]()
-            
-    def run_instruction(self, instruction: Instruction): 
-        if instruction.is_while:
-            while self.p_and_s(instruction): 
-                self.do_q_z(instruction)
-                if self.current_state in self.accepting_states:
-                    break
-        else:
-            self.do_q_z(instruction) 
-            
-    def step(self) -> Tuple[str, Optional[Instruction]]:
+        Las comprobaciones de programa cargado y de errores se hacen una sola vez; el reloj
+        se consulta cada CHECK_INTERVAL pasos. Los recorridos (acciones con máscara `scan`)
+        se ejecutan en bloque y cuentan sus pasos exactos. `stop_on` son estados en los que
+        la ejecución se pausa (HaltReason.BREAKPOINT) al entrar en ellos. Con `hooks` se usa
+        el bucle instrumentado (ver hooks.ExecutionHook); con otro motor (ver BACKENDS), sin
+        hooks ni `stop_on` y con cinta densa, el del motor.
+        """
+        start = time.perf_counter()
         if not self.program_loaded:
-            self.error_message = "Ningún programa MTU cargado."
-            return "error", None
-        if self.error_message and "Error ejecutando" in self.error_message: 
-            self.error_message = None
-        elif self.error_message: 
-            return "error", None 
-
+            self.error = ProgramError("Ningún programa MTU cargado.")
+            return RunResult(HaltReason.ERROR, error=self.error)
+        if isinstance(self.error, ExecutionError):
+            self.error = None
+        elif self.error:
+            return RunResult(HaltReason.ERROR, error=self.error)
         if self.current_state in self.accepting_states:
-            return "accepted", None
+            return RunResult(HaltReason.ACCEPTED)
 
-        if not (0 <= self.pointer < len(self.job_tape)):
-            self.error_message = f"Puntero ({self.pointer}) fuera de los límites de la cinta ({len(self.job_tape)})."
-            return "error", None
+        halting = self.accepting_states if not stop_on else self.accepting_states | set(stop_on)
+        deadline = None if max_seconds is None else start + max_seconds
+        if hooks:
+            return self._run_traced(hooks, max_steps, deadline, halting, start)
+        if self.backend is not None and not stop_on and isinstance(self.job_tape, Tape):
+            return self.backend.run(self, max_steps, deadline, start)
+        rows = self.table.rows
+        tape = self.job_tape
+        read, write, fill, scan = tape.read_code, tape.write_code, tape.fill, tape.scan
+        pos = self.pointer
+        state = self.current_state
+        row = rows.get(state)
+        steps = 0
+        reason = None
+        action = None
+        while reason is None:
+            chunk_end = steps + CHECK_INTERVAL
+            if max_steps is not None and max_steps < chunk_end:
+                chunk_end = max_steps
+            while steps < chunk_end:
+                action = row[read(pos)] if row is not None else None
+                if action is None:
+                    reason = HaltReason.NO_MATCH
+                    break
+                if action.error:
+                    self.error = ExecutionError(f"Error ejecutando instrucción {action.instruction}: {action.error}")
+                    reason = HaltReason.ERROR
+                    break
+                move = action.move
+                # Solo vale la pena el recorrido en bloque si la celda siguiente también entra
+                if action.scan is not None and action.scan[read(pos + move)]:
+                    count = scan(pos, move, action.scan, chunk_end - steps)
+                    if action.write is not None:
+                        if move > 0:
+                            fill(pos, pos + count, action.write)
+                        else:
+                            fill(pos - count + 1, pos + 1, action.write)
+                    pos += count * move
+                    steps += count
+                else:
+                    if action.write is not None:
+                        write(pos, action.write)
+                    if action.next_state is not None:
+                        state = action.next_state
+                        row = rows.get(state)
+                    pos += move
+                    steps += 1
+                    if state in halting:
+                        reason = HaltReason.ACCEPTED if state in self.accepting_states else HaltReason.BREAKPOINT
+                # La cinta siempre incluye la celda bajo la cabeza, igual que next/prev
+                if pos >= tape.hi or pos < tape.lo:
+                    tape.ensure(pos)
+                if reason is not None:
+                    break
+            if reason is None:
+                if max_steps is not None and steps >= max_steps:
+                    reason = HaltReason.MAX_STEPS
+                elif deadline is not None and time.perf_counter() >= deadline:
+                    reason = HaltReason.TIMEOUT
+        self.pointer = pos
+        self.current_state = state
+        instruction = action.instruction if action is not None else None
+        return RunResult(reason, steps, time.perf_counter() - start, instruction, self.error)
 
-        matched_instruction_obj = None
-        for instruction in self.instructions:
-            if self.p_and_s(instruction): 
-                matched_instruction_obj = instruction
+    def _run_traced(self, hooks: Sequence[ExecutionHook], max_steps: Optional[int],
+                    deadline: Optional[float], halting: Set[str], start: float) -> RunResult:
+        """Igual que `run`, pero paso a paso y avisando a cada hook; mismos pasos y resultado."""
+        rows = self.table.rows
+        tape = self.job_tape
+        steps = 0
+        reason = None
+        action = None
+        for hook in hooks:
+            hook.on_start(self)
+        while reason is None:
+            if max_steps is not None and steps >= max_steps:
+                reason = HaltReason.MAX_STEPS
                 break
-        
-        if matched_instruction_obj:
-            try:
-                if matched_instruction_obj.is_while:
-                    if self.p_and_s(matched_instruction_obj):
-                        self.do_q_z(matched_instruction_obj)
-                        if self.current_state in self.accepting_states:
-                            return "accepted", matched_instruction_obj
-                        return "stepped", matched_instruction_obj
-                    else:
-                        return "stepped_while_skip", matched_instruction_obj 
-                else: 
-                    self.do_q_z(matched_instruction_obj)
-                    if self.current_state in self.accepting_states:
-                        return "accepted", matched_instruction_obj
-                    return "stepped", matched_instruction_obj
-            except Exception as e_step_exec:
-                self.error_message = f"Error ejecutando instrucción {matched_instruction_obj}: {e_step_exec}"
-                return "error", matched_instruction_obj
-        else:
-            return "no_match", None
\ No newline at end of file
+            if deadline is not None and steps % CHECK_INTERVAL == 0 and steps and time.perf_counter() >= deadline:
+                reason = HaltReason.TIMEOUT
+                break
+            pos, state = self.pointer, self.current_state
+            code = tape.read_code(pos)
+            row = rows.get(state)
+            action = row[code] if row is not None else None
+            if action is None:
+                reason = HaltReason.NO_MATCH
+                break
+            if action.error:
+                self.error = ExecutionError(f"Error ejecutando instrucción {action.instruction}: {action.error}")
+                reason = HaltReason.ERROR
+                break
+            stop = None
+            for hook in hooks:
+                stop = hook.on_step(self, action, state, pos, code) or stop
+            if action.write is not None:
+                tape.write_code(pos, action.write)
+            if action.next_state is not None:
+                self.current_state = action.next_state
+            self.pointer = pos = pos + action.move
+            steps += 1
+            if pos >= tape.hi or pos < tape.lo:
+                tape.ensure(pos)
+                for hook in hooks:
+                    hook.on_grow(self, pos)
+            if self.current_state in halting:
+                reason = HaltReason.ACCEPTED if self.current_state in self.accepting_states else HaltReason.BREAKPOINT
+            elif stop is not None:
+                reason = stop
+        instruction = action.instruction if action is not None else None
+        result = RunResult(reason, steps, time.perf_counter() - start, instruction, self.error)
+        for hook in hooks:
+            hook.on_stop(self, result)
+        return result
+
+    def step(self) -> Tuple[str, Optional[Instruction]]:
+        result = self.run(max_steps=1)
+        if result.reason in (HaltReason.MAX_STEPS, HaltReason.BREAKPOINT):
+            return "stepped", result.instruction
+        return result.reason.value, result.instruction
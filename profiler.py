@@ -0,0 +1,124 @@
+"""Perfil de ejecución por instrucción.
+
+Uso:
+    python profiler.py programa.txt entrada [--top 20] [--json perfil.json] [--max-steps N]
+
+Cuenta cuántas veces se ejecuta cada instrucción y cada par (estado, símbolo), las
+iteraciones de los ciclos `W(...)`, la distancia recorrida por la cabeza y las veces que
+crece la cinta. Se engancha con `MTU.run(hooks=[profile])`, así que el bucle rápido no
+cambia cuando no se perfila.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional, Tuple
+from hooks import ExecutionHook
+from instruction import Instruction
+from mtu import MTU
+from result import RunResult
+from transition_table import Action
+
+class Profile(ExecutionHook):
+    """Contadores acumulados a lo largo de una o varias llamadas a `MTU.run`."""
+    def __init__(self):
+        self.steps = 0
+        self.instruction_counts: Dict[Instruction, int] = {}
+        self.pair_counts: Dict[Tuple[str, str], int] = {}
+        # Pasos de un W(...) que lo dejan en el mismo estado, es decir, otra vuelta del ciclo
+        self.while_iterations: Dict[Instruction, int] = {}
+        self.head_distance = 0
+        self.grow_left = 0
+        self.grow_right = 0
+        self.order: Dict[Instruction, int] = {}
+
+    def on_start(self, mtu: MTU):
+        if len(self.order) != len(mtu.instructions):
+            self.order = {instruction: i for i, instruction in enumerate(mtu.instructions)}
+
+    def on_step(self, mtu: MTU, action: Action, state: str, pos: int, code: int):
+        instruction = action.instruction
+        self.steps += 1
+        self.instruction_counts[instruction] = self.instruction_counts.get(instruction, 0) + 1
+        pair = (state, mtu.alphabet.symbols[code])
+        self.pair_counts[pair] = self.pair_counts.get(pair, 0) + 1
+        if action.is_while and (action.next_state is None or action.next_state == state):
+            self.while_iterations[instruction] = self.while_iterations.get(instruction, 0) + 1
+        if action.move:
+            self.head_distance += 1
+
+    def on_grow(self, mtu: MTU, pos: int):
+        if pos == mtu.job_tape.lo:
+            self.grow_left += 1
+        else:
+            self.grow_right += 1
+
+    def clear(self):
+        self.__init__()
+
+    def hottest(self, limit: Optional[int] = None) -> List[Tuple[Instruction, int]]:
+        ranked = sorted(self.instruction_counts.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit] if limit is not None else ranked
+
+    def hottest_pairs(self, limit: Optional[int] = None) -> List[Tuple[Tuple[str, str], int]]:
+        ranked = sorted(self.pair_counts.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit] if limit is not None else ranked
+
+    def table(self, limit: Optional[int] = 20) -> str:
+        lines = [f"{'#':>4} {'pasos':>12} {'%':>6} {'ciclos W':>10}  instrucción"]
+        for instruction, count in self.hottest(limit):
+            share = 100.0 * count / self.steps if self.steps else 0.0
+            index = self.order.get(instruction, -1)
+            lines.append(f"{index:>4} {count:>12} {share:>5.1f}% {self.while_iterations.get(instruction, 0):>10}  {instruction}")
+        lines.append("")
+        lines.append(f"{'estado':>8} {'símbolo':>8} {'pasos':>12}")
+        for (state, symbol), count in self.hottest_pairs(limit):
+            lines.append(f"{state:>8} {symbol:>8} {count:>12}")
+        lines.append("")
+        lines.append(f"Pasos: {self.steps}  distancia de la cabeza: {self.head_distance}  "
+                     f"crecimientos de la cinta: {self.grow_left} izq., {self.grow_right} der.")
+        return "\n".join(lines)
+
+    def to_json(self) -> dict:
+        return {
+            "steps": self.steps,
+            "head_distance": self.head_distance,
+            "grow_left": self.grow_left,
+            "grow_right": self.grow_right,
+            "instructions": [
+                {"index": self.order.get(instruction, -1), "instruction": str(instruction), "count": count,
+                 "while_iterations": self.while_iterations.get(instruction, 0)}
+                for instruction, count in self.hottest()
+            ],
+            "pairs": [{"state": state, "symbol": symbol, "count": count}
+                      for (state, symbol), count in self.hottest_pairs()],
+        }
+
+def profile_run(mtu: MTU, max_steps: Optional[int] = None,
+                max_seconds: Optional[float] = None) -> Tuple[RunResult, Profile]:
+    profile = Profile()
+    result = mtu.run(max_steps=max_steps, max_seconds=max_seconds, hooks=[profile])
+    return result, profile
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perfila la ejecución de un programa MTU sobre una entrada.")
+    parser.add_argument("program", help="Archivo del programa MTU")
+    parser.add_argument("input", help="Cadena de entrada")
+    parser.add_argument("--top", type=int, default=20, help="Filas a mostrar de cada tabla")
+    parser.add_argument("--json", help="Guarda el perfil completo como JSON")
+    parser.add_argument("--max-steps", type=int, default=None, help="Límite de pasos")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Límite de tiempo, en segundos")
+    args = parser.parse_args(argv)
+
+    mtu = MTU(args.input)
+    mtu.read_file(args.program)
+    result, profile = profile_run(mtu, args.max_steps, args.max_seconds)
+    print(f"Resultado: {result.reason.value} en estado {mtu.current_state}, {result.steps} pasos, {result.elapsed:.3f} s")
+    if result.error:
+        print(f"Error: {result.error}", file=sys.stderr)
+    print(profile.table(args.top))
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(profile.to_json(), file, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+import io
+from typing import List, Optional, TextIO, Tuple
+from instruction import Instruction
+from analysis import analyze
+from transition_table import MOVES, TransitionTable
+from tape import Alphabet
+from errors import ParseError
+from config import SAME
+
+class Program:
+    """Programa ya analizado: estados de aceptación e instrucciones en orden de archivo.
+
+    `compile` analiza el programa una sola vez (ver analysis.py: descarta las instrucciones
+    que nunca se ejecutan y deja los avisos en `warnings`) y construye su alfabeto y su tabla
+    de transiciones; todo viaja con el objeto al serializarlo (caché, procesos de trabajo).
+    """
+    def __init__(self, accepting_states: List[str], instructions: List[Instruction]):
+        self.accepting_states = accepting_states
+        self.instructions = instructions
+        self.alphabet: Optional[Alphabet] = None
+        self.table: Optional[TransitionTable] = None
+        self.warnings: List[str] = []
+
+    def compile(self):
+        if self.table is None:
+            self.warnings = analyze(self)
+            self.alphabet = Alphabet()
+            self.table = TransitionTable(self.instructions, self.alphabet)
+
+READ_CHUNK = 1 << 16
+SET_DELIMITERS = {'{': '}', '[': ']'}
+
+class Statement:
+    """Una sentencia del programa: texto sin espacios más lo necesario para ubicar errores.
+
+    La línea y columna de un carácter se calculan solo cuando hay que reportar un error,
+    recorriendo el texto original desde el inicio de la sentencia.
+    """
+    def __init__(self, raw: str, line: int, column: int):
+        self.raw = raw
+        self.text = ''.join(raw.split())
+        self.line = line
+        self.column = column
+
+    def position(self, idx: int) -> Tuple[int, int]:
+        line, column = self.line, self.column
+        seen = -1
+        for ch in self.raw:
+            if not ch.isspace():
+                seen += 1
+                if seen == min(idx, len(self.text) - 1):
+                    break
+            if ch == '\n':
+                line += 1
+                column = 1
+            else:
+                column += 1
+        return line, column
+
+class ProgramParser:
+    """Analizador de una sola pasada para archivos de programa MTU.
+
+    El texto se lee por trozos y cada sentencia (terminada en '.') se analiza en cuanto se
+    completa, sin espacios. La primera sentencia es la lista de estados de aceptación
+    `[q1,q2,...]`; las demás son instrucciones `(p, q, s, z, op)` o `W(p, q, s, z, op)`.
+    Los errores se reportan como ParseError con línea y columna.
+    """
+    def __init__(self, source: str = None):
+        self.source = source
+        self.accepting_states: Optional[List[str]] = None
+        self.instructions: List[Instruction] = []
+
+    def error(self, message: str, statement: Statement, idx: int) -> ParseError:
+        line, column = statement.position(idx)
+        return ParseError(message, line, column, self.source)
+
+    def parse(self, stream: TextIO) -> Program:
+        pending = ''
+        line, column = 1, 1
+        for chunk in iter(lambda: stream.read(READ_CHUNK), ''):
+            pieces = (pending + chunk).split('.')
+            pending = pieces.pop()
+            for raw in pieces:
+                self.statement(Statement(raw, line, column))
+                newlines = raw.count('\n')
+                if newlines:
+                    line += newlines
+                    column = len(raw) - raw.rfind('\n') + 1
+                else:
+                    column += len(raw) + 1
+        self.statement(Statement(pending, line, column))
+        if self.accepting_states is None:
+            raise ParseError("El programa está vacío: falta la lista de estados de aceptación", line, column, self.source)
+        return Program(self.accepting_states, self.instructions)
+
+    def statement(self, statement: Statement):
+        text = statement.text
+        if not text:
+            return
+        if self.accepting_states is None:
+            if text[0] != '[' or text[-1] != ']' or len(text) < 2:
+                raise self.error("Se esperaba la lista de estados de aceptación [q1,q2,...]", statement, 0)
+            self.accepting_states = text[1:-1].split(',')
+        else:
+            self.instructions.append(self.instruction(statement))
+
+    def instruction(self, statement: Statement) -> Instruction:
+        text = statement.text
+        new_instruction = Instruction()
+        start = 0
+        if text[0] in 'wW':
+            new_instruction.is_while = True
+            start = 1
+        if start >= len(text) or text[start] != '(':
+            raise self.error("Se esperaba '(' al inicio de la instrucción", statement, start)
+        end = len(text) - 1
+        if end <= start or text[end] != ')':
+            raise self.error("Se esperaba ')' al final de la instrucción", statement, end)
+        fields = self.fields(statement, start + 1, end)
+        if len(fields) != 5:
+            raise self.error(f"La instrucción debe tener 5 campos, tiene {len(fields)}", statement, 0)
+
+        (p_state, p_idx), (q_state, q_idx), (input_symbols, _), (output_symbols, z_idx), (op, op_idx) = fields
+        if isinstance(p_state, list):
+            raise self.error("El estado de partida debe ser un solo estado", statement, p_idx)
+        if op not in MOVES:
+            raise self.error(f"Operación desconocida '{op}', se esperaba '>', '<' o '!'", statement, op_idx)
+        new_instruction.p_state = p_state
+        new_instruction.input_symbols = input_symbols if isinstance(input_symbols, list) else [input_symbols]
+        if q_state == SAME:
+            new_instruction.same_end_state = True
+        else:
+            new_instruction.q_state = q_state if isinstance(q_state, list) else [q_state]
+        if output_symbols == SAME:
+            new_instruction.same_output_symbol = True
+        else:
+            new_instruction.output_symbols = output_symbols if isinstance(output_symbols, list) else [output_symbols]
+        new_instruction.op = op
+        error = new_instruction.resolve()
+        if error is not None:
+            # Se señala el campo cuyo largo no coincide con el de los símbolos leídos
+            q_len = len(new_instruction.q_state)
+            mismatch = q_idx if q_len > 1 and q_len != len(new_instruction.input_symbols) else z_idx
+            raise self.error(error, statement, mismatch)
+        return new_instruction
+
+    def fields(self, statement: Statement, idx: int, end: int) -> List[tuple]:
+        """Campos separados por comas en text[idx:end]: cadenas o conjuntos {..} / [..].
+
+        Devuelve pares (valor, índice donde empieza el campo).
+        """
+        text = statement.text
+        fields = []
+        while idx < end:
+            field_start = idx
+            closing = SET_DELIMITERS.get(text[idx])
+            if closing is not None:
+                close = text.find(closing, idx + 1, end)
+                if close == -1:
+                    raise self.error(f"Conjunto sin cerrar, falta '{closing}'", statement, field_start)
+                body = text[idx + 1:close]
+                for opening in SET_DELIMITERS:
+                    if opening in body:
+                        raise self.error("No se permiten conjuntos anidados", statement, idx + 1 + body.index(opening))
+                fields.append((body.split(','), field_start))
+                idx = close + 1
+                if idx < end and text[idx] != ',':
+                    raise self.error("Se esperaba ',' después del conjunto", statement, idx)
+            else:
+                comma = text.find(',', idx, end)
+                idx = end if comma == -1 else comma
+                if idx == field_start:
+                    raise self.error("Campo vacío", statement, idx)
+                fields.append((text[field_start:idx], field_start))
+            if idx < end:
+                idx += 1
+                if idx == end:
+                    raise self.error("Campo vacío al final de la instrucción", statement, idx)
+        return fields
+
+def parse_source(source: str, name: str = None) -> Program:
+    return ProgramParser(name).parse(io.StringIO(source))
+
+def parse_program(file_path: str) -> Program:
+    with open(file_path, 'r') as file:
+        return ProgramParser(file_path).parse(file)
@@ -0,0 +1,99 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from program import Program, parse_source
+from config import INTERPRETER_VERSION
+
+def default_cache_dir() -> str:
+    return os.environ.get("MTU_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "mtu")
+
+def source_key(source: bytes) -> str:
+    """Clave de caché: hash del texto del programa y de la versión del intérprete."""
+    digest = hashlib.sha256(INTERPRETER_VERSION.encode())
+    digest.update(b"\0")
+    digest.update(source)
+    return digest.hexdigest()
+
+class ProgramCache:
+    """Caché de programas ya analizados y compilados.
+
+    Delante hay un LRU en memoria; detrás, un archivo pickle por programa en `cache_dir`
+    (None: solo memoria). La clave es el hash del contenido, así que un archivo modificado
+    nunca reutiliza una entrada vieja. Para no releer un archivo que no cambió, se recuerda
+    su (mtime, tamaño): una carga repetida cuesta un `stat`.
+    """
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = 32):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, Program]" = OrderedDict()
+        self._files: Dict[str, Tuple[int, int, str]] = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def load(self, file_path: str) -> Program:
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        known = self._files.get(path)
+        if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size):
+            program = self._memory.get(known[2])
+            if program is not None:
+                self._memory.move_to_end(known[2])
+                self.hits += 1
+                return program
+
+        with open(path, 'rb') as file:
+            source = file.read()
+        key = source_key(source)
+        self._files[path] = (stat.st_mtime_ns, stat.st_size, key)
+        program = self._memory.get(key)
+        if program is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return program
+
+        program = self._load_disk(key)
+        if program is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            program = parse_source(source.decode(), path)
+            program.compile()
+            self._store_disk(key, program)
+        self._remember(key, program)
+        return program
+
+    def _remember(self, key: str, program: Program):
+        self._memory[key] = program
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".pickle")
+
+    def _load_disk(self, key: str) -> Optional[Program]:
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._disk_path(key), 'rb') as file:
+                return pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Entrada ausente, corrupta o de una versión incompatible: se vuelve a compilar
+            return None
+
+    def _store_disk(self, key: str, program: Program):
+        if self.cache_dir is None:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Escritura atómica: varios procesos pueden compilar el mismo programa a la vez
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as file:
+                pickle.dump(program, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError:
+            pass
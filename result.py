@@ -0,0 +1,32 @@
+from enum import Enum
+from typing import Optional
+from instruction import Instruction
+from errors import MTUError
+
+class HaltReason(Enum):
+    ACCEPTED = "accepted"       # Se llegó a un estado de aceptación
+    NO_MATCH = "no_match"       # Ninguna instrucción cubre (estado, símbolo)
+    ERROR = "error"             # Ver RunResult.error
+    MAX_STEPS = "max_steps"     # Se agotó el presupuesto de pasos
+    TIMEOUT = "timeout"         # Se agotó el presupuesto de tiempo
+    BREAKPOINT = "breakpoint"   # Se entró en uno de los estados de `stop_on`
+    LOOPING = "looping"         # Se repitió una configuración completa: nunca va a detenerse
+
+class RunResult:
+    """Resultado de `MTU.run`."""
+    __slots__ = ("reason", "steps", "elapsed", "instruction", "error")
+
+    def __init__(self, reason: HaltReason, steps: int = 0, elapsed: float = 0.0,
+                 instruction: Optional[Instruction] = None, error: Optional[MTUError] = None):
+        self.reason = reason
+        self.steps = steps
+        self.elapsed = elapsed
+        self.instruction = instruction  # Última instrucción ejecutada (o la que falló)
+        self.error = error
+
+    @property
+    def halted(self) -> bool:
+        return self.reason in (HaltReason.ACCEPTED, HaltReason.NO_MATCH, HaltReason.ERROR, HaltReason.LOOPING)
+
+    def __repr__(self):
+        return f"RunResult({self.reason.value}, steps={self.steps}, elapsed={self.elapsed:.6f})"
@@ -0,0 +1,192 @@
+"""Caché de resultados de ejecución por (programa, entrada, límite de pasos).
+
+Una corrida que empieza en `MTU.reset` es determinista: con el mismo programa, la misma
+entrada y el mismo límite de pasos termina siempre igual. `ResultCache.run` la reemplaza
+por una búsqueda: delante hay un LRU en memoria y detrás, opcionalmente, una base SQLite
+que comparten varios procesos. Se guardan el estado final, el motivo de detención, los
+pasos, la cabeza y la cinta final como códigos crudos junto con los símbolos que
+representan, así que sirve para cualquier alfabeto (símbolos de varios caracteres incluidos).
+"""
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from errors import ExecutionError
+from mtu import MTU
+from program import Program
+from result import HaltReason, RunResult
+from config import INTERPRETER_VERSION, MAX_SYMBOLS
+
+RESULT_VERSION = "2"  # Cambiarlo (o INTERPRETER_VERSION) invalida los resultados guardados
+# Corridas que se guardan: las demás dependen del reloj o de hooks
+CACHEABLE = (HaltReason.ACCEPTED, HaltReason.NO_MATCH, HaltReason.ERROR, HaltReason.MAX_STEPS)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    steps INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    pointer INTEGER NOT NULL,
+    lo INTEGER NOT NULL,
+    tape BLOB NOT NULL,
+    symbols TEXT NOT NULL,
+    instruction INTEGER,
+    error TEXT
+)
+"""
+COLUMNS = ["key", "version", "reason", "steps", "state", "pointer", "lo", "tape", "symbols", "instruction", "error"]
+
+def program_digest(program: Program) -> str:
+    """Hash del contenido del programa: estados de aceptación e instrucciones en orden."""
+    digest = hashlib.sha256()
+    digest.update(repr(sorted(program.accepting_states)).encode())
+    for instruction in program.instructions:
+        digest.update(b"\n")
+        digest.update(str(instruction).encode())
+    return digest.hexdigest()
+
+class CachedResult:
+    """Lo que queda en la MTU después de `reset` + `run`: `tape` son los códigos de las
+    celdas [lo, hi), `symbols` el símbolo de cada código y `instruction` el índice de la
+    última instrucción en `mtu.instructions`."""
+    __slots__ = ("reason", "steps", "state", "pointer", "lo", "tape", "symbols", "instruction", "error")
+
+    def __init__(self, reason: HaltReason, steps: int, state: str, pointer: int, lo: int, tape: bytes,
+                 symbols: List[str], instruction: Optional[int], error: Optional[str]):
+        self.reason = reason
+        self.steps = steps
+        self.state = state
+        self.pointer = pointer
+        self.lo = lo
+        self.tape = tape
+        self.symbols = symbols
+        self.instruction = instruction
+        self.error = error
+
+    def apply(self, mtu: MTU, elapsed: float = 0.0) -> RunResult:
+        """Deja `mtu` (recién reseteada con la misma entrada) como al terminar la corrida."""
+        # Los códigos guardados se traducen a los del alfabeto actual de la MTU
+        table = bytearray(MAX_SYMBOLS)
+        for code, symbol in enumerate(self.symbols):
+            table[code] = mtu.alphabet.code(symbol)
+        codes = self.tape.translate(table)
+        mtu.job_tape = mtu.tape_class.from_codes(mtu.alphabet, codes, self.lo)
+        mtu.current_state = self.state
+        mtu.pointer = self.pointer
+        mtu.error = ExecutionError(self.error) if self.error else None
+        instruction = mtu.instructions[self.instruction] if self.instruction is not None else None
+        return RunResult(self.reason, self.steps, elapsed, instruction, mtu.error)
+
+class ResultCache:
+    """Resultados memorizados, con un LRU de `max_entries` delante de la base `path`
+    (None: solo memoria).
+
+    La clave combina el hash del programa, la entrada, el límite de pasos y las versiones
+    del intérprete y del formato, así que un programa modificado nunca reutiliza un
+    resultado viejo; al abrir la base se borran las filas de otras versiones. `hits`,
+    `disk_hits` y `misses` cuentan las búsquedas, como en ProgramCache.
+    """
+    def __init__(self, path: Optional[str] = None, max_entries: int = 4096):
+        self.path = path
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, CachedResult]" = OrderedDict()
+        self._digests: Dict[int, Tuple[Program, str]] = {}
+        self.version = f"{INTERPRETER_VERSION}.{RESULT_VERSION}"
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            # WAL: varios procesos leen y escriben la misma base sin bloquearse al leer
+            self.db = sqlite3.connect(path, timeout=30)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            with self.db:
+                columns = [row[1] for row in self.db.execute("PRAGMA table_info(results)")]
+                if columns and columns != COLUMNS:
+                    # Base de un formato anterior: se descarta entera
+                    self.db.execute("DROP TABLE results")
+                self.db.execute(SCHEMA)
+                self.db.execute("DELETE FROM results WHERE version != ?", (self.version,))
+
+    def key(self, program: Program, user_input: str, max_steps: Optional[int]) -> str:
+        known = self._digests.get(id(program))
+        if known is None or known[0] is not program:
+            known = self._digests[id(program)] = (program, program_digest(program))
+        digest = hashlib.sha256(self.version.encode())
+        for part in (known[1], str(max_steps), user_input):
+            digest.update(b"\0")
+            digest.update(part.encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return entry
+        if self.db is not None:
+            row = self.db.execute("SELECT reason, steps, state, pointer, lo, tape, symbols, instruction, error "
+                                  "FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                reason, steps, state, pointer, lo, tape, symbols, instruction, error = row
+                entry = CachedResult(HaltReason(reason), steps, state, pointer, lo, bytes(tape),
+                                     json.loads(symbols), instruction, error)
+                self.disk_hits += 1
+                self._remember(key, entry)
+                return entry
+        self.misses += 1
+        return None
+
+    def put(self, key: str, entry: CachedResult):
+        self._remember(key, entry)
+        if self.db is not None:
+            with self.db:
+                self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                (key, self.version, entry.reason.value, entry.steps, entry.state, entry.pointer,
+                                 entry.lo, entry.tape, json.dumps(entry.symbols), entry.instruction, entry.error))
+
+    def _remember(self, key: str, entry: CachedResult):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def run(self, mtu: MTU, max_steps: Optional[int] = None, max_seconds: Optional[float] = None) -> RunResult:
+        """`mtu.reset()` seguido de `mtu.run(max_steps, max_seconds)`, o el resultado guardado.
+
+        Las corridas cortadas por `max_seconds` no se guardan. Sin programa cargado o con la
+        entrada en un archivo (`load_input_file`) se ejecuta sin pasar por la caché.
+        """
+        start = time.perf_counter()
+        mtu.reset()
+        mtu.error = None
+        if mtu.program is None or mtu.initial_input_file is not None:
+            return mtu.run(max_steps=max_steps, max_seconds=max_seconds)
+        key = self.key(mtu.program, mtu.initial_user_input or "", max_steps)
+        entry = self.get(key)
+        if entry is not None:
+            return entry.apply(mtu, time.perf_counter() - start)
+        result = mtu.run(max_steps=max_steps, max_seconds=max_seconds)
+        if result.reason in CACHEABLE:
+            tape = mtu.job_tape
+            instruction = mtu.instructions.index(result.instruction) if result.instruction is not None else None
+            self.put(key, CachedResult(result.reason, result.steps, mtu.current_state, mtu.pointer, tape.lo,
+                                       tape.codes(tape.lo, tape.hi), list(tape.alphabet.symbols), instruction,
+                                       str(result.error) if result.error else None))
+        return result
+
+    def stats(self) -> str:
+        lookups = self.hits + self.disk_hits + self.misses
+        rate = (self.hits + self.disk_hits) / lookups if lookups else 0.0
+        return (f"caché de resultados: {len(self._memory)} en memoria, {self.hits} aciertos en memoria, "
+                f"{self.disk_hits} en disco, {self.misses} fallos ({rate:.1%} de aciertos)")
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
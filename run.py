@@ -0,0 +1,61 @@
+"""Ejecución sin interfaz gráfica de un programa MTU sobre una sola entrada, posiblemente enorme.
+
+Uso:
+    python run.py programa.txt (--input CADENA | --input-file entrada.txt) [-o cinta.txt] [--nonblank]
+                  [--max-steps N] [--max-seconds S] [--tape dense|rle] [--engine interpreter|compiled|macro]
+                  [--trace traza.mtr [--trace-interval N]]
+
+Con `--input-file` la cinta inicial se lee del archivo con mmap (un símbolo por byte) y con
+`-o` la cinta final se escribe por trozos, así que una entrada de varios MB cuesta cerca de
+un byte por celda de punta a punta. Con `--trace` se graba cada paso (ver tracefile.py),
+lo que obliga al bucle paso a paso. El resultado se informa en la salida de errores.
+"""
+import argparse
+import sys
+from mtu import ENGINES, MTU
+from program import parse_program
+from tape import TAPE_BACKENDS
+from tracefile import TraceWriter
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ejecuta un programa MTU sobre una entrada sin interfaz gráfica.")
+    parser.add_argument("program", help="Archivo del programa MTU")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="Cadena de entrada")
+    source.add_argument("--input-file", help="Archivo cuyo contenido es la entrada (un símbolo por byte)")
+    parser.add_argument("-o", "--output", help="Archivo donde escribir la cinta final ('-' para la salida estándar)")
+    parser.add_argument("--nonblank", action="store_true", help="Escribe solo el tramo entre el primer y el último símbolo no blanco")
+    parser.add_argument("--max-steps", type=int, default=None, help="Límite de pasos")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Límite de tiempo, en segundos")
+    parser.add_argument("--tape", choices=sorted(TAPE_BACKENDS), default="dense", help="Representación de la cinta: densa o por tramos")
+    parser.add_argument("--engine", choices=ENGINES, default="interpreter", help="Motor de ejecución")
+    parser.add_argument("--trace", help="Graba la ejecución en esta traza binaria (ver tracefile.py)")
+    parser.add_argument("--trace-interval", type=int, default=TraceWriter.DEFAULT_INTERVAL,
+                        help="Pasos entre copias de la cinta dentro de la traza")
+    args = parser.parse_args(argv)
+
+    mtu = MTU(args.input, tape_class=TAPE_BACKENDS[args.tape], engine=args.engine)
+    program = parse_program(args.program)
+    mtu.load_program(program)
+    for warning in program.warnings:
+        print(f"Aviso: {warning}", file=sys.stderr)
+    if args.input_file:
+        mtu.load_input_file(args.input_file)
+    writer = TraceWriter(args.trace, args.trace_interval) if args.trace else None
+    result = mtu.run(max_steps=args.max_steps, max_seconds=args.max_seconds, hooks=[writer] if writer else None)
+    if writer is not None:
+        writer.close(mtu, result)
+    print(f"Resultado: {result.reason.value} en estado {mtu.current_state}, {result.steps} pasos, "
+          f"{result.elapsed:.3f} s, cinta de {len(mtu.job_tape)} celdas", file=sys.stderr)
+    if result.error:
+        print(f"Error: {result.error}", file=sys.stderr)
+    if args.output == "-":
+        tape = mtu.job_tape
+        start, end = tape.nonblank_span() if args.nonblank else (tape.lo, tape.hi)
+        tape.dump(sys.stdout.buffer, start, end)
+        sys.stdout.buffer.write(b"\n")
+    elif args.output:
+        mtu.dump_tape(args.output, nonblank=args.nonblank)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,301 @@
+"""Servicio local de ejecución: programas residentes y trabajos en un pool de procesos.
+
+Uso:
+    python server.py [--host 127.0.0.1] [--port 8765] [--workers N] [--max-queue 256]
+                     [--max-steps N] [--max-seconds S]
+
+Protocolo JSON-lines sobre TCP: cada línea es una petición con "op" y cada petición recibe
+exactamente una línea de respuesta, en orden, con "ok" y los datos o un "error":
+
+    {"op": "load", "path": "palindrome.txt"}            -> {"ok": true, "program": clave}
+    {"op": "load", "source": "[08]. (00, ...)."}        -> {"ok": true, "program": clave}
+    {"op": "submit", "program": clave, "input": "0110",
+     "max_steps": 1000, "max_seconds": 2, "wait": false} -> {"ok": true, "job": 1}
+    {"op": "status", "job": 1}                           -> {"ok": true, "job": 1, "status": ..., "result": {...}}
+    {"op": "cancel", "job": 1}                           -> {"ok": true, "job": 1, "status": ...}
+    {"op": "stats"}                                      -> {"ok": true, "queued": 0, "running": 2, ...}
+
+Los programas se analizan una vez (la clave es el hash del texto, como en ProgramCache) y
+cada proceso del pool guarda su MTU ya cargada por clave, así que un trabajo no paga ni el
+arranque del intérprete ni el análisis del programa. "submit" acepta "path" en lugar de
+"program" y, con "wait": true, responde directamente con el resultado. Si ya hay
+`--max-queue` trabajos sin terminar, "submit" se rechaza con "busy": true. El resultado
+tiene las mismas claves que una línea de batch.py.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from batch import DEFAULT_MAX_STEPS, make_result
+from errors import MTUError
+from mtu import MTU
+from program import Program, parse_source
+from program_cache import source_key
+from result import HaltReason
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_SECONDS = 60.0
+SLICE_SECONDS = 0.05      # Cada cuánto revisa un trabajo si lo cancelaron
+WORKER_PROGRAMS = 32      # MTU cargadas que guarda cada proceso del pool
+LINE_LIMIT = 1 << 24      # Longitud máxima de una petición (entradas largas incluidas)
+
+_worker_cancel = None
+_worker_started = None
+_worker_machines: "OrderedDict[str, MTU]" = OrderedDict()
+
+def init_worker(cancel, started):
+    global _worker_cancel, _worker_started
+    _worker_cancel, _worker_started = cancel, started
+
+def worker_machine(key: str, source: str, name: Optional[str]) -> MTU:
+    mtu = _worker_machines.get(key)
+    if mtu is None:
+        mtu = MTU()
+        mtu.load_program(parse_source(source, name))
+        _worker_machines[key] = mtu
+        while len(_worker_machines) > WORKER_PROGRAMS:
+            _worker_machines.popitem(last=False)
+    _worker_machines.move_to_end(key)
+    return mtu
+
+def run_job(key: str, source: str, name: Optional[str], user_input: str, max_steps: Optional[int],
+            max_seconds: float, slot: int) -> dict:
+    """Ejecuta un trabajo en tramos de SLICE_SECONDS; entre tramos revisa la marca de
+    cancelación `slot`, como MachineWorker revisa su cola de órdenes."""
+    _worker_started[slot] = 1
+    mtu = worker_machine(key, source, name)
+    mtu.initial_user_input = user_input
+    mtu.reset()
+    mtu.error = None
+    start = time.perf_counter()
+    steps = 0
+    status = HaltReason.TIMEOUT.value
+    while not _worker_cancel[slot]:
+        left = None if max_steps is None else max_steps - steps
+        remaining = max_seconds - (time.perf_counter() - start)
+        if remaining <= 0:
+            break
+        result = mtu.run(max_steps=left, max_seconds=min(SLICE_SECONDS, remaining))
+        steps += result.steps
+        if result.reason != HaltReason.TIMEOUT:
+            status = result.reason.value
+            break
+    else:
+        status = "cancelled"
+    return make_result(user_input, status, mtu.current_state, steps, str(mtu.job_tape),
+                       time.perf_counter() - start, mtu.error)
+
+class Job:
+    __slots__ = ("id", "status", "slot", "future", "result")
+
+    def __init__(self, job_id: int, slot: int):
+        self.id = job_id
+        self.status = "queued"   # queued, done o cancelled; "running" se deduce de la marca del proceso
+        self.slot = slot
+        self.future: Optional[Future] = None
+        self.result: Optional[dict] = None
+
+    def describe(self) -> dict:
+        reply = {"ok": True, "job": self.id, "status": self.status}
+        if self.result is not None:
+            reply["result"] = self.result
+        return reply
+
+class JobServer:
+    """Frente asyncio del pool: guarda los programas cargados y el estado de cada trabajo.
+
+    Hay `max_queue` casillas compartidas con los procesos (marca de cancelación y marca de
+    "empezó"); cada trabajo sin terminar ocupa una hasta que su proceso termina, así que
+    también acotan la cola. De los trabajos terminados se recuerdan los últimos
+    `keep_finished` para poder consultar su resultado.
+    """
+    def __init__(self, workers: Optional[int] = None, max_queue: int = 256,
+                 max_steps: Optional[int] = DEFAULT_MAX_STEPS, max_seconds: float = DEFAULT_MAX_SECONDS,
+                 keep_finished: int = 10_000):
+        self.max_steps = max_steps
+        self.max_seconds = max_seconds
+        self.keep_finished = keep_finished
+        self.cancel = multiprocessing.Array('b', max_queue, lock=False)
+        self.started = multiprocessing.Array('b', max_queue, lock=False)
+        self.free_slots: List[int] = list(range(max_queue - 1, -1, -1))
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                            initargs=(self.cancel, self.started))
+        self.programs: Dict[str, Tuple[str, Optional[str], Program]] = {}
+        self.paths: Dict[str, str] = {}
+        self.jobs: Dict[int, Job] = {}
+        self.finished: "OrderedDict[int, None]" = OrderedDict()
+        self.next_id = 1
+        self.completed = 0
+        self.rejected = 0
+
+    def load(self, path: Optional[str] = None, source: Optional[str] = None) -> str:
+        if source is None:
+            with open(path, 'rb') as file:
+                data = file.read()
+            source = data.decode()
+        else:
+            data = source.encode()
+        key = source_key(data)
+        if key not in self.programs:
+            self.programs[key] = (source, path, parse_source(source, path))
+        if path is not None:
+            self.paths[path] = key
+        return key
+
+    def budget(self, request: dict) -> Tuple[Optional[int], float]:
+        """Presupuesto del trabajo: el pedido, sin pasar los límites del servidor."""
+        max_steps = request.get("max_steps", self.max_steps)
+        if self.max_steps is not None:
+            max_steps = self.max_steps if max_steps is None else min(max_steps, self.max_steps)
+        max_seconds = min(request.get("max_seconds") or self.max_seconds, self.max_seconds)
+        return max_steps, max_seconds
+
+    async def submit(self, request: dict) -> dict:
+        key = request.get("program")
+        if key is None and "path" in request:
+            key = self.paths.get(request["path"]) or self.load(path=request["path"])
+        if key not in self.programs:
+            return {"ok": False, "error": "Programa desconocido: cárguelo antes con 'load'."}
+        if not self.free_slots:
+            self.rejected += 1
+            return {"ok": False, "busy": True, "error": "Cola llena, reintente más tarde."}
+        source, name, _ = self.programs[key]
+        max_steps, max_seconds = self.budget(request)
+        slot = self.free_slots.pop()
+        self.cancel[slot] = self.started[slot] = 0
+        job = Job(self.next_id, slot)
+        self.next_id += 1
+        self.jobs[job.id] = job
+        job.future = self.executor.submit(run_job, key, source, name, str(request.get("input", "")),
+                                          max_steps, max_seconds, slot)
+        waiter = asyncio.wrap_future(job.future)
+        waiter.add_done_callback(lambda _: self.finish(job, job.future))
+        if request.get("wait"):
+            await asyncio.wait([waiter])
+            return self.describe(job)
+        return {"ok": True, "job": job.id}
+
+    def describe(self, job: Job) -> dict:
+        reply = job.describe()
+        if job.status == "queued" and self.cancel[job.slot]:
+            reply["status"] = "cancelling"
+        elif job.status == "queued" and self.started[job.slot]:
+            reply["status"] = "running"
+        return reply
+
+    def finish(self, job: Job, future: Future):
+        if future.cancelled():
+            job.status = "cancelled"
+        elif future.exception() is not None:
+            job.status = "done"
+            job.result = {"status": "failed", "error": str(future.exception())}
+        else:
+            job.result = future.result()
+            job.status = "cancelled" if job.result["status"] == "cancelled" else "done"
+        self.completed += 1
+        self.free_slots.append(job.slot)
+        self.finished[job.id] = None
+        while len(self.finished) > self.keep_finished:
+            old, _ = self.finished.popitem(last=False)
+            del self.jobs[old]
+
+    def status(self, request: dict) -> dict:
+        job = self.jobs.get(request.get("job"))
+        if job is None:
+            return {"ok": False, "error": "Trabajo desconocido."}
+        return self.describe(job)
+
+    def cancel_job(self, request: dict) -> dict:
+        """Un trabajo que no salió de la cola se descarta; uno que ya la dejó se detiene en su
+        próximo tramo y su casilla se libera cuando el proceso devuelve el resultado."""
+        job = self.jobs.get(request.get("job"))
+        if job is None:
+            return {"ok": False, "error": "Trabajo desconocido."}
+        if job.status == "queued" and not job.future.cancel():
+            self.cancel[job.slot] = 1
+        return self.describe(job)
+
+    def stats(self) -> dict:
+        pending = [job for job in self.jobs.values() if job.status == "queued"]
+        running = sum(1 for job in pending if self.started[job.slot])
+        return {"ok": True, "queued": len(pending) - running, "running": running, "free_slots": len(self.free_slots),
+                "completed": self.completed, "rejected": self.rejected, "programs": len(self.programs)}
+
+    async def dispatch(self, request: dict) -> dict:
+        op = request.get("op")
+        if op == "load":
+            return {"ok": True, "program": self.load(request.get("path"), request.get("source"))}
+        if op == "submit":
+            return await self.submit(request)
+        if op == "status":
+            return self.status(request)
+        if op == "cancel":
+            return self.cancel_job(request)
+        if op == "stats":
+            return self.stats()
+        return {"ok": False, "error": f"Operación desconocida: {op!r}"}
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("la petición debe ser un objeto JSON")
+                    reply = await self.dispatch(request)
+                except (MTUError, OSError, ValueError, TypeError, UnicodeDecodeError) as e:
+                    reply = {"ok": False, "error": str(e)}
+                writer.write(json.dumps(reply, ensure_ascii=False).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Cliente desconectado, línea demasiado larga o servidor cerrándose
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle_client, host, port, limit=LINE_LIMIT)
+
+    def close(self):
+        for job in self.jobs.values():
+            if job.status == "queued":
+                self.cancel[job.slot] = 1
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+async def serve_forever(server: JobServer, host: str, port: int):
+    listener = await server.serve(host, port)
+    addresses = ", ".join(str(sock.getsockname()) for sock in listener.sockets)
+    print(f"Escuchando en {addresses}", flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio local JSON-lines que ejecuta programas MTU en un pool de procesos.")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección donde escuchar (por defecto, solo local)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Puerto TCP")
+    parser.add_argument("--workers", type=int, default=None, help="Número de procesos (por defecto, uno por núcleo)")
+    parser.add_argument("--max-queue", type=int, default=256, help="Trabajos sin terminar admitidos antes de rechazar")
+    parser.add_argument("--max-steps", type=int, default=DEFAULT_MAX_STEPS, help="Límite de pasos por trabajo (0: sin límite)")
+    parser.add_argument("--max-seconds", type=float, default=DEFAULT_MAX_SECONDS, help="Límite de tiempo por trabajo, en segundos")
+    parser.add_argument("--load", action="append", default=[], help="Programa a cargar al arrancar (se puede repetir)")
+    args = parser.parse_args(argv)
+
+    server = JobServer(args.workers, args.max_queue, args.max_steps or None, args.max_seconds)
+    for path in args.load:
+        print(f"{path}: {server.load(path=path)}")
+    try:
+        asyncio.run(serve_forever(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,506 @@
+import mmap
+from bisect import bisect_left, bisect_right
+from itertools import chain, groupby, repeat
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+from config import BLANK, MAX_SYMBOLS
+
+IO_CHUNK = 1 << 20  # Bytes por trozo al leer o escribir cintas en archivos
+
+def blank_padding(length: int, first: Optional[str], last: Optional[str]) -> Tuple[int, int]:
+    """Blancos que se agregan antes y después de una entrada de `length` símbolos para formar
+    la cinta inicial: siempre hay un blanco a cada lado y al menos tres celdas."""
+    if not length:
+        return 1, 2
+    prefix = 0 if first == BLANK else 1
+    suffix = 1 if length + prefix == 1 or last != BLANK else 0
+    return prefix, suffix
+
+class Alphabet:
+    """Internado de símbolos: cada símbolo de la cinta se guarda como un código de un byte.
+
+    El blanco siempre es el código 0, de modo que las celdas nuevas de un bytearray ya son blancos.
+    """
+    def __init__(self):
+        self.symbols: List[str] = [BLANK]
+        self.codes: Dict[str, int] = {BLANK: 0}
+
+    def code(self, symbol: str) -> int:
+        code = self.codes.get(symbol)
+        if code is None:
+            if len(self.symbols) >= MAX_SYMBOLS:
+                raise Exception(f"Demasiados símbolos distintos en la cinta (máximo {MAX_SYMBOLS}).")
+            code = len(self.symbols)
+            self.codes[symbol] = code
+            self.symbols.append(symbol)
+        return code
+
+    def symbol(self, code: int) -> str:
+        return self.symbols[code]
+
+    def copy(self) -> "Alphabet":
+        alphabet = Alphabet()
+        alphabet.symbols = list(self.symbols)
+        alphabet.codes = dict(self.codes)
+        return alphabet
+
+class BaseTape:
+    """Interfaz común de las cintas: posiciones lógicas, celdas creadas en [lo, hi).
+
+    Las subclases guardan códigos de `Alphabet` e implementan read_code, ensure, fill,
+    scan, window, codes, snapshot/restore (copia completa) y truncate (deshace crecimientos).
+    """
+    def __init__(self, alphabet: Alphabet):
+        self.alphabet = alphabet
+        self.lo = 0
+        self.hi = 0
+
+    def __len__(self) -> int:
+        return self.hi - self.lo
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.window(self.lo, self.hi))
+
+    def __str__(self) -> str:
+        return ''.join(self)
+
+    def grow_left(self):
+        self.ensure(self.lo - 1)
+
+    def grow_right(self):
+        self.ensure(self.hi)
+
+    def write_code(self, pos: int, code: int):
+        self.fill(pos, pos + 1, code)
+
+    def read(self, pos: int) -> str:
+        return self.alphabet.symbols[self.read_code(pos)]
+
+    def write(self, pos: int, symbol: str):
+        self.write_code(pos, self.alphabet.code(symbol))
+
+    @classmethod
+    def from_buffer(cls, alphabet: Alphabet, data, prefix: int = 0, suffix: int = 0) -> "BaseTape":
+        """Cinta con `prefix` blancos, un símbolo por byte de `data` (como latin-1) y `suffix` blancos.
+
+        `data` es cualquier objeto con protocolo de búfer (bytes, mmap). Las subclases pueden
+        evitar pasar por símbolos sueltos.
+        """
+        symbols = (chr(value) for value in memoryview(data).cast('B'))
+        return cls(alphabet, chain(repeat(BLANK, prefix), symbols, repeat(BLANK, suffix)))
+
+    @classmethod
+    def from_codes(cls, alphabet: Alphabet, codes: bytes, lo: int = 0) -> "BaseTape":
+        """Cinta cuyas celdas creadas son [lo, lo + len(codes)), con códigos de `alphabet`."""
+        tape = cls(alphabet)
+        if codes:
+            tape.ensure(lo)
+            tape.ensure(lo + len(codes) - 1)
+            pos = lo
+            for code, run in groupby(codes):
+                length = sum(1 for _ in run)
+                if code:
+                    tape.fill(pos, pos + length, code)
+                pos += length
+        return tape
+
+    def nonblank_span(self) -> Tuple[int, int]:
+        """[inicio, fin) del primer al último símbolo no blanco; (lo, lo) si todo es blanco."""
+        start = None
+        for chunk_start in range(self.lo, self.hi, IO_CHUNK):
+            codes = self.codes(chunk_start, min(chunk_start + IO_CHUNK, self.hi))
+            stripped = codes.lstrip(b'\0')
+            if stripped:
+                start = chunk_start + len(codes) - len(stripped)
+                break
+        if start is None:
+            return self.lo, self.lo
+        for chunk_end in range(self.hi, start, -IO_CHUNK):
+            codes = self.codes(max(chunk_end - IO_CHUNK, start), chunk_end)
+            stripped = codes.rstrip(b'\0')
+            if stripped:
+                return start, chunk_end - len(codes) + len(stripped)
+        return start, start
+
+    def dump(self, stream: BinaryIO, start: Optional[int] = None, end: Optional[int] = None) -> int:
+        """Escribe los símbolos de [start, end) (por defecto, toda la cinta creada) en `stream`
+        en UTF-8, por trozos de IO_CHUNK celdas; devuelve los bytes escritos. Con símbolos
+        ASCII es un byte por celda, el mismo formato que lee `read_tape_file`."""
+        start = self.lo if start is None else start
+        end = self.hi if end is None else end
+        symbols = dict(enumerate(self.alphabet.symbols))
+        written = 0
+        for chunk_start in range(start, end, IO_CHUNK):
+            codes = self.codes(chunk_start, min(chunk_start + IO_CHUNK, end))
+            data = codes.decode('latin-1').translate(symbols).encode('utf-8')
+            stream.write(data)
+            written += len(data)
+        return written
+
+class Tape(BaseTape):
+    """Cinta densa que crece en ambos sentidos en O(1) amortizado.
+
+    Las posiciones son lógicas: la celda 0 es la primera de la cinta inicial y las posiciones
+    negativas aparecen al crecer hacia la izquierda. `lo`/`hi` delimitan las celdas ya creadas
+    y `origin` es el índice de la posición lógica 0 dentro de `cells`.
+    """
+    MIN_GROWTH = 16
+    MIN_SCAN_CHUNK = 64
+
+    def __init__(self, alphabet: Alphabet, symbols: Iterable[str] = ()):
+        super().__init__(alphabet)
+        self.cells = bytearray(alphabet.code(symbol) for symbol in symbols)
+        self.origin = 0
+        self.hi = len(self.cells)
+
+    @classmethod
+    def from_buffer(cls, alphabet: Alphabet, data, prefix: int = 0, suffix: int = 0) -> "Tape":
+        """Traduce `data` a códigos directamente dentro de `cells`, por trozos de IO_CHUNK:
+        la cinta ocupa un byte por celda y solo hace falta memoria extra para un trozo."""
+        tape = cls(alphabet)
+        size = len(data)
+        tape.cells = bytearray(prefix + size + suffix)
+        table = bytearray(256)
+        known = bytearray()
+        for start in range(0, size, IO_CHUNK):
+            chunk = bytes(data[start:start + IO_CHUNK])
+            # Solo los bytes que todavía no tienen código (casi siempre ninguno)
+            for value in sorted(set(chunk.translate(None, known))):
+                table[value] = alphabet.code(chr(value))
+                known.append(value)
+            tape.cells[prefix + start:prefix + start + len(chunk)] = chunk.translate(table)
+        tape.hi = len(tape.cells)
+        return tape
+
+    @classmethod
+    def from_codes(cls, alphabet: Alphabet, codes: bytes, lo: int = 0) -> "Tape":
+        tape = cls(alphabet)
+        tape.restore((codes, lo, lo + len(codes)))
+        return tape
+
+    def read_code(self, pos: int) -> int:
+        if self.lo <= pos < self.hi:
+            return self.cells[self.origin + pos]
+        return 0
+
+    def ensure(self, pos: int):
+        """Crea las celdas necesarias para que `pos` quede dentro de la cinta.
+
+        El búfer crece al menos al doble, así que el crecimiento es O(1) amortizado.
+        """
+        if pos < self.lo:
+            self.reserve(pos, pos + 1)
+            self.lo = pos
+        elif pos >= self.hi:
+            self.reserve(pos, pos + 1)
+            self.hi = pos + 1
+
+    def reserve(self, start: int, end: int):
+        """Amplía el búfer para que cubra las posiciones [start, end) sin crear celdas:
+        `lo`/`hi` no cambian y lo que queda fuera de ellos sigue en blanco."""
+        missing = -(self.origin + start)
+        if missing > 0:
+            pad = max(missing, len(self.cells), self.MIN_GROWTH)
+            self.cells[0:0] = bytes(pad)
+            self.origin += pad
+        missing = self.origin + end - len(self.cells)
+        if missing > 0:
+            self.cells.extend(bytes(max(missing, len(self.cells), self.MIN_GROWTH)))
+
+    def write_code(self, pos: int, code: int):
+        if not self.lo <= pos < self.hi:
+            self.ensure(pos)
+        self.cells[self.origin + pos] = code
+
+    def fill(self, start: int, end: int, code: int):
+        """Escribe `code` en todas las posiciones [start, end)."""
+        if start >= end:
+            return
+        if start < self.lo:
+            self.ensure(start)
+        if end > self.hi:
+            self.ensure(end - 1)
+        self.cells[self.origin + start:self.origin + end] = bytes((code,)) * (end - start)
+
+    def scan(self, pos: int, move: int, mask: bytes, limit: int) -> int:
+        """Número de celdas consecutivas desde `pos` (incluida), en la dirección `move`, cuyo
+        código cumple mask[code] != 0, sin pasar de `limit`.
+
+        Las celdas fuera de la cinta creada son blancos: si se alcanza el borde y el blanco
+        está en la máscara, el recorrido continúa hasta `limit`. Los tramos se examinan con
+        `translate` + `find` en trozos de tamaño creciente, así el coste es lineal en la
+        longitud recorrida y no en la de la cinta.
+        """
+        cells, origin = self.cells, self.origin
+        count = 0
+        chunk = self.MIN_SCAN_CHUNK
+        if move > 0:
+            while count < limit:
+                start = pos + count
+                end = min(self.hi, start + chunk, pos + limit)
+                if start >= end:
+                    return limit if mask[0] else count
+                segment = cells[origin + start:origin + end].translate(mask)
+                stop = segment.find(0)
+                if stop != -1:
+                    return count + stop
+                count += end - start
+                chunk *= 2
+        else:
+            while count < limit:
+                end = pos - count + 1
+                start = max(self.lo, end - chunk, pos - limit + 1)
+                if start >= end:
+                    return limit if mask[0] else count
+                segment = cells[origin + start:origin + end].translate(mask)
+                stop = segment.rfind(0)
+                if stop != -1:
+                    return count + (end - 1 - (start + stop))
+                count += end - start
+                chunk *= 2
+        return limit
+
+    def codes(self, start: int, end: int) -> bytes:
+        """Códigos de las posiciones [start, end); fuera de la cinta creada, blancos (0)."""
+        inner_start, inner_end = max(start, self.lo), min(end, self.hi)
+        if inner_start >= inner_end:
+            return bytes(max(0, end - start))
+        view = self.cells[self.origin + inner_start:self.origin + inner_end]
+        return bytes(inner_start - start) + bytes(view) + bytes(end - inner_end)
+
+    def snapshot(self) -> Tuple[bytes, int, int]:
+        return bytes(self.cells[self.origin + self.lo:self.origin + self.hi]), self.lo, self.hi
+
+    def restore(self, snapshot: Tuple[bytes, int, int]):
+        codes, self.lo, self.hi = snapshot
+        self.cells = bytearray(codes)
+        self.origin = -self.lo
+
+    def truncate(self, lo: int, hi: int):
+        """Reduce la cinta creada a [lo, hi); las celdas que salen vuelven a ser blancos."""
+        origin = self.origin
+        self.cells[origin + self.lo:origin + lo] = bytes(lo - self.lo)
+        self.cells[origin + hi:origin + self.hi] = bytes(self.hi - hi)
+        self.lo, self.hi = lo, hi
+
+    def window(self, start: int, end: int) -> List[str]:
+        """Símbolos de las posiciones [start, end); fuera de la cinta creada se ven blancos."""
+        symbols = self.alphabet.symbols
+        inner_start, inner_end = max(start, self.lo), min(end, self.hi)
+        if inner_start >= inner_end:
+            return [BLANK] * max(0, end - start)
+        view = self.cells[self.origin + inner_start:self.origin + inner_end]
+        return ([BLANK] * (inner_start - start)
+                + [symbols[code] for code in view]
+                + [BLANK] * (end - inner_end))
+
+def read_tape_file(tape_class: Type[BaseTape], alphabet: Alphabet, path: str) -> BaseTape:
+    """Cinta inicial leída de un archivo con `mmap`: cada byte es un símbolo (ASCII o latin-1),
+    sin el salto de línea final, con los mismos blancos alrededor que una entrada en texto."""
+    with open(path, 'rb') as file:
+        if not file.seek(0, 2):
+            return tape_class(alphabet, [BLANK] * sum(blank_padding(0, None, None)))
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            end = len(data)
+            if data[end - 1:end] == b'\n':
+                end -= 1
+                if data[end - 1:end] == b'\r':
+                    end -= 1
+            with memoryview(data)[:end] as view:
+                first = chr(view[0]) if end else None
+                last = chr(view[end - 1]) if end else None
+                prefix, suffix = blank_padding(end, first, last)
+                return tape_class.from_buffer(alphabet, view, prefix, suffix)
+
+class RunLengthTape(BaseTape):
+    """Cinta por tramos: cada tramo es un código y la posición donde empieza.
+
+    Los inicios de tramo se guardan ordenados en trozos de a lo sumo 2 * CHUNK_SIZE,
+    con el primer inicio de cada trozo en `_firsts` para la búsqueda binaria. Leer y
+    escribir cuesta O(log n) y una zona uniforme, por larga que sea, ocupa un solo
+    tramo. Tramos contiguos nunca tienen el mismo código.
+    """
+    CHUNK_SIZE = 256
+
+    def __init__(self, alphabet: Alphabet, symbols: Iterable[str] = ()):
+        super().__init__(alphabet)
+        starts: List[int] = []
+        codes: List[int] = []
+        pos = 0
+        for symbol in symbols:
+            code = alphabet.code(symbol)
+            if not codes or codes[-1] != code:
+                starts.append(pos)
+                codes.append(code)
+            pos += 1
+        self.hi = pos
+        size = self.CHUNK_SIZE
+        self._starts: List[List[int]] = [starts[i:i + size] for i in range(0, len(starts), size)]
+        self._codes: List[List[int]] = [codes[i:i + size] for i in range(0, len(codes), size)]
+        self._firsts: List[int] = [chunk[0] for chunk in self._starts]
+
+    def run_count(self) -> int:
+        return sum(len(chunk) for chunk in self._starts)
+
+    def _locate(self, pos: int) -> Tuple[int, int]:
+        c = bisect_right(self._firsts, pos) - 1
+        return c, bisect_right(self._starts[c], pos) - 1
+
+    def _run_end(self, c: int, i: int) -> int:
+        if i + 1 < len(self._starts[c]):
+            return self._starts[c][i + 1]
+        if c + 1 < len(self._starts):
+            return self._firsts[c + 1]
+        return self.hi
+
+    def _code_at(self, pos: int) -> int:
+        c, i = self._locate(pos)
+        return self._codes[c][i]
+
+    def _insert(self, pos: int, code: int):
+        if not self._starts:
+            self._starts.append([pos])
+            self._codes.append([code])
+            self._firsts.append(pos)
+            return
+        c = max(bisect_right(self._firsts, pos) - 1, 0)
+        starts, codes = self._starts[c], self._codes[c]
+        i = bisect_left(starts, pos)
+        starts.insert(i, pos)
+        codes.insert(i, code)
+        self._firsts[c] = starts[0]
+        if len(starts) > 2 * self.CHUNK_SIZE:
+            half = len(starts) // 2
+            self._starts.insert(c + 1, starts[half:])
+            self._codes.insert(c + 1, codes[half:])
+            self._firsts.insert(c + 1, starts[half])
+            del starts[half:]
+            del codes[half:]
+
+    def _delete_range(self, start: int, end: int):
+        """Elimina los inicios de tramo en [start, end]."""
+        c = max(bisect_right(self._firsts, start) - 1, 0)
+        while c < len(self._starts):
+            starts = self._starts[c]
+            if starts[0] > end:
+                break
+            i, j = bisect_left(starts, start), bisect_right(starts, end)
+            del starts[i:j]
+            del self._codes[c][i:j]
+            if starts:
+                self._firsts[c] = starts[0]
+                c += 1
+            else:
+                del self._starts[c], self._codes[c], self._firsts[c]
+
+    def read_code(self, pos: int) -> int:
+        if self.lo <= pos < self.hi:
+            return self._code_at(pos)
+        return 0
+
+    def ensure(self, pos: int):
+        if self.lo == self.hi:
+            self.lo, self.hi = min(pos, self.lo), max(pos + 1, self.hi)
+            self._insert(self.lo, 0)
+        elif pos < self.lo:
+            if self._code_at(self.lo) == 0:
+                self._delete_range(self.lo, self.lo)
+            self._insert(pos, 0)
+            self.lo = pos
+        elif pos >= self.hi:
+            if self._code_at(self.hi - 1) != 0:
+                self._insert(self.hi, 0)
+            self.hi = pos + 1
+
+    def write_code(self, pos: int, code: int):
+        if self.read_code(pos) != code or not self.lo <= pos < self.hi:
+            self.fill(pos, pos + 1, code)
+
+    def fill(self, start: int, end: int, code: int):
+        """Escribe `code` en [start, end) reemplazando los tramos que haya en medio."""
+        if start >= end:
+            return
+        self.ensure(start)
+        self.ensure(end - 1)
+        tail_code: Optional[int] = self._code_at(end) if end < self.hi else None
+        prev_code: Optional[int] = self._code_at(start - 1) if start > self.lo else None
+        self._delete_range(start, end)
+        if prev_code != code:
+            self._insert(start, code)
+        if tail_code is not None and tail_code != code:
+            self._insert(end, tail_code)
+
+    def scan(self, pos: int, move: int, mask: bytes, limit: int) -> int:
+        """Igual que Tape.scan, pero avanzando tramo a tramo."""
+        count = 0
+        cur = pos
+        while count < limit:
+            if not self.lo <= cur < self.hi:
+                return limit if mask[0] else count
+            c, i = self._locate(cur)
+            if not mask[self._codes[c][i]]:
+                return count
+            if move > 0:
+                end = self._run_end(c, i)
+                count += end - cur
+                cur = end
+            else:
+                run_start = self._starts[c][i]
+                count += cur - run_start + 1
+                cur = run_start - 1
+        return limit
+
+    def codes(self, start: int, end: int) -> bytes:
+        inner_start, inner_end = max(start, self.lo), min(end, self.hi)
+        if inner_start >= inner_end:
+            return bytes(max(0, end - start))
+        parts = [bytes(inner_start - start)]
+        c, i = self._locate(inner_start)
+        cur = inner_start
+        while cur < inner_end:
+            run_end = min(self._run_end(c, i), inner_end)
+            parts.append(bytes((self._codes[c][i],)) * (run_end - cur))
+            cur = run_end
+            i += 1
+            if i == len(self._starts[c]):
+                c, i = c + 1, 0
+        parts.append(bytes(end - inner_end))
+        return b''.join(parts)
+
+    def snapshot(self) -> tuple:
+        return ([list(chunk) for chunk in self._starts], [list(chunk) for chunk in self._codes],
+                list(self._firsts), self.lo, self.hi)
+
+    def restore(self, snapshot: tuple):
+        starts, codes, firsts, self.lo, self.hi = snapshot
+        self._starts = [list(chunk) for chunk in starts]
+        self._codes = [list(chunk) for chunk in codes]
+        self._firsts = list(firsts)
+
+    def truncate(self, lo: int, hi: int):
+        if lo > self.lo:
+            code = self._code_at(lo)
+            self._delete_range(self.lo, lo)
+            self._insert(lo, code)
+        if hi < self.hi:
+            self._delete_range(hi, self.hi)
+        self.lo, self.hi = lo, hi
+
+    def window(self, start: int, end: int) -> List[str]:
+        symbols = self.alphabet.symbols
+        inner_start, inner_end = max(start, self.lo), min(end, self.hi)
+        if inner_start >= inner_end:
+            return [BLANK] * max(0, end - start)
+        result = [BLANK] * (inner_start - start)
+        c, i = self._locate(inner_start)
+        cur = inner_start
+        while cur < inner_end:
+            run_end = min(self._run_end(c, i), inner_end)
+            result.extend([symbols[self._codes[c][i]]] * (run_end - cur))
+            cur = run_end
+            i += 1
+            if i == len(self._starts[c]):
+                c, i = c + 1, 0
+        result.extend([BLANK] * (end - inner_end))
+        return result
+
+TAPE_BACKENDS = {"dense": Tape, "rle": RunLengthTape}
@@ -0,0 +1,58 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from mtu import MTU
+from program import parse_source
+from result_cache import ResultCache
+from tape import RunLengthTape, Tape
+
+# Alfabeto con símbolos de varios caracteres y fuera de latin-1
+MULTI_CHAR_PROGRAM = """[02].
+W(00, ~, {0,1}, {ab,Ω}, >).
+(00, 01, B, cd, <).
+W(01, ~, {ab,Ω}, ~, <).
+(01, 02, {B,cd}, ~, >).
+"""
+
+def machine(tape_class, user_input: str) -> MTU:
+    mtu = MTU(user_input, tape_class=tape_class)
+    with redirect_stdout(io.StringIO()):
+        mtu.load_program(parse_source(MULTI_CHAR_PROGRAM, "multi.txt"))
+    return mtu
+
+def configuration(mtu: MTU) -> tuple:
+    tape = mtu.job_tape
+    return mtu.current_state, mtu.pointer, tape.lo, tape.hi, list(tape)
+
+class ResultCacheTest(unittest.TestCase):
+    def check_hit(self, cache: ResultCache, tape_class, user_input: str):
+        expected_mtu = machine(tape_class, user_input)
+        expected = expected_mtu.run(max_steps=1000)
+        cache.run(machine(tape_class, user_input), max_steps=1000)
+        hits = cache.hits + cache.disk_hits
+        cached_mtu = machine(tape_class, user_input)
+        result = cache.run(cached_mtu, max_steps=1000)
+        self.assertEqual(cache.hits + cache.disk_hits, hits + 1)
+        self.assertEqual((result.reason, result.steps), (expected.reason, expected.steps))
+        self.assertEqual(configuration(cached_mtu), configuration(expected_mtu))
+
+    def test_multi_character_symbols_in_memory(self):
+        for tape_class in (Tape, RunLengthTape):
+            self.check_hit(ResultCache(), tape_class, "0110")
+
+    def test_multi_character_symbols_on_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.sqlite")
+            writer = ResultCache(path)
+            writer.run(machine(Tape, "1001"), max_steps=1000)
+            writer.close()
+            # Una base nueva sin nada en memoria: el acierto viene del disco
+            reader = ResultCache(path)
+            self.check_hit(reader, Tape, "1001")
+            self.assertEqual(reader.disk_hits, 1)
+            reader.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from mtu import MTU
+from program import parse_source
+from result import HaltReason
+from tracefile import TraceReader, TraceWriter
+
+# El estado inicial ya es de aceptación: `run` vuelve sin llamar a los hooks
+ACCEPTING_START = """[00].
+(00, 01, 0, 1, >).
+"""
+
+class ZeroStepTraceTest(unittest.TestCase):
+    def record(self, mtu: MTU) -> TraceReader:
+        path = os.path.join(self.directory.name, "traza.mtr")
+        writer = TraceWriter(path)
+        result = mtu.run(hooks=[writer])
+        writer.close(mtu, result)
+        reader = TraceReader(path)
+        self.addCleanup(reader.close)
+        self.assertEqual(len(reader), 0)
+        return reader
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_already_accepting(self):
+        mtu = MTU("0110")
+        with redirect_stdout(io.StringIO()):
+            mtu.load_program(parse_source(ACCEPTING_START, "acepta.txt"))
+        reader = self.record(mtu)
+        self.assertEqual(reader.result(0, 0.0).reason, HaltReason.ACCEPTED)
+        replay = reader.machine()
+        reader.seek(replay, 0)
+        self.assertEqual((replay.current_state, replay.pointer, str(replay.job_tape)),
+                         (mtu.current_state, mtu.pointer, str(mtu.job_tape)))
+
+    def test_no_program_loaded(self):
+        mtu = MTU("01")
+        reader = self.record(mtu)
+        self.assertEqual(reader.result(0, 0.0).reason, HaltReason.ERROR)
+
+if __name__ == '__main__':
+    unittest.main()
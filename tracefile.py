@@ -0,0 +1,316 @@
+"""Trazas de ejecución en disco: un registro binario de ancho fijo por paso.
+
+Uso:
+    python tracefile.py traza.mtr [--step N] [--half 20]
+
+Una traza son cuatro archivos con el mismo prefijo:
+    traza.mtr       cabecera y un registro RECORD por paso: instrucción, estado, posición de
+                    la cabeza, código leído, código escrito y movimiento (más el bit GREW)
+    traza.mtr.snap  copias de la cinta, una cada `interval` pasos
+    traza.mtr.idx   un registro INDEX por copia: dónde está y la configuración en ese paso
+    traza.mtr.json  metadatos: alfabeto, nombres de estados, instrucciones y final
+
+El paso k está en una posición fija del archivo y su copia en la entrada k // interval del
+índice, así que `TraceReader` abre los archivos con mmap y llega a cualquier paso en O(1)
+más a lo sumo `interval` registros aplicados hacia adelante (o deshechos hacia atrás).
+Se graba con `MTU.run(hooks=[TraceWriter(ruta)])` o con `run.py --trace ruta`.
+"""
+import argparse
+import json
+import mmap
+import struct
+from typing import Dict, List, Optional, Tuple
+from errors import TraceError
+from hooks import ExecutionHook
+from instruction import Instruction
+from mtu import MTU
+from result import HaltReason, RunResult
+from tape import Alphabet, Tape
+from transition_table import Action
+
+MAGIC = b"MTUTRACE"
+VERSION = 1
+HEADER = struct.Struct("<8sHHI")      # Firma, versión, tamaño de registro, intervalo de copias
+# Instrucción (índice en mtu.instructions), estado (índice en "states"), cabeza antes del
+# paso, código leído, código escrito y movimiento + 1 con el bit GREW: 15 bytes por paso
+RECORD = struct.Struct("<IIiBBB")
+INDEX = struct.Struct("<QqqIq")       # Desplazamiento en .snap, lo, hi, estado y cabeza
+GREW = 4  # Bit del último byte del registro: el paso hizo crecer la cinta, como en Journal
+FLUSH_BYTES = 1 << 20
+
+class TraceWriter(ExecutionHook):
+    """Graba cada paso de `MTU.run(hooks=[writer])` en la traza `path`.
+
+    Los registros se acumulan en un bytearray y se escriben de a FLUSH_BYTES; puede
+    engancharse a varias llamadas seguidas a `run` sobre la misma máquina. Después de cada
+    `run` los metadatos quedan al día, así que la traza se puede leer aunque no se cierre.
+    `run` no llama a los hooks si vuelve antes de empezar (sin programa, o ya en un estado
+    de aceptación): `close(mtu, result)` escribe entonces la traza de cero pasos.
+    """
+    DEFAULT_INTERVAL = 16384
+
+    def __init__(self, path: str, interval: int = DEFAULT_INTERVAL):
+        if interval < 1:
+            raise ValueError("El intervalo entre copias de la cinta debe ser positivo.")
+        self.path = path
+        self.interval = interval
+        self.steps = 0
+        self.snapshots = 0
+        self.state_names: List[str] = []
+        self.state_ids: Dict[str, int] = {}
+        self.order: Dict[Instruction, int] = {}
+        self.buffer = bytearray()
+        self.stopped = False
+        self.pack = RECORD.pack
+        self.records = open(path, 'wb')
+        self.snap = open(path + '.snap', 'wb')
+        self.index = open(path + '.idx', 'wb')
+        self.records.write(HEADER.pack(MAGIC, VERSION, RECORD.size, interval))
+
+    def state_id(self, state: str) -> int:
+        index = self.state_ids.get(state)
+        if index is None:
+            index = self.state_ids[state] = len(self.state_names)
+            self.state_names.append(state)
+        return index
+
+    def checkpoint(self, mtu: MTU, state: str, pos: int):
+        tape = mtu.job_tape
+        self.index.write(INDEX.pack(self.snap.tell(), tape.lo, tape.hi, self.state_id(state), pos))
+        self.snap.write(tape.codes(tape.lo, tape.hi))
+        self.snapshots += 1
+
+    def on_start(self, mtu: MTU):
+        if len(self.order) != len(mtu.instructions):
+            self.order = {instruction: i for i, instruction in enumerate(mtu.instructions)}
+        if not self.snapshots:
+            self.checkpoint(mtu, mtu.current_state, mtu.pointer)
+
+    def on_step(self, mtu: MTU, action: Action, state: str, pos: int, code: int):
+        k = self.steps
+        if k % self.interval == 0 and self.snapshots == k // self.interval:
+            self.checkpoint(mtu, state, pos)
+        if len(self.buffer) >= FLUSH_BYTES:
+            self.flush()
+        state_id = self.state_ids.get(state)
+        if state_id is None:
+            state_id = self.state_id(state)
+        write = action.write
+        self.buffer += self.pack(self.order[action.instruction], state_id, pos, code,
+                                 code if write is None else write, action.move + 1)
+        self.steps = k + 1
+
+    def on_grow(self, mtu: MTU, pos: int):
+        # on_step acaba de agregar el registro y solo se vacía el búfer antes de agregar otro
+        self.buffer[-1] |= GREW
+
+    def on_stop(self, mtu: MTU, result: RunResult):
+        self.stopped = True
+        self.flush()
+        instruction = self.order.get(result.instruction) if result.instruction is not None else None
+        meta = {
+            "version": VERSION,
+            "steps": self.steps,
+            "interval": self.interval,
+            "symbols": mtu.alphabet.symbols,
+            "states": self.state_names,
+            "accepting": sorted(mtu.accepting_states),
+            "instructions": [str(instruction) for instruction in mtu.instructions],
+            "final": {
+                "state": mtu.current_state,
+                "pointer": mtu.pointer,
+                "reason": result.reason.value,
+                "instruction": instruction,
+                "error": str(result.error) if result.error else None,
+            },
+        }
+        with open(self.path + '.json', 'w', encoding='utf-8') as file:
+            json.dump(meta, file, ensure_ascii=False)
+
+    def flush(self):
+        self.records.write(self.buffer)
+        self.buffer.clear()
+        for file in (self.records, self.snap, self.index):
+            file.flush()
+
+    def close(self, mtu: Optional[MTU] = None, result: Optional[RunResult] = None):
+        """Cierra los archivos; con `mtu`, antes completa la copia inicial y los metadatos
+        si ningún `run` llegó a llamar a los hooks."""
+        if mtu is not None and not self.stopped:
+            if result is None:
+                accepted = mtu.current_state in mtu.accepting_states
+                result = RunResult(HaltReason.ACCEPTED if accepted else HaltReason.ERROR, error=mtu.error)
+            self.on_start(mtu)
+            self.on_stop(mtu, result)
+        self.flush()
+        for file in (self.records, self.snap, self.index):
+            file.close()
+
+def map_file(path: str) -> mmap.mmap:
+    with open(path, 'rb') as file:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+class TraceReader:
+    """Traza abierta con mmap: reproduce la ejecución grabada sobre una MTU sin programa.
+
+    `position` es el paso que muestra la máquina reproducida; `seek` funciona como
+    Journal.seek: deshace registros si está cerca y, si no, restaura la copia anterior
+    más cercana y aplica registros hacia adelante.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path + '.json', encoding='utf-8') as file:
+                meta = json.load(file)
+        except FileNotFoundError:
+            raise TraceError(f"La traza '{path}' no tiene metadatos ({path}.json): ¿se cortó la grabación?")
+        except ValueError as e:
+            raise TraceError(f"Metadatos inválidos en '{path}.json': {e}")
+        self.records = map_file(path)
+        magic, version, size, self.interval = HEADER.unpack_from(self.records, 0)
+        if magic != MAGIC or version != VERSION or size != RECORD.size:
+            raise TraceError(f"'{path}' no es una traza MTU de versión {VERSION}.")
+        self.steps: int = meta["steps"]
+        if len(self.records) < HEADER.size + self.steps * RECORD.size:
+            raise TraceError(f"La traza '{path}' está truncada.")
+        self.index = map_file(path + '.idx')
+        self.snap = map_file(path + '.snap')
+        self.snapshots = len(self.index) // INDEX.size
+        self.alphabet = Alphabet()
+        for symbol in meta["symbols"]:
+            self.alphabet.code(symbol)
+        self.state_names: List[str] = meta["states"]
+        self.accepting = set(meta["accepting"])
+        self.instructions: List[str] = meta["instructions"]
+        final = meta["final"]
+        self.final: Tuple[str, int] = (final["state"], final["pointer"])
+        self.reason = HaltReason(final["reason"])
+        self.final_instruction: Optional[int] = final["instruction"]
+        self.error: Optional[str] = final["error"]
+        self.position = 0
+
+    def __len__(self) -> int:
+        return self.steps
+
+    def record(self, k: int) -> Tuple[int, str, int, int, int, int]:
+        """Paso k: (instrucción, estado, cabeza, código leído, código escrito, movimiento)."""
+        instruction, state, pos, read, written, flags = RECORD.unpack_from(self.records, HEADER.size + k * RECORD.size)
+        return instruction, self.state_names[state], pos, read, written, (flags & 3) - 1
+
+    def configuration(self, k: int) -> Tuple[str, int]:
+        """Estado y cabeza antes del paso k (k == len: los del final de la grabación)."""
+        if k == self.steps:
+            return self.final
+        _, state, pos, _, _, _ = self.record(k)
+        return state, pos
+
+    def machine(self) -> MTU:
+        """MTU que muestra la ejecución grabada en el paso 0; sin programa: solo se mueve con seek."""
+        mtu = MTU()
+        mtu.alphabet = self.alphabet
+        mtu.job_tape = Tape(self.alphabet)
+        mtu.accepting_states = set(self.accepting)
+        mtu.program_loaded = True
+        self.restore(mtu, 0)
+        return mtu
+
+    def restore(self, mtu: MTU, step: int):
+        offset, lo, hi, state, pos = INDEX.unpack_from(self.index, step // self.interval * INDEX.size)
+        mtu.job_tape.restore((bytes(self.snap[offset:offset + hi - lo]), lo, hi))
+        mtu.pointer = pos
+        mtu.current_state = self.state_names[state]
+        self.position = step
+
+    def seek(self, mtu: MTU, step: int):
+        step = max(0, min(step, self.steps))
+        base = min(step // self.interval, self.snapshots - 1) * self.interval
+        if step < self.position:
+            if self.position - step <= step - base:
+                self.backward(mtu, self.position - step)
+                return
+            self.restore(mtu, base)
+        elif base > self.position:
+            self.restore(mtu, base)
+        if step > self.position:
+            self.forward(mtu, step - self.position)
+
+    def forward(self, mtu: MTU, count: int) -> int:
+        """Aplica hasta `count` pasos grabados; devuelve cuántos aplicó."""
+        start = self.position
+        end = min(self.steps, start + count)
+        if end == start:
+            return 0
+        tape = mtu.job_tape
+        write = tape.write_code
+        view = memoryview(self.records)[HEADER.size + start * RECORD.size:HEADER.size + end * RECORD.size]
+        # write_code crea la celda si hace falta: cada cabeza visitada es el `pos` de algún registro
+        for _, _, pos, _, written, _ in RECORD.iter_unpack(view):
+            write(pos, written)
+        view.release()
+        self.position = end
+        mtu.current_state, mtu.pointer = self.configuration(end)
+        tape.ensure(mtu.pointer)
+        return end - start
+
+    def backward(self, mtu: MTU, count: int) -> int:
+        """Deshace hasta `count` pasos con el código leído de cada registro; devuelve cuántos."""
+        tape = mtu.job_tape
+        done = 0
+        while done < count and self.position > 0:
+            k = self.position - 1
+            _, state, pos, read, _, flags = RECORD.unpack_from(self.records, HEADER.size + k * RECORD.size)
+            if flags & GREW:
+                after = mtu.pointer
+                if after == tape.lo:
+                    tape.truncate(after + 1, tape.hi)
+                else:
+                    tape.truncate(tape.lo, after)
+            tape.write_code(pos, read)
+            mtu.pointer = pos
+            mtu.current_state = self.state_names[state]
+            self.position = k
+            done += 1
+        return done
+
+    def instruction(self, k: int) -> Optional[str]:
+        """Texto de la instrucción del paso k, o de la que detuvo la máquina si k == len."""
+        if k == self.steps:
+            number = self.final_instruction
+            return self.instructions[number] if number is not None else None
+        return self.instructions[self.record(k)[0]]
+
+    def result(self, steps: int, elapsed: float = 0.0) -> RunResult:
+        """Resultado de haber reproducido `steps` pasos hasta la posición actual: el de la
+        grabación si se llegó al final, MAX_STEPS si no."""
+        if self.position == self.steps:
+            error = TraceError(self.error) if self.error else None
+            return RunResult(self.reason, steps, elapsed, self.instruction(self.steps), error)
+        return RunResult(HaltReason.MAX_STEPS, steps, elapsed, self.instruction(self.position - 1) if self.position else None)
+
+    def close(self):
+        for data in (self.records, self.index, self.snap):
+            data.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Muestra una traza MTU grabada en un paso cualquiera.")
+    parser.add_argument("trace", help="Archivo de la traza (sin las extensiones .snap/.idx/.json)")
+    parser.add_argument("--step", type=int, default=None, help="Paso a mostrar (por defecto, el último)")
+    parser.add_argument("--half", type=int, default=20, help="Celdas a cada lado de la cabeza")
+    args = parser.parse_args(argv)
+
+    reader = TraceReader(args.trace)
+    mtu = reader.machine()
+    reader.seek(mtu, len(reader) if args.step is None else args.step)
+    print(f"Traza de {len(reader)} pasos ({reader.reason.value}), copia de la cinta cada {reader.interval} pasos")
+    print(f"Paso {reader.position}: estado {mtu.current_state}, cabeza en {mtu.pointer}, "
+          f"cinta [{mtu.job_tape.lo}, {mtu.job_tape.hi})")
+    start = mtu.pointer - args.half
+    print(''.join(mtu.job_tape.window(start, mtu.pointer + args.half + 1)))
+    print(' ' * args.half + '^')
+    instruction = reader.instruction(reader.position) if reader.position < len(reader) else None
+    if instruction:
+        print(f"Siguiente instrucción: {instruction}")
+    reader.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+from typing import Dict, List, Optional
+from instruction import Instruction
+from tape import Alphabet
+from config import MAX_SYMBOLS
+
+MOVES = {">": 1, "<": -1, "!": 0}
+
+class Action:
+    """Efecto ya resuelto de una instrucción para un símbolo leído concreto."""
+    __slots__ = ("instruction", "write", "next_state", "op", "move", "is_while", "error", "scan")
+
+    def __init__(self, instruction: Instruction, write: Optional[int] = None,
+                 next_state: Optional[str] = None, error: Optional[str] = None):
+        self.instruction = instruction
+        self.write = write              # Código del símbolo a escribir; None: no se escribe (~)
+        self.next_state = next_state    # None: se conserva el estado (~)
+        self.op = instruction.op
+        self.move = MOVES.get(instruction.op, 0)
+        self.is_while = instruction.is_while
+        self.error = error              # Instrucción mal formada: se reporta al ejecutarla
+        self.scan: Optional[bytes] = None  # Máscara de recorrido (ver TransitionTable.build_scans)
+
+class TransitionTable:
+    """Tabla (estado, símbolo) -> Action compilada a partir de la lista de instrucciones.
+
+    Conserva la semántica de "primera coincidencia" del recorrido lineal: si varias
+    instrucciones cubren el mismo par, gana la que aparece antes en el archivo.
+    Cada fila es una lista densa indexada por el código del símbolo en `alphabet`.
+    """
+    def __init__(self, instructions: List[Instruction], alphabet: Alphabet):
+        self.alphabet = alphabet
+        self.rows: Dict[str, List[Optional[Action]]] = {}
+        for instruction in instructions:
+            row = self.rows.get(instruction.p_state)
+            if row is None:
+                row = self.rows[instruction.p_state] = [None] * MAX_SYMBOLS
+            for idx, symbol in enumerate(instruction.input_symbols):
+                code = alphabet.code(symbol)
+                if row[code] is None:
+                    row[code] = self.resolve(instruction, idx)
+        for state, row in self.rows.items():
+            self.build_scans(state, row)
+
+    def lookup(self, state: str, code: int) -> Optional[Action]:
+        row = self.rows.get(state)
+        if row is None:
+            return None
+        return row[code]
+
+    @staticmethod
+    def build_scans(state: str, row: List[Optional[Action]]):
+        """Marca las acciones que se pueden ejecutar en bloque sobre un tramo de la cinta.
+
+        Una acción que conserva el estado y mueve la cabeza (típicamente un `W(...)` con `~`
+        como estado) se repite mientras el símbolo leído lleve a una acción con el mismo
+        efecto (mismo símbolo escrito y mismo movimiento). Para cada grupo se guarda una
+        tabla de `bytes.translate` con 1 en los códigos del grupo y 0 en el resto.
+        """
+        groups: Dict[tuple, List[int]] = {}
+        for code, action in enumerate(row):
+            if action is None or action.error or action.move == 0:
+                continue
+            if action.next_state is not None and action.next_state != state:
+                continue
+            groups.setdefault((action.write, action.move), []).append(code)
+        for codes in groups.values():
+            mask = bytearray(MAX_SYMBOLS)
+            for code in codes:
+                mask[code] = 1
+            mask = bytes(mask)
+            for code in codes:
+                row[code].scan = mask
+
+    def resolve(self, instruction: Instruction, symbol_idx: int) -> Action:
+        # El caso (q: estados destino, s: símbolos leídos, z: símbolos escritos) ya viene
+        # resuelto del análisis; solo las instrucciones armadas a mano se clasifican aquí
+        if instruction.op not in MOVES:
+            return Action(instruction, error=f"Operación desconocida '{instruction.op}'")
+        if instruction.outcomes is None:
+            error = instruction.resolve()
+            if error is not None:
+                return Action(instruction, error=error)
+        next_state, write = instruction.outcomes[symbol_idx]
+        return Action(instruction, None if write is None else self.alphabet.code(write), next_state)
@@ -0,0 +1,318 @@
+"""Ejecución de la MTU en un hilo aparte, controlada por mensajes.
+
+La interfaz nunca toca la máquina directamente: envía órdenes con `MachineWorker.send` y
+dibuja la última `Snapshot` publicada. El hilo ejecuta la máquina en tramos cortos
+(CHUNK_SECONDS) y revisa la cola de órdenes entre tramos, así que pausar, detener o
+resetear surte efecto enseguida aunque la corrida sea larga.
+
+Con ("trace", ruta) el hilo pasa a reproducir una traza grabada (tracefile.py): las mismas
+órdenes mueven la posición dentro de la traza en lugar de ejecutar el programa.
+"""
+import queue
+import threading
+import time
+from typing import List, Optional, Tuple
+from config import BLANK
+from cycles import CycleDetector
+from errors import MTUError, ExecutionError
+from instruction import Instruction
+from journal import Journal
+from minimap import Column, TapeSummary
+from mtu import MTU
+from profiler import Profile
+from result import HaltReason, RunResult
+from tracefile import TraceReader
+
+class Snapshot:
+    """Foto de la máquina para dibujar: estado, cabeza y una ventana de la cinta alrededor de ella."""
+    __slots__ = ("serial", "event", "result", "message", "state", "accepting", "program_loaded", "error",
+                 "pointer", "lo", "hi", "window_start", "window", "running", "speed",
+                 "position", "recorded", "profiling", "profile_steps", "hottest", "minimap")
+
+    def __init__(self, serial: int, event: str, result: Optional[RunResult], message: Optional[str]):
+        self.serial = serial
+        self.event = event        # Orden u operación que produjo la foto ("run", "step", "back", ...)
+        self.result = result      # Resultado de la última ejecución, si la foto viene de una
+        self.message = message    # Detalle del evento (por ejemplo, el error al cargar)
+        self.state = '00'
+        self.accepting = False
+        self.program_loaded = False
+        self.error: Optional[MTUError] = None
+        self.pointer = 0
+        self.lo = 0
+        self.hi = 0
+        self.window_start = 0
+        self.window: List[str] = []
+        self.running = False
+        self.speed: Optional[int] = None
+        self.position = 0         # Paso actual dentro de la bitácora
+        self.recorded = 0         # Pasos grabados en la bitácora
+        self.profiling = False
+        self.profile_steps = 0
+        self.hottest: List[Tuple[Instruction, int]] = []
+        self.minimap: List[Column] = []  # Toda la cinta creada [lo, hi), una entrada por columna
+
+    @property
+    def symbol(self) -> str:
+        """Símbolo bajo la cabeza."""
+        index = self.pointer - self.window_start
+        return self.window[index] if 0 <= index < len(self.window) else BLANK
+
+class MachineWorker(threading.Thread):
+    """Hilo dueño de la máquina, de su bitácora para retroceder, del resumen del minimapa,
+    del detector de ciclos y del perfil.
+
+    Órdenes: ("run",), ("pause",), ("step",), ("back",), ("seek", fracción), ("reset",),
+    ("input", cadena), ("load", ruta), ("trace", ruta), ("speed", pasos por segundo o None),
+    ("profile", bool) y ("quit",).
+    """
+    CHUNK_SECONDS = 0.01
+    REPLAY_CHUNK = 16384  # Registros de traza por tramo sin límite de velocidad
+    PUBLISH_INTERVAL = 1 / 60
+
+    def __init__(self, mtu: MTU, window_half: int = 16, speed: Optional[int] = 10, minimap_width: int = 0):
+        super().__init__(name="mtu-worker", daemon=True)
+        self.mtu = mtu
+        # Mientras se reproduce una traza, `mtu` es la máquina de la traza y esta la original
+        self.program_mtu = mtu
+        self.trace: Optional[TraceReader] = None
+        self.window_half = window_half
+        self.minimap_width = minimap_width
+        self.summary = TapeSummary()
+        self.detector = CycleDetector()
+        self.detector_origin = 0  # Paso de la bitácora en que empezó a observar el detector
+        self.rebuild_cost = 0.0
+        self.rebuilt_at = 0.0
+        self.speed = speed
+        self.journal = Journal()
+        self.profile: Optional[Profile] = None
+        self.commands: "queue.Queue[tuple]" = queue.Queue()
+        self.running = False
+        self.credit = 0.0
+        self.last_tick = time.perf_counter()
+        self.last_publish = 0.0
+        self.serial = 0
+        self.snapshot: Snapshot = self.publish("idle")
+
+    def send(self, *command):
+        self.commands.put(command)
+
+    def stop(self):
+        self.send("quit")
+        self.join()
+
+    def run(self):
+        while True:
+            if self.running:
+                wait = self.advance()
+                try:
+                    command = self.commands.get(timeout=wait) if wait > 0 else self.commands.get_nowait()
+                except queue.Empty:
+                    continue
+            else:
+                command = self.commands.get()
+            if command[0] == "quit":
+                return
+            self.handle(command)
+
+    def hooks(self) -> list:
+        hooks = [self.journal, self.summary, self.detector]
+        if self.profile is not None:
+            hooks.append(self.profile)
+        return hooks
+
+    def advance(self) -> float:
+        """Ejecuta un tramo de la corrida automática; devuelve cuánto esperar antes del siguiente.
+
+        Sin límite de velocidad se usa el bucle rápido sin bitácora (el historial para
+        retroceder empieza de nuevo); con límite, se ejecutan los pasos que corresponden
+        al tiempo transcurrido.
+        """
+        now = time.perf_counter()
+        elapsed, self.last_tick = now - self.last_tick, now
+        if self.trace is not None:
+            return self.advance_trace(now, elapsed)
+        if self.speed is None:
+            self.journal.clear()
+            self.summary.stale = True
+            self.detector.reset()
+            self.detector_origin = 0
+            hooks = [self.profile] if self.profile is not None else None
+            result = self.mtu.run(max_seconds=self.CHUNK_SECONDS, hooks=hooks)
+        else:
+            # Tope de un cuarto de segundo para no acumular pasos si el hilo se retrasa
+            self.credit = min(self.credit + elapsed * self.speed, max(1.0, self.speed / 4))
+            if self.credit < 1:
+                return (1 - self.credit) / self.speed
+            result = self.mtu.run(max_steps=int(self.credit), max_seconds=self.CHUNK_SECONDS, hooks=self.hooks())
+            self.credit -= result.steps
+        if result.halted:
+            self.running = False
+        if result.halted or now - self.last_publish >= self.PUBLISH_INTERVAL:
+            self.publish("run", result, self.describe(result))
+        return 0.0
+
+    def advance_trace(self, now: float, elapsed: float) -> float:
+        """Como `advance`, pero aplicando pasos grabados en lugar de ejecutar la máquina."""
+        if self.speed is None:
+            count = self.REPLAY_CHUNK
+        else:
+            self.credit = min(self.credit + elapsed * self.speed, max(1.0, self.speed / 4))
+            if self.credit < 1:
+                return (1 - self.credit) / self.speed
+            count = int(self.credit)
+        steps = self.trace.forward(self.mtu, count)
+        self.credit = max(0.0, self.credit - steps)
+        self.summary.stale = True
+        result = self.trace.result(steps, time.perf_counter() - now)
+        message = None
+        if self.trace.position == len(self.trace):
+            self.running = False
+            message = "Fin de la traza."
+        if not self.running or now - self.last_publish >= self.PUBLISH_INTERVAL:
+            self.publish("run", result, message)
+        return 0.0
+
+    def open_trace(self, path: str) -> Optional[str]:
+        """Pasa a reproducir la traza `path`; devuelve el error si no se pudo abrir."""
+        try:
+            trace = TraceReader(path)
+        except (MTUError, OSError, ValueError) as e:
+            return str(e)
+        self.close_trace()
+        self.trace = trace
+        self.mtu = trace.machine()
+        return None
+
+    def close_trace(self):
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+            self.mtu = self.program_mtu
+
+    def handle(self, command: tuple):
+        name = command[0]
+        mtu = self.mtu
+        result = None
+        message = None
+        if name == "run":
+            self.running = True
+            self.credit = 1.0  # El primer paso es inmediato
+            self.last_tick = time.perf_counter()
+        elif name == "pause":
+            self.running = False
+        elif name == "step" and self.trace is not None:
+            self.running = False
+            result = self.trace.result(self.trace.forward(mtu, 1))
+            if self.trace.position == len(self.trace):
+                message = "Fin de la traza."
+        elif name == "step":
+            self.running = False
+            result = mtu.run(max_steps=1, hooks=self.hooks())
+            message = self.describe(result)
+        elif name in ("back", "seek", "reset") and self.trace is not None:
+            self.running = False
+            self.summary.stale = True
+            if name == "back":
+                if not self.trace.backward(mtu, 1):
+                    message = "Ya está en el paso inicial."
+            else:
+                self.trace.seek(mtu, round(command[1] * len(self.trace)) if name == "seek" else 0)
+            self.refresh_summary(force=True)
+        elif name in ("back", "seek"):
+            self.running = False
+            self.summary.stale = True
+            if name == "back":
+                if not self.journal.undo(mtu):
+                    message = "Ya está en el paso inicial."
+            elif len(self.journal):
+                self.journal.seek(mtu, round(command[1] * len(self.journal)))
+            self.reset_detector()
+            if isinstance(mtu.error, ExecutionError):
+                mtu.error = None
+        elif name in ("reset", "input", "load", "trace"):
+            self.running = False
+            if name == "trace":
+                message = self.open_trace(command[1])
+            else:
+                self.close_trace()
+            mtu = self.mtu
+            if name == "input":
+                mtu.initial_user_input = command[1]
+                mtu.initial_input_file = None
+            if name == "load":
+                try:
+                    mtu.read_file(command[1])
+                except (MTUError, OSError) as e:
+                    message = str(e)
+            elif name != "trace":
+                mtu.reset()
+                if isinstance(mtu.error, ExecutionError):
+                    mtu.error = None
+            self.journal.clear()
+            self.summary.stale = True
+            self.refresh_summary(force=True)
+            self.reset_detector()
+            if self.profile is not None:
+                self.profile.clear()
+        elif name == "speed":
+            self.speed = command[1]
+            self.credit = 0.0
+        elif name == "profile":
+            self.profile = Profile() if command[1] else None
+        self.publish(name, result, message)
+
+    def describe(self, result: RunResult) -> Optional[str]:
+        return self.detector.describe(self.detector_origin) if result.reason == HaltReason.LOOPING else None
+
+    def reset_detector(self):
+        self.detector.reset()
+        self.detector_origin = self.journal.position
+
+    def refresh_summary(self, force: bool = False):
+        """Reconstruye el resumen del minimapa si la cinta cambió sin pasar por los hooks.
+
+        Reconstruir cuesta O(longitud de la cinta); salvo con `force`, para no dominar las
+        corridas largas se hace a lo sumo cada diez veces lo que tardó la última vez.
+        """
+        now = time.perf_counter()
+        if not self.summary.stale or (not force and now - self.rebuilt_at < 10 * self.rebuild_cost):
+            return
+        self.summary.rebuild(self.mtu.job_tape)
+        self.rebuilt_at = time.perf_counter()
+        self.rebuild_cost = self.rebuilt_at - now
+
+    def publish(self, event: str, result: Optional[RunResult] = None, message: Optional[str] = None) -> Snapshot:
+        mtu = self.mtu
+        tape = mtu.job_tape
+        self.serial += 1
+        snapshot = Snapshot(self.serial, event, result, message)
+        snapshot.state = mtu.current_state
+        snapshot.accepting = mtu.current_state in mtu.accepting_states
+        snapshot.program_loaded = mtu.program_loaded
+        snapshot.error = mtu.error
+        snapshot.pointer = mtu.pointer
+        snapshot.lo, snapshot.hi = tape.lo, tape.hi
+        # Misma ventana que dibujaba la interfaz: centrada en la cabeza, pegada a los bordes
+        half = self.window_half
+        start = max(tape.lo, mtu.pointer - half)
+        end = min(tape.hi, start + half * 2 + 2)
+        if end >= tape.hi and end - start < half * 2 + 1:
+            start = max(tape.lo, tape.hi - (half * 2 + 1))
+        snapshot.window_start = start
+        snapshot.window = tape.window(start, end)
+        snapshot.running = self.running
+        snapshot.speed = self.speed
+        timeline = self.trace if self.trace is not None else self.journal
+        snapshot.position = timeline.position
+        snapshot.recorded = len(timeline)
+        if self.profile is not None:
+            snapshot.profiling = True
+            snapshot.profile_steps = self.profile.steps
+            snapshot.hottest = self.profile.hottest(5)
+        if self.minimap_width:
+            self.refresh_summary()
+            snapshot.minimap = self.summary.columns(tape, self.minimap_width)
+        self.snapshot = snapshot
+        self.last_publish = time.perf_counter()
+        return snapshot